@@ -0,0 +1,108 @@
+"""
+Benchmark the search_files_tool finder against the glob.glob implementation it replaced.
+
+Builds a synthetic uv-style project (sources plus a large .venv and node_modules) and times a
+recursive "*.py" search with each approach, then times the tools as the agents call them:
+search_files_tool, and grep_tool through the workspace index (a cold first call that builds
+the index, then warm calls that only re-verify it).
+
+Usage:
+    python benchmarks/search_files_benchmark.py --files 100000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from agents.tool_context import ToolContext  # noqa: E402
+from agents.usage import Usage  # noqa: E402
+from tools import grep_tool, search_files_tool  # noqa: E402
+from util.file_walker import find_files  # noqa: E402
+
+
+def build_tree(root: str, total_files: int) -> None:
+    """Spread `total_files` files over sources (20%), .venv (60%) and node_modules (20%)."""
+    layout = {"src": 0.2, ".venv/lib/python3.12/site-packages": 0.6, "node_modules": 0.2}
+    for base, share in layout.items():
+        count = int(total_files * share)
+        for i in range(count):
+            directory = os.path.join(root, base, f"pkg{i // 100}")
+            if i % 100 == 0:
+                os.makedirs(directory, exist_ok=True)
+            extension = ".py" if i % 3 else ".txt"
+            with open(os.path.join(directory, f"module{i}{extension}"), "w") as f:
+                f.write("x = 1\n")
+
+
+def timed(label: str, func) -> None:
+    started = time.perf_counter()
+    found = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed * 1000:>9.1f} ms  {found:>7} paths")
+
+
+def call_tool(tool, **arguments) -> int:
+    """
+    Invoke a (governed) function tool the way the runner does, without its progress print.
+    Returns the result's "count", or -1 when the governor cut the output short.
+    """
+    payload = json.dumps(arguments)
+    context = ToolContext(context=None, usage=Usage(), tool_name=tool.name, tool_call_id="bench", tool_arguments=payload)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(tool.on_invoke_tool(context, payload))
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return -1
+    return result["count"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100_000, help="number of files to generate")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="search_files_bench_")
+    try:
+        print(f"Building {args.files} files in {root}...")
+        build_tree(root, args.files)
+
+        timed("glob.glob(**/*.py)", lambda: len(glob.glob(os.path.join(root, "**", "*.py"), recursive=True)))
+        timed("find_files(*.py)", lambda: len(find_files(root, ["*.py"])[0]))
+        timed("find_files(*.py, limit=500)", lambda: len(find_files(root, ["*.py"], limit=500)[0]))
+        timed("find_files(*.py, limit=20, sort_by=mtime)", lambda: len(find_files(root, ["*.py"], limit=20, sort_by="mtime")[0]))
+
+        # The tools resolve the workspace index from the current directory.
+        previous_cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            for run in ("cold", "warm", "warm"):
+                timed(
+                    f"search_files_tool(*.py), {run}",
+                    lambda: call_tool(search_files_tool, patterns=["*.py"], path=".", recursive=True, max_results=0, sort_by="path"),
+                )
+            for run in ("cold, builds index", "warm", "warm"):
+                timed(
+                    f"grep_tool(x = 1), {run}",
+                    lambda: call_tool(grep_tool, pattern="x = 1", path=".", include=["*.py"], output_mode="files_with_matches",
+                                      context_lines=0, max_results=0, ignore_case=False),
+                )
+        finally:
+            os.chdir(previous_cwd)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
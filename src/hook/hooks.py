@@ -1,37 +1,71 @@
+import time
 from agents import Agent, AgentHooks, RunContextWrapper, Tool
 from typing import Any
+from util import emit_progress, publish_event, record_tool_call
+from util.event_bus import truncate
 
 class CustomAgentHooks(AgentHooks):
+    """
+    Report agent and tool events on the event bus (util.event_bus) with their sizes and
+    durations; the console, JSONL file and ring buffer sinks take it from there. Tool time also
+    goes to the pipeline's telemetry (util.telemetry). During a streamed pipeline step they
+    also go to the step's progress display (util.streaming), and the console sink skips them.
+    """
+
     def __init__(self, display_name: str):
-        self.event_counter = 0
         self.display_name = display_name
+        self._started: dict[tuple[str, str | None, str | None], list[float]] = {}
+
+    @staticmethod
+    def _key(context: RunContextWrapper, agent: Agent, tool: Tool | None) -> tuple[str, str | None, str | None]:
+        # Tool hooks get a ToolContext whose call id tells parallel calls of one tool apart;
+        # agent starts and ends fall back to a stack per agent.
+        return agent.name, tool.name if tool else None, getattr(context, "tool_call_id", None) if tool else None
+
+    def _start(self, context: RunContextWrapper, agent: Agent, tool: Tool | None = None) -> None:
+        self._started.setdefault(self._key(context, agent, tool), []).append(time.perf_counter())
+
+    def _duration(self, context: RunContextWrapper, agent: Agent, tool: Tool | None = None) -> float | None:
+        key = self._key(context, agent, tool)
+        started = self._started.get(key)
+        if not started:
+            return None
+        duration = time.perf_counter() - started.pop()
+        if not started:
+            del self._started[key]
+        return duration
 
     async def on_start(self, context: RunContextWrapper, agent: Agent) -> None:
-        self.event_counter += 1
-        print(f"### ({self.display_name}) {self.event_counter}: Agent {agent.name} started")
+        self._start(context, agent)
+        displayed = emit_progress("agent_start", agent=agent.name)
+        publish_event("agent_start", self.display_name, agent=agent.name, displayed=displayed)
 
     async def on_end(self, context: RunContextWrapper, agent: Agent, output: Any) -> None:
-        self.event_counter += 1
-        print(
-            f"### ({self.display_name}) {self.event_counter}: Agent {agent.name} ended with output {output}"
+        text = str(output)
+        displayed = emit_progress("agent_end", agent=agent.name, size=len(text))
+        publish_event(
+            "agent_end", self.display_name, agent=agent.name, size=len(text),
+            duration=self._duration(context, agent), text=truncate(text), displayed=displayed,
         )
 
     async def on_handoff(self, context: RunContextWrapper, agent: Agent, source: Agent) -> None:
-        self.event_counter += 1
-        print(
-            f"### ({self.display_name}) {self.event_counter}: Agent {source.name} handed off to {agent.name}"
-        )
+        displayed = emit_progress("handoff", agent=agent.name, source=source.name)
+        publish_event("handoff", self.display_name, agent=agent.name, text=source.name, displayed=displayed)
 
     async def on_tool_start(self, context: RunContextWrapper, agent: Agent, tool: Tool) -> None:
-        self.event_counter += 1
-        print(
-            f"### ({self.display_name}) {self.event_counter}: Agent {agent.name} started tool {tool.name}"
-        )
+        self._start(context, agent, tool)
+        displayed = emit_progress("tool_start", agent=agent.name, tool=tool.name)
+        publish_event("tool_start", self.display_name, agent=agent.name, tool=tool.name, displayed=displayed)
 
     async def on_tool_end(
         self, context: RunContextWrapper, agent: Agent, tool: Tool, result: str
     ) -> None:
-        self.event_counter += 1
-        print(
-            f"### ({self.display_name}) {self.event_counter}: Agent {agent.name} ended tool {tool.name} with result {result}"
-        )
\ No newline at end of file
+        text = str(result)
+        duration = self._duration(context, agent, tool)
+        if duration is not None:
+            record_tool_call(agent.name, tool.name, duration)
+        displayed = emit_progress("tool_end", agent=agent.name, tool=tool.name, size=len(text))
+        publish_event(
+            "tool_end", self.display_name, agent=agent.name, tool=tool.name, size=len(text),
+            duration=duration, text=truncate(text), displayed=displayed,
+        )
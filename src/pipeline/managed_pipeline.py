@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from agents import TResponseInputItem, ItemHelpers
-from util import RetryRunner
+from util import PromptLayout, format_prompt_cache_stats, escalate_models, start_model_routing, run_step, step_timings, format_step_timings, STREAM_PIPELINES, start_telemetry_run, start_iteration, format_telemetry, export_telemetry, PipelineTrace, load_trace, format_critical_path, export_chrome_trace
 from service_agents import getEvaluatorAgent, getPlanningAgent, getCodingAgent, getTestingAgent, getLLMContextManagementAgent
 from service_agents.evaluation_agent import EvaluationFeedback
 
@@ -13,15 +13,21 @@ if __name__ == "__main__":
         datefmt="%Y-%m-%d %H:%M:%S"
     )
 
-async def managed_pipeline():
+async def managed_pipeline(stream: bool = STREAM_PIPELINES):
     """
     Pipeline that uses discrete steps for each agent.
+
+    Args:
+        stream: Show each agent's output as it is generated and report the time to first
+            output per step (default: AGENTS_STREAM=1).
     """
 
     # Get initial user request
     user_request = input("What do you want to build?")
     logging.debug(f"User request received: {user_request}")
-    input_items: list[TResponseInputItem] = [{"content": user_request, "role": "user"}]
+    # The task stays at the front of every iteration's input so providers can reuse its cached prefix.
+    prompt_layout = PromptLayout(user_request)
+    input_items: list[TResponseInputItem] = prompt_layout.items()
 
     # Initialize tracking variables
     evaluation_result: EvaluationFeedback | None = None
@@ -35,6 +41,11 @@ async def managed_pipeline():
     evaluator = getEvaluatorAgent()
     context_management_agent = getLLMContextManagementAgent()
     logging.debug("Evaluator and Orchestrator agents initialized.")
+    first_step = len(step_timings())
+    start_telemetry_run("managed")
+    start_model_routing()
+    pipeline_trace = PipelineTrace("managed pipeline")
+    pipeline_trace.start()
 
     try:
         logging.info("Starting solution development.")
@@ -42,45 +53,54 @@ async def managed_pipeline():
         # Main solution development loop
         while (not evaluation_result or evaluation_result.score == "needs_improvement") and iteration_count < max_iterations:
             iteration_count += 1
+            start_iteration(iteration_count)
+            pipeline_trace.iteration(iteration_count)
             logging.info(f"Iteration {iteration_count}/{max_iterations} - working on solution.")
             print(f"Iteration {iteration_count}/{max_iterations}")
 
             # --- Planner Step ---
-            planner_result = await RetryRunner.run(planner, input_items)
+            planner_result = await run_step(f"planner {iteration_count}", planner, input_items, stream)
             input_items.append({"content": planner_result.final_output, "role": "assistant"})
             input_items.append({"content": "Planner completed. Coding agent please start coding.", "role": "user"})
             
             # --- Coding Step ---
-            coder_result = await RetryRunner.run(coder, input_items)
+            coder_result = await run_step(f"coder {iteration_count}", coder, input_items, stream)
             input_items.append({"content": coder_result.final_output, "role": "assistant"})
             input_items.append({"content": "Coding completed. Testing agent please start testing.", "role": "user"})
             
             # --- Testing Step ---
-            tester_result = await RetryRunner.run(tester, input_items)
+            tester_result = await run_step(f"tester {iteration_count}", tester, input_items, stream)
             input_items.append({"content": tester_result.final_output, "role": "assistant"})
             input_items.append({"content": "Testing completed. Evaluator please start evaluating.", "role": "user"})
 
             # --- Evaluator Step ---
             logging.debug("Calling evaluator agent to assess current solution.")
-            evaluator_result = await RetryRunner.run(evaluator, input_items)
+            evaluator_result = await run_step(f"evaluator {iteration_count}", evaluator, input_items, stream)
             evaluation_result = evaluator_result.final_output
             logging.debug(f"Evaluator returned: score={evaluation_result.score}, feedback={evaluation_result.feedback}")
 
             if evaluation_result.score == "needs_improvement" and iteration_count < max_iterations:
+                # The work did not pass on the current models; give the next attempt stronger ones.
+                escalated = escalate_models([planner.name, coder.name, tester.name])
+                if escalated:
+                    logging.info(f"Escalated models for the next iteration: {escalated}")
                 input_items.append({"content": "Evaluation completed. Context management agent please start summarizing the conversation.", "role": "user"})
-                context_summary = await RetryRunner.run(context_management_agent, input_items)
-                feedback_message = f"""
-                You are at iteration {iteration_count} of {max_iterations} working on the following task: {user_request}.
-                The summarized context of the conversation is: {context_summary}
-                Please address this feedback: {evaluation_result.feedback}
-                """
-                input_items = [
-                    {"content": feedback_message, "role": "developer"},
-                    {"content": "user_request", "role": "user"}
-                ]
+                context_summary = await run_step(f"context {iteration_count}", context_management_agent, input_items, stream)
+                # Per-iteration content goes last, after the task, so it never breaks the cached prefix.
+                input_items = prompt_layout.items(
+                    f"The summarized context of the previous iterations is: {context_summary.final_output}\n"
+                    f"Please address this feedback: {evaluation_result.feedback}\n"
+                    f"This is iteration {iteration_count + 1} of {max_iterations}."
+                )
                 logging.info("Evaluator feedback appended for further refinement.")
 
         print(f"\n🔍 Evaluation Score: {evaluation_result.score}")
+        if stream:
+            print(f"\n⏱️ Step timings:\n{format_step_timings(step_timings()[first_step:])}")
+        if cache_report := format_prompt_cache_stats():
+            print(f"\n🗄️ Prompt cache:\n{cache_report}")
+        if telemetry_report := format_telemetry():
+            print(f"\n📈 Telemetry:\n{telemetry_report}\nSaved to {export_telemetry()}")
         logging.debug("Exiting pipeline.")
             
     except KeyboardInterrupt:
@@ -88,4 +108,10 @@ async def managed_pipeline():
         print("\nOperation cancelled by user. Exiting...")
 
     except Exception as general_error:
-        logging.info(f"Unexpected error occurred: {general_error}")
\ No newline at end of file
+        logging.info(f"Unexpected error occurred: {general_error}")
+
+    finally:
+        if trace_path := pipeline_trace.finish():
+            print(f"\n🧵 Trace saved to {trace_path}")
+            print(f"Critical path: {format_critical_path(load_trace(trace_path))}")
+            print(f"Flamegraph (chrome://tracing, ui.perfetto.dev or speedscope.app): {export_chrome_trace(trace_path)}")
@@ -3,7 +3,7 @@
 import asyncio
 import logging
 from agents import TResponseInputItem, ItemHelpers
-from util import RetryRunner
+from util import format_prompt_cache_stats, escalate_models, start_model_routing, run_step, step_timings, format_step_timings, STREAM_PIPELINES, start_telemetry_run, start_iteration, format_telemetry, export_telemetry, PipelineTrace, load_trace, format_critical_path, export_chrome_trace
 from service_agents import getOrchestratorAgent, getEvaluatorAgent
 from service_agents.evaluation_agent import EvaluationFeedback
 
@@ -15,10 +15,15 @@ if __name__ == "__main__":
         datefmt="%Y-%m-%d %H:%M:%S"
     )
 
-async def orchestrator_pipeline():
+async def orchestrator_pipeline(stream: bool = STREAM_PIPELINES):
     """
     Pipeline that uses orchestrator and evaluator agents to build a project.
     Tracing is added at every step to track what each agent is thinking and responding.
+
+    Args:
+        stream: Show the orchestrator's output, its tool calls and the progress of the agents
+            it calls as it happens, and report the time to first output per step
+            (default: AGENTS_STREAM=1).
     """
 
     # Welcome and introductory messages
@@ -45,6 +50,11 @@ async def orchestrator_pipeline():
     evaluator = getEvaluatorAgent()
     orchestrator = getOrchestratorAgent()
     logging.debug("Evaluator and Orchestrator agents initialized.")
+    first_step = len(step_timings())
+    start_telemetry_run("orchestrator")
+    start_model_routing()
+    pipeline_trace = PipelineTrace("orchestrator pipeline")
+    pipeline_trace.start()
 
     try:
         logging.info("Starting analysis and context gathering.")
@@ -53,18 +63,20 @@ async def orchestrator_pipeline():
         # Main solution development loop
         while (not evaluation_result or evaluation_result.score == "needs_improvement") and iteration_count < max_iterations:
             iteration_count += 1
+            start_iteration(iteration_count)
+            pipeline_trace.iteration(iteration_count)
             logging.info(f"Iteration {iteration_count}/{max_iterations} - working on solution.")
             print(f"\n📝 Working on solution (Iteration {iteration_count}/{max_iterations})...")
 
             # --- Orchestrator Step ---
             try:
                 logging.debug("Calling orchestrator agent with current input items.")
-                orchestrator_result = await RetryRunner.run(orchestrator, input_items)
+                orchestrator_result = await run_step(f"orchestrator {iteration_count}", orchestrator, input_items, stream)
                 logging.debug("Received result from orchestrator.")
 
                 input_items.append({"content": "Wait... Did you properly use the coding agent and testing agent to implement your solution... and they wrote to the directory?", "role": "user"})
 
-                orchestrator_result = await RetryRunner.run(orchestrator, input_items)
+                orchestrator_result = await run_step(f"orchestrator check {iteration_count}", orchestrator, input_items, stream)
 
                 # Update input for the next step and store latest solution
                 input_items = orchestrator_result.to_input_list()
@@ -91,7 +103,7 @@ async def orchestrator_pipeline():
             # --- Evaluator Step ---
             try:
                 logging.debug("Calling evaluator agent to assess current solution.")
-                evaluator_result = await RetryRunner.run(evaluator, input_items)
+                evaluator_result = await run_step(f"evaluator {iteration_count}", evaluator, input_items, stream)
                 evaluation_result = evaluator_result.final_output
                 logging.debug(f"Evaluator returned: score={evaluation_result.score}, feedback={evaluation_result.feedback}")
 
@@ -99,6 +111,10 @@ async def orchestrator_pipeline():
                 print(f"📊 Feedback: {evaluation_result.feedback}")
 
                 if evaluation_result.score == "needs_improvement" and iteration_count < max_iterations:
+                    # The work did not pass on the current models; give the next attempt stronger ones.
+                    escalated = escalate_models([orchestrator.name] + [tool.name for tool in orchestrator.tools])
+                    if escalated:
+                        logging.info(f"Escalated models for the next iteration: {escalated}")
                     feedback_message = f"Please address this feedback: {evaluation_result.feedback}"
                     input_items.append({"content": feedback_message, "role": "user"})
                     logging.info("Evaluator feedback appended for further refinement.")
@@ -130,6 +146,12 @@ async def orchestrator_pipeline():
 
         print("=" * 60 + "\n")
         print(f"{latest_solution}\n")
+        if stream:
+            print(f"⏱️ Step timings:\n{format_step_timings(step_timings()[first_step:])}\n")
+        if cache_report := format_prompt_cache_stats():
+            print(f"🗄️ Prompt cache:\n{cache_report}\n")
+        if telemetry_report := format_telemetry():
+            print(f"📈 Telemetry:\n{telemetry_report}\nSaved to {export_telemetry()}\n")
         logging.debug("Final solution displayed to user.")
             
     except KeyboardInterrupt:
@@ -141,4 +163,10 @@ async def orchestrator_pipeline():
         if latest_solution:
             logging.info("Providing partial solution due to unexpected error.")
             print("\nHere's the partial solution I was able to develop:")
-            print(f"\n{latest_solution}\n")
\ No newline at end of file
+            print(f"\n{latest_solution}\n")
+
+    finally:
+        if trace_path := pipeline_trace.finish():
+            print(f"\n🧵 Trace saved to {trace_path}")
+            print(f"Critical path: {format_critical_path(load_trace(trace_path))}")
+            print(f"Flamegraph (chrome://tracing, ui.perfetto.dev or speedscope.app): {export_chrome_trace(trace_path)}")
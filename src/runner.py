@@ -1,32 +1,36 @@
 import asyncio
 from pipeline import orchestrator_pipeline, managed_pipeline
 import os
-from openai import AsyncOpenAI
 from agents import (
-    set_tracing_disabled,
     set_default_openai_client,
     set_default_openai_api,
 )
-from util import MAX_RETRIES
+from util import Endpoint, configure_client_pool, configure_local_tracing
 
 # Configuration
 BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
 API_KEY = os.environ.get(
     "GEMINI_API_KEY"
 )  # Set your API key here or use environment variables
-MODEL_NAME = "gemini-2.0-flash"
 
-# Initialize the OpenAI client with retry options
-client = AsyncOpenAI(
-    base_url=BASE_URL,
-    api_key=API_KEY,
-    timeout=60.0,  # Increase timeout for longer operations
-    max_retries=MAX_RETRIES,
+# Model calls go through a pool of endpoints with health tracking and failover. Set
+# AGENTS_PROVIDERS_FILE to a JSON file listing endpoints to use more than this one.
+client_pool = configure_client_pool(
+    [
+        Endpoint(
+            name="gemini",
+            base_url=BASE_URL,
+            api_key=API_KEY,
+            timeout=60.0,  # Increase timeout for longer operations
+        )
+    ]
 )
 
-set_default_openai_client(client=client, use_for_tracing=False)
+# Anything not run through RetryRunner still uses the first endpoint's client.
+set_default_openai_client(client=client_pool.endpoints[0].get_client(), use_for_tracing=False)
 set_default_openai_api("chat_completions")
-set_tracing_disabled(disabled=True)
+# Traces stay on this machine (.agents_cache/traces); AGENTS_TRACING=0 turns them off.
+configure_local_tracing()
 
 if __name__ == "__main__":
     asyncio.run(orchestrator_pipeline())
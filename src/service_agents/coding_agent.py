@@ -2,14 +2,19 @@ from agents import Agent
 from tools import (
     list_directory_tool,
     read_file_tool,
+    read_files_tool,
     search_files_tool,
     grep_tool,
     semantic_patch_file_tool,
     run_command_tool,
+    read_command_output_tool,
+    run_in_session_tool,
+    run_pytest_tool,
     create_directory_tool,
-    create_file_tool
+    create_file_tool,
+    write_files_tool,
 )
-from util import prompt_with_agent_as_tool
+from util import DEFAULT_MODEL, prompt_with_agent_as_tool
 from hook import CustomAgentHooks
 
 prompt = """
@@ -37,18 +42,23 @@ prompt = """
         """
 
 
-def getCodingAgent(model_name: str = "gemini-2.0-flash-exp"):
+def getCodingAgent(model_name: str = DEFAULT_MODEL):
     return Agent(
         name="coding_agent",
         instructions=prompt_with_agent_as_tool(prompt),
         tools=[
             list_directory_tool,
             read_file_tool,
+            read_files_tool,
             search_files_tool,
             grep_tool,
             run_command_tool,
+            read_command_output_tool,
+            run_in_session_tool,
+            run_pytest_tool,
             create_directory_tool,
-            create_file_tool
+            create_file_tool,
+            write_files_tool,
         ],
         hooks=CustomAgentHooks("Coding"),
         model=model_name,
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Literal
 from agents import Agent
-from util import prompt_with_agent_as_tool
+from util import DEFAULT_MODEL, prompt_with_agent_as_tool
 from hook import CustomAgentHooks
 
 prompt = """
@@ -30,7 +30,7 @@ Be decisive but fair in your assessment. Include detailed reasoning for your sco
 """
 
 
-def getEvaluatorAgent(model_name: str = "gemini-2.0-flash-exp"):
+def getEvaluatorAgent(model_name: str = DEFAULT_MODEL):
     return Agent(
         name="evaluator",
         instructions=prompt,
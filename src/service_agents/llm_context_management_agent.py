@@ -1,5 +1,5 @@
 from agents import Agent
-from util import prompt_with_agent_as_tool
+from util import DEFAULT_MODEL, prompt_with_agent_as_tool
 from hook import CustomAgentHooks
 
 prompt = """
@@ -29,7 +29,7 @@ SUMMARY FORMAT:
 Your summaries should be comprehensive enough to provide full context but concise enough to significantly reduce token usage.
 """
 
-def getLLMContextManagementAgent(model_name: str = "gemini-2.0-flash-exp"):
+def getLLMContextManagementAgent(model_name: str = DEFAULT_MODEL):
     """
     Returns an agent specialized in summarizing conversations and managing context.
     
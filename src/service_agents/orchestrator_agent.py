@@ -2,7 +2,7 @@ from agents import Agent
 from service_agents.planning_agent import getPlanningAgent
 from service_agents.coding_agent import getCodingAgent
 from service_agents.testing_agent import getTestingAgent
-from util import prompt_with_agent_as_tool
+from util import DEFAULT_MODEL, prompt_with_agent_as_tool, agent_as_tool
 from hook import CustomAgentHooks
 
 prompt = """
@@ -53,20 +53,23 @@ Tips:
 - Always ask the coding agent to specifically create the code in the directory.
 """
 
-def getOrchestratorAgent(model_name: str = "gemini-2.0-flash-exp"):
+def getOrchestratorAgent(model_name: str = DEFAULT_MODEL):
     return Agent(
         name="orchestrator_agent",
         instructions=prompt_with_agent_as_tool(prompt),
         tools=[
-            getPlanningAgent().as_tool(
+            agent_as_tool(
+                getPlanningAgent(),
                 tool_name="planning_agent",
                 tool_description="Creates detailed technical specifications and step-by-step plans.",
             ),
-            getCodingAgent().as_tool(
+            agent_as_tool(
+                getCodingAgent(),
                 tool_name="coding_agent",
                 tool_description="Implements solutions following best practices and design patterns.",
             ),
-            getTestingAgent().as_tool(
+            agent_as_tool(
+                getTestingAgent(),
                 tool_name="testing_agent",
                 tool_description="Verifies implementation quality and identifies issues.",
             )
@@ -2,9 +2,10 @@ from agents import Agent
 from tools import (
     list_directory_tool,
     read_file_tool,
+    read_files_tool,
     search_files_tool,
 )
-from util import prompt_with_agent_as_tool
+from util import DEFAULT_MODEL, prompt_with_agent_as_tool
 from hook import CustomAgentHooks
 
 prompt = """
@@ -30,13 +31,14 @@ If critical information is missing, note it but continue with reasonable assumpt
 
 
 # Agent definitions with improved instructions
-def getPlanningAgent(model_name: str = "gemini-2.0-flash-exp"):
+def getPlanningAgent(model_name: str = DEFAULT_MODEL):
     return Agent(
         name="planning_agent",
         instructions=prompt_with_agent_as_tool(prompt),
         tools=[
             list_directory_tool,
             read_file_tool,
+            read_files_tool,
             search_files_tool,
         ],
         hooks=CustomAgentHooks("Planning"),
@@ -2,13 +2,18 @@ from agents import Agent
 from tools import (
     list_directory_tool,
     read_file_tool,
+    read_files_tool,
     grep_tool,
     run_command_tool,
+    read_command_output_tool,
+    run_in_session_tool,
+    run_pytest_tool,
     semantic_patch_file_tool,
     create_directory_tool,
-    create_file_tool
+    create_file_tool,
+    write_files_tool,
 )
-from util import prompt_with_agent_as_tool
+from util import DEFAULT_MODEL, prompt_with_agent_as_tool
 from hook import CustomAgentHooks
 
 prompt = """
@@ -39,17 +44,22 @@ If needed, use uv to install dependencies.
 """
 
 
-def getTestingAgent(model_name: str = "gemini-2.0-flash-exp"):
+def getTestingAgent(model_name: str = DEFAULT_MODEL):
     return Agent(
         name="testing_agent",
         instructions=prompt_with_agent_as_tool(prompt),
         tools=[
             list_directory_tool,
             read_file_tool,
+            read_files_tool,
             run_command_tool,
+            read_command_output_tool,
+            run_in_session_tool,
+            run_pytest_tool,
             grep_tool,
             create_directory_tool,
-            create_file_tool
+            create_file_tool,
+            write_files_tool,
         ],
         hooks=CustomAgentHooks("Testing"),
         model=model_name,
@@ -5,23 +5,54 @@ This module provides the core tools functionality that can be used by agents.
 """
 
 from .list_directory_tool import list_directory_tool
-from .read_file_tool import read_file_tool
+from .read_file_tool import read_file_tool, READ_FILE_OUTPUT_TOKENS
+from .read_files_tool import read_files_tool, READ_FILES_OUTPUT_TOKENS
 from .grep_tool import grep_tool
 from .edit_file_tool import edit_file_tool
 from .run_command_tool import run_command_tool
+from .read_command_output_tool import read_command_output_tool
+from .session_tools import run_in_session_tool, run_pytest_tool
 from .search_files_tool import search_files_tool
 from .semantic_patch import semantic_patch_file_tool
 from .create_directory_tool import create_directory_tool
 from .create_file_tool import create_file_tool
+from .write_files_tool import write_files_tool
+from util import govern_tool
+
+# Every tool's result passes through the output governor before it reaches the model. Budgets
+# are in tokens. The read tools clamp the max_tokens they are asked for and also size their
+# results by the JSON they produce, escapes included (a control character such as \x1b
+# becomes six characters), to stay within READ_FILE_OUTPUT_TOKENS and READ_FILES_OUTPUT_TOKENS,
+# so the governor never cuts a read that the read cache recorded as delivered. Command output gets
+# repeated lines collapsed. read_command_output_tool is left alone because it is how the
+# truncated remainder is read back.
+list_directory_tool = govern_tool(list_directory_tool)
+read_file_tool = govern_tool(read_file_tool, max_tokens=READ_FILE_OUTPUT_TOKENS)
+read_files_tool = govern_tool(read_files_tool, max_tokens=READ_FILES_OUTPUT_TOKENS)
+grep_tool = govern_tool(grep_tool)
+edit_file_tool = govern_tool(edit_file_tool)
+run_command_tool = govern_tool(run_command_tool, dedupe_lines=True)
+run_in_session_tool = govern_tool(run_in_session_tool, dedupe_lines=True)
+run_pytest_tool = govern_tool(run_pytest_tool, dedupe_lines=True)
+search_files_tool = govern_tool(search_files_tool)
+semantic_patch_file_tool = govern_tool(semantic_patch_file_tool)
+create_directory_tool = govern_tool(create_directory_tool)
+create_file_tool = govern_tool(create_file_tool)
+write_files_tool = govern_tool(write_files_tool)
 
 __all__ = [
     "list_directory_tool",
     "read_file_tool",
+    "read_files_tool",
     "grep_tool",
     "edit_file_tool",
     "run_command_tool",
+    "read_command_output_tool",
+    "run_in_session_tool",
+    "run_pytest_tool",
     "search_files_tool",
     "semantic_patch_file_tool",
     "create_directory_tool",
-    "create_file_tool"
+    "create_file_tool",
+    "write_files_tool",
 ]
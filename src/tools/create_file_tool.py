@@ -1,5 +1,6 @@
 import os
 from agents import function_tool
+from util import notify_file_changed
 
 @function_tool
 async def create_file_tool(filename: str, content: str) -> str:
@@ -28,6 +29,7 @@ async def create_file_tool(filename: str, content: str) -> str:
 
         with open(filename, "w") as f:
             f.write(content)
+        notify_file_changed(filename)
         return f"File '{filename}' created successfully."
     except Exception as e:
         return f"Error creating file '{filename}': {e}"
\ No newline at end of file
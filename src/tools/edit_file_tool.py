@@ -1,5 +1,6 @@
 from typing import Any, List, Dict
 from agents import function_tool
+from util import notify_file_changed, apply_edit_operations, EditError, atomic_write
 
 @function_tool
 def edit_file_tool(
@@ -10,6 +11,11 @@ def edit_file_tool(
     """
     Edit a file with precision using operations instead of rewriting the entire file.
 
+    All operations in a batch refer to the file as it was before the batch: line numbers and
+    search texts do not shift as earlier operations are applied. Operations whose targets
+    overlap are rejected, and the file is written atomically, so either every operation is
+    applied or the file is left unchanged.
+
     Args:
         path: The file path to edit
         operations: A list of edit operations, each one being a dict with the following structure:
@@ -20,7 +26,7 @@ def edit_file_tool(
                 - line_range: [start_line, end_line] (1-indexed, inclusive)
                 - before_text: string to find (edits before this text)
                 - after_text: string to find (edits after this text)
-                - replace_text: string to replace
+                - replace_text: string to replace (every occurrence is replaced)
         read_before_edit: Whether to read the file contents before editing (default: True)
 
     Returns:
@@ -53,94 +59,15 @@ def edit_file_tool(
                 if not any(op.get("type") == "append" for op in operations):
                     return f"Error: File '{path}' not found"
 
-        # Split content into lines for line-based operations
-        original_lines = original_content.splitlines() if original_content else []
-        edited_lines = original_lines.copy()
-
-        # Apply each operation
-        for op in operations:
-            op_type = op.get("type")
-            target = op.get("target", {})
-            content = op.get("content", "")
-
-            # Handle append operation (special case)
-            if op_type == "append":
-                if edited_lines and edited_lines[-1]:
-                    edited_lines.append("")  # Ensure newline before append
-                edited_lines.append(content)
-                continue
-
-            # Find target position for the edit
-            if "line_number" in target:
-                # Line number targeting (1-indexed)
-                line_idx = target["line_number"] - 1
-                if line_idx < 0 or line_idx > len(edited_lines):
-                    return f"Error: Line number {target['line_number']} out of range"
-
-                if op_type == "insert":
-                    edited_lines.insert(line_idx, content)
-                elif op_type == "delete":
-                    del edited_lines[line_idx]
-                elif op_type == "replace":
-                    edited_lines[line_idx] = content
-
-            elif "line_range" in target:
-                # Line range targeting (1-indexed)
-                start_idx, end_idx = (
-                    target["line_range"][0] - 1,
-                    target["line_range"][1] - 1,
-                )
-                if start_idx < 0 or end_idx >= len(edited_lines) or start_idx > end_idx:
-                    return f"Error: Line range {target['line_range']} out of range"
-
-                if op_type == "delete":
-                    del edited_lines[start_idx : end_idx + 1]
-                elif op_type == "replace":
-                    edited_lines[start_idx : end_idx + 1] = [content]
-
-            elif "before_text" in target:
-                # Text-based targeting (before specific text)
-                joined_content = "\n".join(edited_lines)
-                search_text = target["before_text"]
-                if search_text not in joined_content:
-                    return f"Error: Text '{search_text}' not found in file"
-
-                pos = joined_content.find(search_text)
-                line_count = joined_content[:pos].count("\n")
-
-                if op_type == "insert":
-                    edited_lines.insert(line_count, content)
-
-            elif "after_text" in target:
-                # Text-based targeting (after specific text)
-                joined_content = "\n".join(edited_lines)
-                search_text = target["after_text"]
-                if search_text not in joined_content:
-                    return f"Error: Text '{search_text}' not found in file"
-
-                pos = joined_content.find(search_text) + len(search_text)
-                line_count = joined_content[:pos].count("\n")
-
-                if op_type == "insert":
-                    edited_lines.insert(line_count + 1, content)
-
-            elif "replace_text" in target:
-                # Replace specific text
-                joined_content = "\n".join(edited_lines)
-                search_text = target["replace_text"]
-                if search_text not in joined_content:
-                    return f"Error: Text '{search_text}' not found in file"
-
-                if op_type == "replace":
-                    joined_content = joined_content.replace(search_text, content)
-                    edited_lines = joined_content.splitlines()
+        # Resolve every operation against the original content and rebuild once
+        try:
+            edited_content = apply_edit_operations(original_content, operations)
+        except EditError as e:
+            return f"Error: {e}"
 
-        # Write the edited content back to the file
-        with open(path, "w") as f:
-            f.write("\n".join(edited_lines))
-            # Ensure file ends with newline
-            if edited_lines:
-                f.write("\n")
+        # Write the edited content back to the file via a temp file + rename
+        atomic_write(path, edited_content)
+        notify_file_changed(path)
 
         return f"Successfully edited file: {path}"
     except Exception as e:
@@ -1,32 +1,189 @@
-from typing import Dict, Any
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 from agents import function_tool
+from util import iter_files, is_binary, get_workspace_index
+from util.trigram_index import required_literals
+
+DEFAULT_MAX_RESULTS = 200
+MAX_LINE_LENGTH = 500
+GREP_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+OUTPUT_MODES = ("content", "files_with_matches", "count")
+
+
+def _search_file(
+    file_path: str,
+    file_regex: re.Pattern | None,
+    line_regex: re.Pattern,
+    with_lines: bool,
+    context_lines: int,
+    limit: int,
+) -> tuple[str, int, list[dict]] | None:
+    """
+    Search a single file. Returns (file_path, match_count, matches) or None when the file
+    is unreadable, binary, or does not match.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if is_binary(data):
+        return None
+
+    text = data.decode("utf-8", errors="replace")
+    # One pass over the whole buffer in C for text every match must contain rejects most
+    # files without splitting lines.
+    if file_regex is not None and file_regex.search(text) is None:
+        return None
+
+    lines = text.splitlines()
+    hits = [i for i, line in enumerate(lines) if line_regex.search(line)]
+    if not hits:
+        return None
+    if not with_lines:
+        return file_path, len(hits), []
+
+    matches = []
+    for i in hits[:limit]:
+        match = {"file": file_path, "line_number": i + 1, "content": lines[i][:MAX_LINE_LENGTH]}
+        if context_lines:
+            match["context_before"] = [
+                line[:MAX_LINE_LENGTH] for line in lines[max(0, i - context_lines):i]
+            ]
+            match["context_after"] = [
+                line[:MAX_LINE_LENGTH] for line in lines[i + 1:i + 1 + context_lines]
+            ]
+        matches.append(match)
+    return file_path, len(hits), matches
+
+
+def _collect(found: tuple[str, int, list[dict]] | None, output_mode: str, limit: int, result: Dict[str, Any]) -> bool:
+    """Merge one file's results into `result`. Returns True once the result cap is exceeded."""
+    if found is None:
+        return False
+    file_path, hit_count, file_matches = found
+    if output_mode == "content":
+        room = limit - len(result["matches"])
+        result["matches"].extend(file_matches[:room])
+        return hit_count > room
+    if output_mode == "files_with_matches":
+        if len(result["files"]) >= limit:
+            return True
+        result["files"].append(file_path)
+        return False
+    if len(result["counts"]) >= limit:
+        return True
+    result["counts"][file_path] = hit_count
+    return False
 
 
 @function_tool
-def grep_tool(pattern: str, file_path: str) -> Dict[str, Any]:
+def grep_tool(
+    pattern: str,
+    path: str,
+    include: List[str],
+    output_mode: str,
+    context_lines: int,
+    max_results: int,
+    ignore_case: bool,
+) -> Dict[str, Any]:
     """
-    Search for a pattern in a file.
+    Search for a regular expression in a file, or in every file under a directory, in one call.
+
+    Directories are searched recursively in parallel. Binary files and ignored paths
+    (.git, .venv, node_modules, __pycache__, entries in .gitignore, ...) are skipped.
+    Prefer one directory-wide call over many single-file calls.
 
     Args:
-        pattern: The pattern to search for.
-        file_path: The file to search in.
+        pattern: The regular expression to search for.
+        path: The file or directory to search in.
+        include: File name globs to restrict the search to (e.g. ["*.py", "*.md"]). Pass [] to search all files.
+        output_mode: One of "content" (matching lines), "files_with_matches" (only file paths)
+            or "count" (number of matching lines per file).
+        context_lines: Number of lines of context to return around each match (0 for none).
+        max_results: Maximum number of matches (or files, for the other modes) to return. 0 uses the default of 200.
+        ignore_case: Whether the search is case insensitive.
 
     Returns:
-        A dictionary with matching lines.
+        A dictionary with the results for the requested output mode ("matches", "files" or "counts"),
+        the total match "count", the number of "files_searched", whether results were "truncated",
+        and an "error" field.
+
+    Examples:
+        grep_tool("def main", "src", ["*.py"], "content", 2, 0, False) # Finds main functions with 2 lines of context
+        grep_tool("TODO", ".", [], "files_with_matches", 0, 0, True) # Lists every file containing a TODO
+        grep_tool("import os", "src/tools/grep_tool.py", [], "count", 0, 0, False) # Counts matches in a single file
     """
-    print(f"Searching for pattern: {pattern} in file: {file_path}")
+    print(f"Searching for pattern: {pattern} in: {path}")
+    if output_mode not in OUTPUT_MODES:
+        return {"error": f"Unknown output_mode '{output_mode}', expected one of {OUTPUT_MODES}", "matches": []}
+    limit = max_results if max_results > 0 else DEFAULT_MAX_RESULTS
+    context_lines = max(0, context_lines)
+
     try:
-        import re
+        flags = re.IGNORECASE if ignore_case else 0
+        line_regex = re.compile(pattern, flags)
+    except re.error as e:
+        return {"error": f"Invalid pattern: {e}", "matches": []}
+    # Prefilter on the longest literal the pattern requires rather than the pattern itself:
+    # run over the whole file, anchors and lookarounds would not mean what they do per line.
+    literals = [literal for literal in required_literals(pattern) if "\n" not in literal]
+    file_regex = (
+        re.compile(re.escape(max(literals, key=len)), line_regex.flags & re.IGNORECASE) if literals else None
+    )
 
-        matches = []
+    indexed = None
+    if os.path.isfile(path):
+        candidates = iter([path])
+    elif os.path.isdir(path):
+        # The workspace index narrows the search to files that can contain the pattern's
+        # literal text; paths outside the workspace fall back to walking the tree.
+        index = get_workspace_index()
+        indexed = index.candidates(path, pattern, ignore_case, include or None) if index else None
+        candidates = iter(indexed) if indexed is not None else iter_files(path, include or None)
+    else:
+        return {"error": f"Path '{path}' not found", "matches": []}
 
-        with open(file_path, "r") as f:
-            for i, line in enumerate(f, 1):
-                if re.search(pattern, line):
-                    matches.append({"line_number": i, "content": line.rstrip()})
+    with_lines = output_mode == "content"
+    result: Dict[str, Any] = {"files_searched": 0, "truncated": False, "error": None}
+    if indexed is not None:
+        result["index_candidates"] = len(indexed)
+    result[{"content": "matches", "files_with_matches": "files", "count": "counts"}[output_mode]] = (
+        {} if output_mode == "count" else []
+    )
 
-        return {"matches": matches, "count": len(matches), "error": None}
-    except FileNotFoundError:
-        return {"error": f"File '{file_path}' not found", "matches": []}
+    try:
+        with ThreadPoolExecutor(max_workers=GREP_WORKERS) as pool:
+            # Keep a bounded window of in-flight files so results stream back in walk
+            # order and the walk stops as soon as the result cap is reached.
+            pending = deque()
+
+            def drain_one() -> bool:
+                result["files_searched"] += 1
+                return _collect(pending.popleft().result(), output_mode, limit, result)
+
+            for file_path in candidates:
+                pending.append(pool.submit(
+                    _search_file, file_path, file_regex, line_regex, with_lines, context_lines, limit
+                ))
+                if len(pending) >= GREP_WORKERS * 4 and drain_one():
+                    result["truncated"] = True
+                    break
+            while pending and not result["truncated"]:
+                if drain_one():
+                    result["truncated"] = True
+            for future in pending:
+                future.cancel()
     except Exception as e:
         return {"error": str(e), "matches": []}
+
+    if output_mode == "content":
+        result["count"] = len(result["matches"])
+    elif output_mode == "files_with_matches":
+        result["count"] = len(result["files"])
+    else:
+        result["count"] = sum(result["counts"].values())
+    return result
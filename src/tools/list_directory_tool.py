@@ -1,50 +1,91 @@
 import os
+import time
 from typing import Dict, Any
 from agents import function_tool
+from util import walk_entries
+
+MAX_ENTRIES = 1000
+OUTPUT_FORMATS = ("table", "json")
 
 
 @function_tool
-def list_directory_tool(path: str) -> Dict[str, Any]:
+def list_directory_tool(path: str, max_depth: int, output_format: str) -> Dict[str, Any]:
     """
-    Return detailed information about files in the given directory.
+    Return detailed information about files in the given directory, optionally recursing into
+    subdirectories. Dependency and tooling directories (.git, .venv, node_modules, __pycache__, ...)
+    and anything matched by .gitignore are skipped. Explore a project with one recursive call
+    rather than one call per directory.
 
     Args:
-        path: The directory path to list. Defaults to current directory.
+        path: The directory path to list. Use "." for the current directory.
+        max_depth: How many levels to descend. 1 lists only the directory itself, 0 means unlimited.
+        output_format: "table" for a compact text listing (one "size<TAB>modified<TAB>path" line per
+            entry, directories end with "/"), or "json" for lists of file and directory objects.
 
     Returns:
-        A dictionary with files, directories, and any errors.
+        A dictionary with the listing, the number of files and directories, whether the listing
+        was truncated, and any errors.
 
     Examples:
-        list_directory_tool(".") # Lists the current directory
+        list_directory_tool(".", 1, "table") # Lists the current directory
+
+        list_directory_tool(".", 3, "table") # Lists the project tree three levels deep
 
-        list_directory_tool("/home/user/projects") # Lists the projects directory from the home directory
-        
-        list_directory_tool("src/tools") # Lists the tools directory from the current directory
-    
+        list_directory_tool("src/tools", 1, "json") # Lists the tools directory as JSON objects
     """
     print(f"Listing directory: {path}")
-    try:
-        items = os.listdir(path)
-        result = {"files": [], "directories": [], "error": None}
+    if output_format not in OUTPUT_FORMATS:
+        return {"error": f"Unknown output_format '{output_format}', expected one of {OUTPUT_FORMATS}", "files": [], "directories": []}
+    if not os.path.isdir(path):
+        return {"error": f"Directory '{path}' not found", "files": [], "directories": []}
 
-        for item in items:
-            item_path = os.path.join(path, item)
+    files = []
+    directories = []
+    rows = []
+    file_count = 0
+    truncated = False
+    try:
+        for item in walk_entries(path, max_depth=max_depth if max_depth > 0 else None, include_dirs=True):
+            if file_count + len(directories) >= MAX_ENTRIES:
+                truncated = True
+                break
+            entry = item.entry
             try:
-                if os.path.isfile(item_path):
-                    result["files"].append(
-                        {
-                            "name": item,
-                            "size": os.path.getsize(item_path),
-                            "extension": os.path.splitext(item)[1],
-                            "modified": os.path.getmtime(item_path),
-                        }
-                    )
-                elif os.path.isdir(item_path):
-                    result["directories"].append(item)
-            except Exception as e:
+                if entry.is_dir():
+                    directories.append(item.rel_path)
+                    rows.append(f"-\t-\t{item.rel_path}/")
+                    continue
+                # DirEntry.stat() is the only stat made for a file; is_dir() comes from the
+                # directory listing itself.
+                stat = entry.stat()
+            except OSError:
                 # Skip items with permission issues
-                pass
-
-        return result
+                continue
+            file_count += 1
+            if output_format == "table":
+                modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(stat.st_mtime))
+                rows.append(f"{stat.st_size}\t{modified}\t{item.rel_path}")
+            else:
+                files.append(
+                    {
+                        "name": item.rel_path,
+                        "size": stat.st_size,
+                        "extension": os.path.splitext(entry.name)[1],
+                        "modified": stat.st_mtime,
+                    }
+                )
     except Exception as e:
         return {"error": str(e), "files": [], "directories": []}
+
+    result: Dict[str, Any] = {
+        "file_count": file_count,
+        "directory_count": len(directories),
+        "truncated": truncated,
+        "error": None,
+    }
+    if output_format == "table":
+        result["listing"] = "\n".join(rows)
+    else:
+        result["files"] = files
+        result["directories"] = directories
+    return result
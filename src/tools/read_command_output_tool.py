@@ -0,0 +1,38 @@
+from typing import Dict, Any
+from agents import function_tool
+from util import read_spooled_output
+
+DEFAULT_LIMIT = 200
+
+
+@function_tool
+def read_command_output_tool(output_id: str, stream: str, offset: int, limit: int, pattern: str) -> Dict[str, Any]:
+    """
+    Page through or search the full output of a command whose result from run_command_tool was
+    shortened, or the full result of any tool whose answer carried a "_truncated" output_id
+    (read it with stream "stdout"). Each returned line is prefixed with its line number.
+
+    Args:
+        output_id: The output_id returned by run_command_tool or in a "_truncated" entry.
+        stream: "stdout" or "stderr".
+        offset: The line to start at, counting from 0. Use next_offset from the previous call to continue.
+        limit: Maximum number of lines to return. Pass 0 for the default of 200.
+        pattern: A regular expression; only matching lines are returned. Pass "" to read lines in order.
+
+    Returns:
+        A dictionary with the lines, how many were returned, the offset to continue from
+        (None at the end of the output), and any error. A page stops early at about 24000
+        characters, and lines over 2000 characters are cut.
+
+    Examples:
+        read_command_output_tool("20250101-120000-42-1", "stdout", 0, 0, "FAILED|Error") # Finds the failing tests
+        read_command_output_tool("20250101-120000-42-1", "stdout", 1500, 100, "") # Reads lines 1501-1600
+    """
+    print(f"Reading command output: {output_id} ({stream})")
+    try:
+        page = read_spooled_output(output_id, stream, offset, limit if limit > 0 else DEFAULT_LIMIT, pattern or None)
+        return {**page, "error": None}
+    except FileNotFoundError:
+        return {"error": f"No saved output '{output_id}' for {stream}", "lines": ""}
+    except Exception as e:
+        return {"error": str(e), "lines": ""}
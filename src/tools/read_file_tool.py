@@ -1,34 +1,85 @@
+import json
 import os
 from typing import Dict, Any
-from agents import function_tool
+from agents import function_tool, RunContextWrapper
+from util import get_read_cache
+
+READ_FILE_MAX_TOKENS = 8000  # largest max_tokens honoured
+READ_FILE_OUTPUT_TOKENS = 2 * READ_FILE_MAX_TOKENS  # the output governor's cap for this tool
+CHARS_PER_TOKEN = 4
+MAX_RESIZES = 3
+
+
+def _json_size(window: Dict[str, Any]) -> int:
+    """Characters of `window` once sent as JSON; escaping makes control characters six times longer."""
+    return len(json.dumps(window, ensure_ascii=False, separators=(",", ":"), default=str))
 
 
 @function_tool
-def read_file_tool(path: str) -> Dict[str, Any]:
+def read_file_tool(
+    ctx: RunContextWrapper[Any],
+    path: str,
+    mode: str,
+    start: int,
+    count: int,
+    max_tokens: int,
+    cursor: str,
+) -> Dict[str, Any]:
     """
-    Read and return the contents of the given file.
+    Read the given file, or only part of it. Large files are never loaded whole: prefer reading
+    a window ("head", "tail", "around", "lines") over the full file when you only need part of it.
+
+    Reading the same thing twice in a conversation returns "unchanged" instead of the content,
+    and re-reading a full file that has changed since may return a "diff" against your last read.
 
     Args:
         path: The path to the file to read.
+        mode: How to read the file:
+            - "full": the whole file, up to the token budget
+            - "lines": `count` lines starting at line `start` (1-indexed)
+            - "head": the first `count` lines
+            - "tail": the last `count` lines (line numbers are negative, counted from the end)
+            - "around": line `start` with `count` lines of context on each side
+            - "bytes": `count` bytes starting at byte offset `start`
+        start: The line or byte offset the mode refers to. Pass 0 when the mode does not use it.
+        count: Number of lines (or bytes) to return. Pass 0 for the mode's default.
+        max_tokens: Maximum tokens of content to return, at most 8000. Pass 0 for the default of 8000.
+        cursor: The "next_cursor" of a previous read of this file to continue where it stopped,
+            or "" to start a new read.
 
     Returns:
-        A dictionary with the file content or an error message.
+        A dictionary with the content, the line (or byte) range it covers, the file size, a
+        "next_cursor" that is set when there is more to read, and an error message if any.
+        When "unchanged" is true or a "diff" is present, "content" is None.
+
+    Examples:
+        read_file_tool("src/main.py", "full", 0, 0, 0, "") # Reads the file, up to the default token budget
+        read_file_tool("app.log", "tail", 0, 100, 0, "") # Reads the last 100 lines of a log
+        read_file_tool("src/main.py", "around", 120, 15, 0, "") # Reads lines 105-135
+        read_file_tool("src/main.py", "full", 0, 0, 0, "8123:241") # Continues a previous read
     """
     print(f"Reading file: {path}")
+    max_tokens = max(0, min(max_tokens, READ_FILE_MAX_TOKENS))
     try:
-        with open(path, "r") as f:
-            content = f.read()
-
-        # Add file metadata
-        file_size = os.path.getsize(path)
-        file_extension = os.path.splitext(path)[1]
-
-        return {
-            "content": content,
-            "size": file_size,
-            "extension": file_extension,
-            "error": None,
-        }
+        # The run's Usage object is shared by every tool call of one conversation, so it
+        # scopes the "unchanged since your last read" answers to what this model has seen.
+        cache = get_read_cache()
+        window, receipt = cache.peek(ctx.usage, path, mode, start, count, max_tokens, cursor)
+        # Size the window by its JSON, not its text, and read less while it would not fit the
+        # governor's cap: a window the governor cuts must not be recorded as delivered.
+        limit = READ_FILE_OUTPUT_TOKENS * CHARS_PER_TOKEN - 200
+        budget = max_tokens or READ_FILE_MAX_TOKENS
+        for _ in range(MAX_RESIZES):
+            size = _json_size(window)
+            if size <= limit:
+                break
+            budget = max(budget * limit // size - 1, 1)
+            window, receipt = cache.peek(ctx.usage, path, mode, start, count, budget, cursor)
+        if _json_size(window) <= limit:
+            cache.mark_delivered(ctx.usage, receipt)
+        window["extension"] = os.path.splitext(path)[1]
+        window["error"] = None
+        return window
     except FileNotFoundError:
         return {"error": f"File '{path}' not found", "content": None}
     except Exception as e:
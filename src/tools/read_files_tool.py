@@ -0,0 +1,186 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from typing import Dict, Any, List
+from agents import function_tool, RunContextWrapper
+from util import get_read_cache, walk_entries
+
+DEFAULT_MAX_TOKENS = 20000
+READ_FILES_MAX_TOKENS = 20000  # largest max_tokens honoured
+READ_FILES_OUTPUT_TOKENS = 2 * READ_FILES_MAX_TOKENS  # the output governor's cap for this tool
+MIN_FILE_TOKENS = 256  # no file gets less than this share of the budget
+MAX_FILES = 50
+READ_WORKERS = 8
+CHARS_PER_TOKEN = 4
+
+_RANGE = re.compile(r"^(.+):(\d+)-(\d+)$")
+_executor: ThreadPoolExecutor | None = None
+
+
+def _match_parts(parts: List[str], pattern: List[str]) -> bool:
+    """Match path components against glob components: "*" stays within one, "**" spans any number."""
+    if not pattern:
+        return not parts
+    if pattern[0] == "**":
+        return any(_match_parts(parts[i:], pattern[1:]) for i in range(len(parts) + 1))
+    return bool(parts) and fnmatch(parts[0], pattern[0]) and _match_parts(parts[1:], pattern[1:])
+
+
+def _glob(pattern: str) -> List[str]:
+    """
+    Files matching `pattern`, at most MAX_FILES. The walk starts at the pattern's literal
+    directory prefix (so absolute and "../" patterns work), skips ignored directories, and only
+    goes as deep as the pattern reaches unless it contains "**".
+    """
+    parts = pattern.replace(os.sep, "/").split("/")
+    first = next(i for i, part in enumerate(parts) if any(c in part for c in "*?["))
+    base = "/".join(parts[:first]) or ("/" if pattern.startswith("/") else "")
+    wanted = [part for part in parts[first:] if part]
+    if not os.path.isdir(base or "."):
+        return []
+    depth = None if "**" in wanted else len(wanted)
+    matches = []
+    for item in walk_entries(base or ".", max_depth=depth):
+        if _match_parts(item.rel_path.split("/"), wanted):
+            matches.append(os.path.join(base, item.rel_path) if base else item.rel_path)
+            if len(matches) >= MAX_FILES:
+                break
+    return matches
+
+
+def _expand(paths: List[str]) -> List[tuple[str, int, int]]:
+    """Resolve globs and "path:start-end" ranges into (path, start, end) with end 0 meaning unbounded."""
+    resolved = []
+    seen = set()
+    for item in paths:
+        match = _RANGE.match(item)
+        if match and not os.path.exists(item):
+            targets = [(match.group(1), int(match.group(2)), int(match.group(3)))]
+        elif any(c in item for c in "*?["):
+            targets = [(match, 0, 0) for match in _glob(item.removeprefix("./"))]
+        else:
+            targets = [(item, 0, 0)]
+        for target in targets:
+            if target not in seen:
+                seen.add(target)
+                resolved.append(target)
+    return resolved
+
+
+def _read_one(owner: Any, path: str, start: int, end: int, max_lines: int, max_tokens: int) -> tuple[Dict[str, Any], Any]:
+    """
+    Read one file without recording it as delivered. Returns the entry for the result and the
+    read cache receipt to record once the entry is known to be sent.
+    """
+    try:
+        if start:
+            count = end - start + 1
+            if max_lines > 0:
+                count = min(count, max_lines)
+            window, receipt = get_read_cache().peek(owner, path, "lines", start, max(count, 1), max_tokens, "")
+        elif max_lines > 0:
+            window, receipt = get_read_cache().peek(owner, path, "head", 0, max_lines, max_tokens, "")
+        else:
+            window, receipt = get_read_cache().peek(owner, path, "full", 0, 0, max_tokens, "")
+    except FileNotFoundError:
+        return {"path": path, "error": "not found"}, None
+    except Exception as e:
+        return {"path": path, "error": str(e)}, None
+
+    entry: Dict[str, Any] = {"path": path, "lines": f"{window.get('start_line')}-{window.get('end_line')}"}
+    content = window.get("content")
+    if content is not None and "\0" in content[:8000]:
+        entry["error"] = "binary file"
+    elif window.get("unchanged"):
+        entry["unchanged"] = True
+    elif window.get("diff") is not None:
+        entry["diff"] = window["diff"]
+    else:
+        entry["content"] = content
+    if window.get("next_cursor"):
+        entry["next_cursor"] = window["next_cursor"]
+    return entry, receipt
+
+
+@function_tool
+def read_files_tool(
+    ctx: RunContextWrapper[Any], paths: List[str], max_lines_per_file: int, max_tokens: int
+) -> Dict[str, Any]:
+    """
+    Read several files in one call. Use this instead of calling read_file_tool repeatedly when
+    gathering context. Files are read in parallel and the token budget is shared between them.
+
+    Args:
+        paths: Files to read. Each item is a path ("src/main.py"), a line range
+            ("src/main.py:40-80"), or a glob ("src/tools/*.py", at most 50 files per glob; "*"
+            stays within a directory, "**" spans directories).
+        max_lines_per_file: Maximum lines to return per file. Pass 0 for no line limit.
+        max_tokens: Total token budget for all files together, at most 20000. Pass 0 for the
+            default of 20000.
+
+    Returns:
+        A dictionary with one entry per file in request order: its path, the line range returned
+        ("lines"), and its "content". A file read earlier in this conversation and unchanged since
+        has "unchanged": true instead; a changed one may have a "diff". A "next_cursor" means the
+        file was cut short; continue with read_file_tool. Files that did not fit in the budget
+        are listed under "skipped".
+
+    Examples:
+        read_files_tool(["README.md", "pyproject.toml", "src/*.py"], 0, 0) # Reads the project's entry points
+        read_files_tool(["src/api.py:1-60", "src/models.py:100-180"], 0, 8000) # Reads two regions
+        read_files_tool(["tests/*.py"], 40, 0) # Skims the first 40 lines of every test file
+    """
+    print(f"Reading files: {paths}")
+    global _executor
+    try:
+        targets = _expand(paths)
+    except Exception as e:
+        return {"error": str(e), "files": []}
+    if not targets:
+        return {"error": "No files matched", "files": []}
+
+    budget = min(max_tokens, READ_FILES_MAX_TOKENS) if max_tokens > 0 else DEFAULT_MAX_TOKENS
+    share = max(budget // len(targets), MIN_FILE_TOKENS)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="read_files")
+    # ctx.usage is shared by the run's tool calls, as in read_file_tool. Files are only peeked
+    # at here; the read cache learns about the entries actually returned, at the end.
+    reads = list(_executor.map(lambda t: _read_one(ctx.usage, t[0], t[1], t[2], max_lines_per_file, share), targets))
+    entries = [entry for entry, _ in reads]
+
+    # Budget left unused by small files goes to the files that were cut short, in one more round.
+    used = sum(len(entry.get("content") or entry.get("diff") or "") for entry in entries)
+    cut = [i for i, entry in enumerate(entries) if entry.get("next_cursor") and entry.get("content")]
+    spare = budget * CHARS_PER_TOKEN - used
+    if cut and spare > 0:
+        # Each file grows from what it actually got by its part of the spare budget, so the
+        # second round cannot overshoot the total and push a file out into "skipped".
+        extra = spare // len(cut)
+        larger = {i: (len(entries[i]["content"]) + extra) // CHARS_PER_TOKEN for i in cut}
+        retries = _executor.map(
+            lambda i: _read_one(ctx.usage, targets[i][0], targets[i][1], targets[i][2], max_lines_per_file, larger[i]), cut
+        )
+        for i, read in zip(cut, retries):
+            reads[i] = read
+            entries[i] = read[0]
+
+    # Besides the token budget, the entries' JSON (escapes included) has to fit the governor's
+    # cap, or a cut entry would be recorded as delivered.
+    files = []
+    skipped = []
+    remaining = budget * CHARS_PER_TOKEN
+    remaining_json = READ_FILES_OUTPUT_TOKENS * CHARS_PER_TOKEN - 200 - sum(len(path) + 8 for path, _, _ in targets)
+    cache = get_read_cache()
+    for entry, receipt in reads:
+        size = len(entry.get("content") or entry.get("diff") or "")
+        json_size = len(json.dumps(entry, ensure_ascii=False, separators=(",", ":"))) + 1
+        if size > remaining or json_size > remaining_json:
+            skipped.append(entry["path"])
+            continue
+        remaining -= size
+        remaining_json -= json_size
+        files.append(entry)
+        cache.mark_delivered(ctx.usage, receipt)
+    return {"files": files, "skipped": skipped, "error": None}
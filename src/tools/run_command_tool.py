@@ -1,33 +1,76 @@
-import subprocess as sp
-from typing import Dict, Any
+import asyncio
+import os
+from typing import Dict, Any, List
 from agents import function_tool
+from util import (
+    run_command,
+    notify_file_changed,
+    OutputSpool,
+    spooled_result,
+    has_spooled_output,
+    get_command_cache,
+)
 
 
 @function_tool
-def run_command_tool(command: str, timeout: int) -> Dict[str, Any]:
+async def run_command_tool(command: str, timeout: int, cache_inputs: List[str]) -> Dict[str, Any]:
     """
     Run a shell command and return the result. Don't use this tool lightly.
 
+    The command runs without a terminal (stdin is empty), so it must not wait for input. It is
+    subject to the configured approval policy, and on timeout it is stopped together with every
+    process it started.
+
+    Output is saved to disk as the command runs. Small outputs are returned whole; for large
+    ones only the beginning and end of each stream are returned, together with an output_id
+    and the lines that look like failures (with their line numbers). Use
+    read_command_output_tool with the output_id to page through or search the rest.
+
+    Commands whose result only depends on files in the workspace (test suites, linters, type
+    checkers) can be cached: list the files they read in `cache_inputs`, and if the same command
+    already ran while those files had the same content, its earlier result is returned at once
+    with "cached": True. Don't cache commands that are meant to change something.
+
     Args:
         command: The command to run.
         timeout: Maximum time in seconds to wait for the command to complete.
+        cache_inputs: Glob patterns of the files the result depends on, e.g. ["*.py", "pyproject.toml"].
+            Pass [] to always run the command.
 
     Returns:
-        A dictionary with stdout, stderr, and return code.
+        A dictionary with stdout, stderr, return code and duration in seconds, plus output_id,
+        output_lines and failures when the output was shortened, and whether it came from the cache.
+
+    Examples:
+        run_command_tool("git status --short", 30, []) # Always runs
+        run_command_tool("uv run pytest -q", 600, ["*.py", "pyproject.toml", "uv.lock"]) # Reuses the last run if no file changed
     """
     print(f"Running command: {command}")
+    cache = get_command_cache() if cache_inputs else None
+    key = None
+    if cache:
+        key = await asyncio.to_thread(cache.key, command, os.getcwd(), list(cache_inputs))
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            print(f"Command result served from cache: {command}")
+            if cached.get("output_id") and not has_spooled_output(cached["output_id"]):
+                cached.pop("output_id")
+                cached["note"] = "The full output of the cached run is no longer available; run with cache_inputs=[] to see it."
+            return {**cached, "cached": True}
+
+    spool = None
     try:
-        input("Press Enter to continue...")
-        result = sp.run(
-            command, shell=True, capture_output=True, text=True, timeout=timeout
-        )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode,
-            "error": None,
-        }
-    except sp.TimeoutExpired:
-        return {"error": f"Command timed out after {timeout} seconds"}
+        spool = OutputSpool()
+        result = await run_command(command, timeout, on_output=spool.write, capture=False)
+        output = spooled_result(spool, result, timeout)
+        if key and output["error"] is None:
+            cache.put(key, output)
+        return {**output, "cached": False}
     except Exception as e:
+        if spool:
+            spool.close()
+            spool.discard()
         return {"error": str(e)}
+    finally:
+        # Any command may have touched the workspace.
+        notify_file_changed(None)
@@ -1,39 +1,42 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from agents import function_tool
+from util import find_files
+
+DEFAULT_MAX_RESULTS = 500
 
 
 @function_tool
 def search_files_tool(
-    pattern: str, path: str, recursive: bool
+    patterns: List[str], path: str, recursive: bool, max_results: int, sort_by: str
 ) -> Dict[str, Any]:
     """
-    Search for files matching a pattern.
+    Search for files whose names match any of the given glob patterns. Dependency and tooling
+    directories (.git, .venv, node_modules, __pycache__, ...) and .gitignore'd paths are skipped.
 
     Args:
-        pattern: The pattern to search for (supports glob syntax).
+        patterns: The glob patterns to search for. Patterns containing "/" are matched against the
+            path relative to `path`, others against the file name.
         path: The directory to search in.
         recursive: Whether to search recursively.
+        max_results: Maximum number of paths to return. Pass 0 for the default of 500.
+        sort_by: "path" (alphabetical, fastest), "mtime" (most recently modified first) or "size" (largest first).
 
     Returns:
-        A dictionary with matching files.
+        A dictionary with matching files, how many were found, and whether the list was truncated.
 
     Examples:
-        search_files_tool("*.py", ".", True) # Searches for all python files in the current directory and subdirectories
-        search_files_tool("*.txt", "/home/user/documents", False) # Searches for all txt files in the documents directory
-        search_files_tool("*.md", "/home/user/projects/docs", True) # Searches for all markdown files in the docs directory and subdirectories
+        search_files_tool(["*.py"], ".", True, 0, "path") # Searches for all python files in the current directory and subdirectories
+        search_files_tool(["*.txt", "*.md"], "/home/user/documents", False, 0, "path") # Searches for text and markdown files in the documents directory
+        search_files_tool(["*.log"], ".", True, 5, "mtime") # Finds the five most recently written log files
     """
-    print(f"Searching files: {pattern} in {path}")
+    print(f"Searching files: {patterns} in {path}")
+    if not os.path.isdir(path):
+        return {"error": f"Directory '{path}' not found", "matches": []}
     try:
-        import glob
-
-        search_pattern = (
-            os.path.join(path, "**", pattern)
-            if recursive
-            else os.path.join(path, pattern)
-        )
-        matches = glob.glob(search_pattern, recursive=recursive)
-
-        return {"matches": matches, "count": len(matches), "error": None}
+        # Names only: a pruning walk that stops at the limit beats building the content index.
+        limit = max_results if max_results > 0 else DEFAULT_MAX_RESULTS
+        matches, _seen, truncated = find_files(path, patterns, recursive, limit, sort_by)
+        return {"matches": matches, "count": len(matches), "truncated": truncated, "error": None}
     except Exception as e:
         return {"error": str(e), "matches": []}
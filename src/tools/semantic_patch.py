@@ -1,4 +1,5 @@
 from agents import function_tool
+from util import apply_semantic_patch, atomic_write, notify_file_changed, PatchError
 
 @function_tool
 def semantic_patch_file_tool(path: str, patch_operations: str) -> str:
@@ -7,6 +8,9 @@ def semantic_patch_file_tool(path: str, patch_operations: str) -> str:
 
     This tool allows for precise file modifications by specifying context lines to locate the change points,
     followed by lines to remove and add. The format is inspired by unified diff but simplified for LLM use.
+    Each hunk changes only the occurrence found at or after its context line, matching ignores differences
+    in whitespace, and added lines take on the indentation of the code they replace. All hunks are checked
+    before anything is written, so a patch is applied completely or not at all.
 
     Args:
         path: The file path to edit
@@ -19,6 +23,7 @@ def semantic_patch_file_tool(path: str, patch_operations: str) -> str:
             - Another line to remove
             - Second line to remove
             + Replacement line
+              Unchanged line (a leading space marks a context line that must also match)
             ```
             
     Returns:
@@ -45,74 +50,25 @@ def semantic_patch_file_tool(path: str, patch_operations: str) -> str:
     print(f"Applying semantic patch to file: {path}")
 
     try:
-        # Read the original file
         try:
-            with open(path, "r") as f:
+            with open(path, "r", newline="") as f:
                 original_content = f.read()
-                original_lines = original_content.splitlines()
         except FileNotFoundError:
             return f"Error: File '{path}' not found"
 
-        # Parse the patch operations
-        patch_lines = patch_operations.strip().splitlines()
-        edited_content = original_content
-
-        # Process each patch section
-        i = 0
-        while i < len(patch_lines):
-            line = patch_lines[i].strip()
-
-            # Find context markers
-            if line.startswith("@@") and line.endswith("@@"):
-                context = line[2:-2].strip()
-                if context not in edited_content:
-                    return f"Error: Context '{context}' not found in file"
-
-                # Collect remove and add lines
-                remove_lines = []
-                add_lines = []
-                j = i + 1
-
-                while j < len(patch_lines) and not patch_lines[j].strip().startswith(
-                    "@@"
-                ):
-                    pline = patch_lines[j].strip()
-                    if pline.startswith("-"):
-                        remove_lines.append(pline[1:].strip())
-                    elif pline.startswith("+"):
-                        add_lines.append(pline[1:].strip())
-                    j += 1
-
-                # Apply the changes
-                if remove_lines:
-                    remove_block = "\n".join(remove_lines)
-                    if remove_block not in edited_content:
-                        return (
-                            f"Error: Block to remove not found near context '{context}'"
-                        )
-
-                    add_block = "\n".join(add_lines) if add_lines else ""
-                    edited_content = edited_content.replace(remove_block, add_block)
-                else:
-                    # Just insertion, no removal
-                    context_pos = edited_content.find(context) + len(context)
-                    add_block = "\n".join(add_lines)
-                    edited_content = (
-                        edited_content[:context_pos]
-                        + "\n"
-                        + add_block
-                        + edited_content[context_pos:]
-                    )
-
-                i = j
-            else:
-                i += 1
+        try:
+            edited_content, hunks = apply_semantic_patch(original_content, patch_operations)
+        except PatchError as e:
+            return f"Error: {e}"
 
-        # Write the edited content back to the file
-        with open(path, "w") as f:
-            f.write(edited_content)
+        atomic_write(path, edited_content)
+        notify_file_changed(path)
 
-        return f"Successfully applied semantic patch to file: {path}"
+        fuzzy = [f"line {h.line_number} (confidence {h.confidence:.2f})" for h in hunks if h.confidence < 1.0]
+        summary = f"Successfully applied semantic patch to file: {path} ({len(hunks)} hunk(s)"
+        if fuzzy:
+            summary += "; fuzzy matches at " + ", ".join(fuzzy) + ", review them"
+        return summary + ")"
     except Exception as e:
         print(f"Error applying semantic patch: {str(e)}")
         return f"Error applying semantic patch: {str(e)}"
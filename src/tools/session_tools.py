@@ -0,0 +1,83 @@
+from typing import Dict, Any, List
+from agents import function_tool
+from util import get_shell_session, get_pytest_worker, notify_file_changed, OutputSpool, spooled_result
+
+
+@function_tool
+async def run_in_session_tool(command: str, timeout: int, session: str) -> Dict[str, Any]:
+    """
+    Run a shell command in a persistent shell session. Unlike run_command_tool, the working
+    directory, environment variables and activated virtualenvs carry over to the next command
+    in the same session, and no new shell is started per command. Prefer it for sequences of
+    related commands, e.g. `cd backend`, then `source .venv/bin/activate`, then repeated test runs.
+
+    Commands get no input (stdin is empty) and are subject to the configured approval policy.
+    If a command times out, the session is restarted in its original directory and its state is lost.
+
+    Args:
+        command: The command to run.
+        timeout: Maximum time in seconds to wait for the command to complete.
+        session: The session name. Commands with the same name share state; pass "default" normally.
+
+    Returns:
+        The same dictionary as run_command_tool, plus the session's working directory (cwd)
+        after the command.
+
+    Examples:
+        run_in_session_tool("cd src && export DEBUG=1", 10, "default") # Changes directory and sets a variable
+        run_in_session_tool("uv run pytest -x -q", 300, "default") # Runs the tests in src with DEBUG=1
+    """
+    print(f"Running command in session '{session}': {command}")
+    spool = None
+    try:
+        shell = get_shell_session(session or "default")
+        spool = OutputSpool()
+        result = await shell.run(command, timeout, on_output=spool.write)
+        output = spooled_result(spool, result, timeout)
+        if result.timed_out:
+            output["error"] += "; the session was restarted"
+        return {**output, "cwd": shell.current_dir}
+    except Exception as e:
+        if spool:
+            spool.close()
+            spool.discard()
+        return {"error": str(e)}
+    finally:
+        # Any command may have touched the workspace.
+        notify_file_changed(None)
+
+
+@function_tool
+async def run_pytest_tool(args: List[str], timeout: int) -> Dict[str, Any]:
+    """
+    Run pytest in a warm worker process that has the interpreter and pytest already
+    loaded, so repeated test runs skip start-up. Every run still imports the project's code and
+    tests afresh. Uses AGENTS_PYTHON, the project's .venv, or the agent's own interpreter.
+
+    Args:
+        args: Arguments to pytest, e.g. ["-x", "-q", "tests/test_api.py"]. Pass [] to run everything.
+        timeout: Maximum time in seconds to wait for the tests to complete.
+
+    Returns:
+        The same dictionary as run_command_tool. If pytest is not installed for the project's
+        interpreter, an error; use run_command_tool instead.
+
+    Examples:
+        run_pytest_tool(["-q"], 300) # Runs the whole suite
+        run_pytest_tool(["-x", "tests/test_parser.py::test_empty"], 60) # Re-runs one test
+    """
+    print(f"Running pytest: {' '.join(args)}")
+    spool = None
+    try:
+        worker = get_pytest_worker()
+        spool = OutputSpool()
+        result = await worker.run(list(args), timeout, on_output=spool.write)
+        return spooled_result(spool, result, timeout)
+    except Exception as e:
+        if spool:
+            spool.close()
+            spool.discard()
+        return {"error": str(e)}
+    finally:
+        # Tests may have written files.
+        notify_file_changed(None)
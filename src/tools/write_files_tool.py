@@ -0,0 +1,43 @@
+from typing import Any, Dict, List
+from agents import function_tool
+from util import apply_file_changes
+
+
+@function_tool
+def write_files_tool(changes: List[Any]) -> Dict[str, Any]:
+    """
+    Create, edit, patch and delete many files in one call. Use this instead of calling
+    create_file_tool or edit_file_tool once per file, e.g. when scaffolding a project or making
+    a change that spans several files.
+
+    The batch is all or nothing: every change is checked first and nothing is written if any of
+    them fails; if writing fails part way, the files already written are restored.
+
+    Args:
+        changes: A list of changes, each a dict with a "path" and an "action":
+            - "write": create or overwrite the file with "content". Missing directories are created.
+            - "edit": apply "operations", a list of operations in the format of edit_file_tool.
+            - "patch": apply "patch", a patch in the format of semantic_patch_file_tool.
+            - "delete": delete the file.
+            Each file may appear only once per batch.
+
+    Returns:
+        A dictionary with "success", one result per change ("path", "action", "status" and an
+        "error" for the change that failed), and an overall error message. Statuses are "created",
+        "updated", "deleted", "failed", "not applied" or "rolled back".
+
+    Examples:
+        write_files_tool([
+            {"path": "app/__init__.py", "action": "write", "content": ""},
+            {"path": "app/main.py", "action": "write", "content": "def main():\\n    pass\\n"},
+            {"path": "README.md", "action": "edit", "operations": [{"type": "append", "content": "## Usage"}]},
+            {"path": "old_main.py", "action": "delete"},
+        ])
+    """
+    print(f"Writing {len(changes)} file change(s)")
+    try:
+        success, results = apply_file_changes(list(changes))
+        error = None if success else "No changes were applied; see the failed entries"
+        return {"success": success, "files": results, "error": error}
+    except Exception as e:
+        return {"success": False, "files": [], "error": str(e)}
@@ -6,9 +6,34 @@ including retry mechanisms, helper functions, and other common utilities.
 """
 
 # Import utility modules to make them available when importing from util
-from .retry_runner import RetryRunner, retry_with_exponential_backoff, MAX_RETRIES, RETRY_BASE_DELAY
+from .retry_runner import RetryRunner, retry_with_exponential_backoff, retry_after, MAX_RETRIES, RETRY_BASE_DELAY
+from .client_pool import Endpoint, ClientPool, PooledModel, PooledModelProvider, configure_client_pool, get_client_pool, client_pool_stats
+from .run_context import agent_scope, current_agent_name, agent_as_tool
+from .hedging import HedgePolicy, ModelCallTimeout, HedgedModel, TimedModel, set_hedge_policy, hedge_policy, hedging_stats
+from .model_router import DEFAULT_MODEL, ModelRouter, Route, RoutedModel, get_model_router, escalate_models, start_model_routing, model_router_stats
+from .rate_limiter import RateLimiter, RateLimitedModel, RateLimitedModelProvider, get_rate_limiter, rate_limiter_stats
 from .progress_tracker import ProgressTracker as ProgressTracker
 from .prompt_for_agents import prompt_with_agent_as_tool
+from .file_walker import walk_entries, iter_files, find_files, is_binary, matches_any, DEFAULT_IGNORED_DIRS
+from .file_events import add_file_change_listener, notify_file_changed
+from .trigram_index import TrigramIndex, get_workspace_index, workspace_index_stats
+from .file_window import read_window, window_from_buffer
+from .read_cache import ReadCache, get_read_cache, read_cache_stats
+from .atomic_write import atomic_write, stage_file
+from .edit_engine import apply_edit_operations, EditError
+from .patch_engine import apply_semantic_patch, PatchError
+from .file_transaction import apply_file_changes
+from .command_runner import run_command, approve_command, set_command_approval, CommandResult, CommandRejected
+from .output_spool import OutputSpool, read_spooled_output, has_spooled_output, spooled_result
+from .command_cache import CommandCache, get_command_cache, command_cache_stats
+from .output_governor import govern_tool, govern_output, compact, tool_output_stats
+from .response_cache import ResponseCache, CachingModel, CachingModelProvider, ResponseCacheMiss, get_response_cache, set_response_cache_mode, response_cache_stats
+from .streaming import STREAM_PIPELINES, run_step, emit_progress, StreamPrinter, StepTiming, step_timings, format_step_timings
+from .prompt_layout import PromptLayout, PromptCacheTrackingModel, prompt_cache_stats, format_prompt_cache_stats
+from .telemetry import Metrics, Telemetry, TelemetryModel, run_scope, start_telemetry_run, start_iteration, record_tool_call, telemetry_stats, format_telemetry, export_telemetry
+from .local_tracing import LocalTraceProcessor, PipelineTrace, configure_local_tracing, load_trace, span_tree, critical_path, format_critical_path, export_chrome_trace
+from .event_bus import AgentEvent, EventBus, JsonlSink, ConsoleSink, RingBufferSink, get_event_bus, publish_event, recent_events, event_bus_stats
+from .shell_session import ShellSession, PytestWorker, get_shell_session, get_pytest_worker, close_sessions
 
 
 __all__ = [
@@ -16,6 +41,126 @@ __all__ = [
     "retry_with_exponential_backoff",
     "MAX_RETRIES",
     "RETRY_BASE_DELAY",
+    "retry_after",
+    "Endpoint",
+    "ClientPool",
+    "PooledModel",
+    "PooledModelProvider",
+    "configure_client_pool",
+    "get_client_pool",
+    "client_pool_stats",
+    "agent_scope",
+    "current_agent_name",
+    "agent_as_tool",
+    "HedgePolicy",
+    "ModelCallTimeout",
+    "HedgedModel",
+    "TimedModel",
+    "set_hedge_policy",
+    "hedge_policy",
+    "hedging_stats",
+    "DEFAULT_MODEL",
+    "ModelRouter",
+    "Route",
+    "RoutedModel",
+    "get_model_router",
+    "escalate_models",
+    "start_model_routing",
+    "model_router_stats",
+    "RateLimiter",
+    "RateLimitedModel",
+    "RateLimitedModelProvider",
+    "get_rate_limiter",
+    "rate_limiter_stats",
     "ProgressTracker",
-    "prompt_with_agent_as_tool"
+    "prompt_with_agent_as_tool",
+    "walk_entries",
+    "iter_files",
+    "find_files",
+    "is_binary",
+    "matches_any",
+    "DEFAULT_IGNORED_DIRS",
+    "add_file_change_listener",
+    "notify_file_changed",
+    "TrigramIndex",
+    "get_workspace_index",
+    "workspace_index_stats",
+    "read_window",
+    "window_from_buffer",
+    "ReadCache",
+    "get_read_cache",
+    "read_cache_stats",
+    "atomic_write",
+    "stage_file",
+    "apply_edit_operations",
+    "EditError",
+    "apply_semantic_patch",
+    "PatchError",
+    "apply_file_changes",
+    "run_command",
+    "approve_command",
+    "set_command_approval",
+    "CommandResult",
+    "CommandRejected",
+    "OutputSpool",
+    "read_spooled_output",
+    "has_spooled_output",
+    "spooled_result",
+    "CommandCache",
+    "get_command_cache",
+    "command_cache_stats",
+    "govern_tool",
+    "govern_output",
+    "compact",
+    "tool_output_stats",
+    "ShellSession",
+    "PytestWorker",
+    "get_shell_session",
+    "get_pytest_worker",
+    "close_sessions",
+    "STREAM_PIPELINES",
+    "run_step",
+    "emit_progress",
+    "StreamPrinter",
+    "StepTiming",
+    "step_timings",
+    "format_step_timings",
+    "PromptLayout",
+    "PromptCacheTrackingModel",
+    "prompt_cache_stats",
+    "format_prompt_cache_stats",
+    "ResponseCache",
+    "CachingModel",
+    "CachingModelProvider",
+    "ResponseCacheMiss",
+    "get_response_cache",
+    "set_response_cache_mode",
+    "response_cache_stats",
+    "AgentEvent",
+    "EventBus",
+    "JsonlSink",
+    "ConsoleSink",
+    "RingBufferSink",
+    "get_event_bus",
+    "publish_event",
+    "recent_events",
+    "event_bus_stats",
+    "Metrics",
+    "Telemetry",
+    "TelemetryModel",
+    "run_scope",
+    "start_telemetry_run",
+    "start_iteration",
+    "record_tool_call",
+    "telemetry_stats",
+    "format_telemetry",
+    "export_telemetry",
+    "LocalTraceProcessor",
+    "PipelineTrace",
+    "configure_local_tracing",
+    "load_trace",
+    "span_tree",
+    "critical_path",
+    "format_critical_path",
+    "export_chrome_trace",
 ]
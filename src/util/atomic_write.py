@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+# The process umask, read once so new files get the same permissions open() would give them.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def stage_file(path: str, content: str | bytes) -> str:
+    """
+    Write `content` to a temporary file next to `path` and return the temporary file's path.
+    Bytes are written as they are. `os.replace(temp_path, path)` then completes the write; the
+    temporary file already has the permission bits of the existing `path` (or the umask
+    default for a new file).
+
+    Raises:
+        OSError: If the temporary file cannot be written. Nothing is left behind in that case.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return tmp_path
+
+
+def atomic_write(path: str, content: str | bytes) -> None:
+    """
+    Write `content` to `path` so readers only ever see the old or the new file.
+
+    The content goes to a temporary file in the same directory, which then replaces `path`
+    with a single rename. An existing file keeps its permission bits.
+
+    Raises:
+        OSError: If the file cannot be written. `path` is left untouched in that case.
+    """
+    tmp_path = stage_file(path, content)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from agents import OpenAIChatCompletionsModel
+from agents.models.interface import Model, ModelProvider
+from openai import APIConnectionError, AsyncOpenAI, DefaultAsyncHttpxClient
+
+from .hedging import TimedModel
+
+# Configuration
+PROVIDERS_FILE = os.environ.get("AGENTS_PROVIDERS_FILE", "")  # JSON file listing endpoints
+HEALTH_WINDOW = 50  # recent calls per endpoint used for the error rate
+LATENCY_SMOOTHING = 0.2  # weight of the newest latency in the moving average
+FAILURES_TO_OPEN = 3  # consecutive failures before an endpoint is taken out of rotation
+OPEN_CIRCUIT_SECONDS = 30.0
+PROBE_FRACTION = 0.05  # share of calls sent to a random other endpoint to keep its health current
+UNREACHED_LATENCY = 30.0  # assumed latency of an endpoint that has failed and never answered
+
+
+@dataclass
+class Endpoint:
+    """
+    One OpenAI-compatible API the pool can send model calls to.
+
+    `models` limits which model names the endpoint serves: None for any, a list of names, or
+    a dict mapping requested names to the endpoint's own names (e.g. {"gemini-2.0-flash-exp":
+    "gemini-2.0-flash"} on a proxy that calls it differently).
+    """
+
+    name: str
+    base_url: str
+    api_key: str | None = None
+    api_key_env: str | None = None
+    models: list[str] | dict[str, str] | None = None
+    timeout: float = 60.0
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 60.0
+    client: AsyncOpenAI | None = field(default=None, repr=False)
+
+    def serves(self, model_name: str) -> bool:
+        return self.models is None or model_name in self.models
+
+    def remote_name(self, model_name: str) -> str:
+        if isinstance(self.models, dict):
+            return self.models.get(model_name, model_name)
+        return model_name
+
+    def get_client(self) -> AsyncOpenAI:
+        if self.client is None:
+            # One HTTP connection pool per endpoint, shared by every model served there, so
+            # connections (and their TLS sessions) are reused across calls and agents.
+            http_client = DefaultAsyncHttpxClient(
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            api_key = self.api_key or (os.environ.get(self.api_key_env) if self.api_key_env else None)
+            # max_retries=0: RetryRunner's model layers own retries; the pool owns failover.
+            self.client = AsyncOpenAI(
+                base_url=self.base_url, api_key=api_key or "unused", max_retries=0, http_client=http_client
+            )
+        return self.client
+
+
+class EndpointHealth:
+    """Moving-average latency, recent error rate and a circuit breaker for one endpoint."""
+
+    def __init__(self) -> None:
+        self.latency: float | None = None
+        self.outcomes: deque[bool] = deque(maxlen=HEALTH_WINDOW)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.in_flight = 0
+        self.calls = 0
+
+    def record(self, ok: bool, seconds: float) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+            self._observe(seconds)
+        else:
+            # A call that timed out took at least `seconds`; an instant refusal says nothing.
+            if self.latency is not None and seconds > self.latency:
+                self._observe(seconds)
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= FAILURES_TO_OPEN:
+                self.open_until = time.monotonic() + OPEN_CIRCUIT_SECONDS
+
+    def record_cancelled(self, seconds: float) -> None:
+        """
+        A call abandoned by its caller (e.g. the losing copy of a hedged request) after
+        `seconds`: it counts against the error rate and the latency, but not towards opening
+        the circuit, since the endpoint did not fail.
+        """
+        self.outcomes.append(False)
+        if self.latency is not None and seconds > self.latency:
+            self._observe(seconds)
+
+    def _observe(self, seconds: float) -> None:
+        self.latency = seconds if self.latency is None else (
+            LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    def score(self) -> float:
+        """
+        Lower is better: expected latency, inflated by errors and by calls already waiting. An
+        endpoint that has not been called yet scores 0 so every endpoint gets measured.
+        """
+        if self.latency is not None:
+            latency = self.latency
+        else:
+            latency = UNREACHED_LATENCY if self.outcomes else 0.0
+        return latency * (1 + 4 * self.error_rate) * (1 + 0.1 * self.in_flight)
+
+
+def _failover_error(error: BaseException) -> bool:
+    """Errors that say something about the endpoint rather than the request."""
+    status = getattr(error, "status_code", None)
+    return (
+        isinstance(error, (APIConnectionError, TimeoutError))
+        or status in (408, 429)
+        or (status is not None and status >= 500)
+        or getattr(error, "code", None) == "timeout"
+    )
+
+
+class ClientPool:
+    """
+    A set of endpoints with health tracking. Each call goes to the healthiest available endpoint
+    that serves the model, except for a PROBE_FRACTION of calls that try another one; an
+    endpoint failing repeatedly is skipped for OPEN_CIRCUIT_SECONDS and then tried again.
+    """
+
+    def __init__(self, endpoints: list[Endpoint]):
+        if not endpoints:
+            raise ValueError("A client pool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.health = {endpoint.name: EndpointHealth() for endpoint in endpoints}
+        self._models: dict[tuple[str, str], Model] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "ClientPool":
+        """
+        Load endpoints from a JSON file: {"endpoints": [{"name", "base_url", "api_key_env",
+        "models", "timeout", "max_connections", ...}, ...]}.
+        """
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls([Endpoint(**entry) for entry in config["endpoints"]])
+
+    def candidates(self, model_name: str) -> list[Endpoint]:
+        """Endpoints serving `model_name`, healthiest first; open circuits last, soonest to close first."""
+        serving = [endpoint for endpoint in self.endpoints if endpoint.serves(model_name)]
+        if not serving:
+            raise ValueError(f"No endpoint in the client pool serves model '{model_name}'")
+        available = sorted(
+            (endpoint for endpoint in serving if self.health[endpoint.name].available()),
+            key=lambda endpoint: self.health[endpoint.name].score(),
+        )
+        if len(available) > 1 and random.random() < PROBE_FRACTION:
+            available.insert(0, available.pop(random.randrange(1, len(available))))
+        resting = sorted(
+            (endpoint for endpoint in serving if not self.health[endpoint.name].available()),
+            key=lambda endpoint: self.health[endpoint.name].open_until,
+        )
+        return available + resting
+
+    def model_for(self, endpoint: Endpoint, model_name: str) -> Model:
+        """
+        The model `model_name` at `endpoint`. Each call gets its own deadline (util/hedging.py),
+        so a hanging endpoint times out on its own and the call fails over to the next one.
+        """
+        key = (endpoint.name, model_name)
+        if key not in self._models:
+            self._models[key] = TimedModel(
+                OpenAIChatCompletionsModel(model=endpoint.remote_name(model_name), openai_client=endpoint.get_client()),
+                model_name,
+            )
+        return self._models[key]
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "endpoint": endpoint.name,
+                "base_url": endpoint.base_url,
+                "calls": self.health[endpoint.name].calls,
+                "latency": round(self.health[endpoint.name].latency or 0.0, 3),
+                "error_rate": round(self.health[endpoint.name].error_rate, 3),
+                "in_flight": self.health[endpoint.name].in_flight,
+                "available": self.health[endpoint.name].available(),
+            }
+            for endpoint in self.endpoints
+        ]
+
+    async def close(self) -> None:
+        for endpoint in self.endpoints:
+            if endpoint.client is not None:
+                await endpoint.client.close()
+                endpoint.client = None
+        self._models.clear()
+
+
+class PooledModel(Model):
+    """
+    A Model that sends each call to the pool's healthiest endpoint and, when that endpoint
+    fails in a way that is not the request's fault or misses its deadline, immediately tries
+    the next one. Only when every endpoint has failed does the error reach the retry layer.
+    """
+
+    def __init__(self, pool: ClientPool, model_name: str):
+        self.pool = pool
+        self.model_name = model_name
+
+    async def get_response(self, *args, **kwargs):
+        error: BaseException | None = None
+        for endpoint in self.pool.candidates(self.model_name):
+            health = self.pool.health[endpoint.name]
+            health.calls += 1
+            health.in_flight += 1
+            start = time.monotonic()
+            try:
+                response = await self.pool.model_for(endpoint, self.model_name).get_response(*args, **kwargs)
+            except asyncio.CancelledError:
+                health.record_cancelled(time.monotonic() - start)
+                raise
+            except Exception as e:
+                if not _failover_error(e):
+                    raise
+                health.record(False, time.monotonic() - start)
+                error = e
+                continue
+            finally:
+                health.in_flight -= 1
+            health.record(True, time.monotonic() - start)
+            return response
+        raise error
+
+    async def stream_response(self, *args, **kwargs):
+        error: BaseException | None = None
+        for endpoint in self.pool.candidates(self.model_name):
+            health = self.pool.health[endpoint.name]
+            health.calls += 1
+            health.in_flight += 1
+            start = time.monotonic()
+            started = False
+            try:
+                async for event in self.pool.model_for(endpoint, self.model_name).stream_response(*args, **kwargs):
+                    if not started:
+                        started = True
+                        health.record(True, time.monotonic() - start)
+                    yield event
+                return
+            except asyncio.CancelledError:
+                if not started:
+                    health.record_cancelled(time.monotonic() - start)
+                raise
+            except Exception as e:
+                if not _failover_error(e):
+                    raise
+                health.record(False, time.monotonic() - start)
+                # Once events have been passed on, switching endpoints would repeat output.
+                if started:
+                    raise
+                error = e
+            finally:
+                health.in_flight -= 1
+        raise error
+
+
+class PooledModelProvider(ModelProvider):
+    def __init__(self, pool: ClientPool):
+        self.pool = pool
+
+    def get_model(self, model_name: str | None) -> Model:
+        if not model_name:
+            raise ValueError("Agents using the client pool must name their model")
+        return PooledModel(self.pool, model_name)
+
+
+_client_pool: ClientPool | None = None
+
+
+def configure_client_pool(endpoints: list[Endpoint] | None = None) -> ClientPool:
+    """
+    Set up the pool RetryRunner sends model calls through: from AGENTS_PROVIDERS_FILE when it
+    is set, otherwise from `endpoints`.
+    """
+    global _client_pool
+    _client_pool = ClientPool.from_file(PROVIDERS_FILE) if PROVIDERS_FILE else ClientPool(endpoints or [])
+    return _client_pool
+
+
+def get_client_pool() -> ClientPool | None:
+    """Return the configured pool, or None when model calls use the SDK's default client."""
+    return _client_pool
+
+
+def client_pool_stats() -> list[dict[str, Any]]:
+    """Return call counts, latency, error rate and availability per endpoint."""
+    return _client_pool.stats() if _client_pool else []
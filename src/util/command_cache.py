@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+
+from .atomic_write import atomic_write
+from .file_walker import find_files
+from .trigram_index import INDEX_DIR_NAME
+
+# Configuration
+COMMAND_CACHE_DIR = os.path.join(INDEX_DIR_NAME, "command_results")
+COMMAND_CACHE_MAX_ENTRIES = int(os.environ.get("AGENTS_COMMAND_CACHE_ENTRIES", "200"))
+COMMAND_CACHE_MAX_BYTES = 64 * 1024 * 1024
+MAX_INPUT_FILES = 20000  # commands depending on more files than this are not cached
+CACHE_FORMAT_VERSION = 1
+
+
+class CommandCache:
+    """
+    On-disk cache of command results, addressed by what they depend on.
+
+    The key is a hash of the command, the directory it runs in, and the content of every file
+    matched by the caller's input globs, so any edit to an input file (or a new or deleted one)
+    produces a different key. File digests are memoized by (mtime_ns, size), so computing a key
+    on an unchanged tree costs one stat per input file. Entries live under
+    .agents_cache/command_results and the least recently used are evicted beyond
+    COMMAND_CACHE_MAX_ENTRIES or COMMAND_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, root: str = "."):
+        self.directory = os.path.join(root, COMMAND_CACHE_DIR)
+        self._digests: dict[str, tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "uncacheable": 0}
+
+    def _file_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        with self._lock:
+            memo = self._digests.get(path)
+        if memo and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return memo[2]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        result = digest.hexdigest()
+        with self._lock:
+            self._digests[path] = (stat.st_mtime_ns, stat.st_size, result)
+        return result
+
+    def key(self, command: str, cwd: str, inputs: list[str]) -> str | None:
+        """
+        Return the cache key for running `command` in `cwd` with the files matched by the
+        `inputs` globs, or None when there are too many input files to hash.
+        """
+        cwd = os.path.abspath(cwd)
+        paths, _seen, truncated = find_files(cwd, inputs, True, MAX_INPUT_FILES + 1)
+        if truncated or len(paths) > MAX_INPUT_FILES:
+            self.counters["uncacheable"] += 1
+            return None
+        digest = hashlib.sha256()
+        digest.update(json.dumps([CACHE_FORMAT_VERSION, command, cwd, sorted(inputs)]).encode())
+        for path in sorted(paths):
+            try:
+                file_digest = self._file_digest(path)
+            except OSError:
+                file_digest = "missing"
+            digest.update(f"\0{os.path.relpath(path, cwd)}\0{file_digest}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            # The file's mtime is its position in the LRU order.
+            os.utime(path)
+        except (OSError, ValueError):
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return entry
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(os.path.join(self.directory, f"{key}.json"), json.dumps(result))
+        self.counters["stores"] += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        try:
+            entries = [(entry.stat(), entry.path) for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        except OSError:
+            return
+        entries.sort(key=lambda item: item[0].st_mtime, reverse=True)
+        total = 0
+        for count, (stat, path) in enumerate(entries):
+            total += stat.st_size
+            if count >= COMMAND_CACHE_MAX_ENTRIES or total > COMMAND_CACHE_MAX_BYTES:
+                try:
+                    os.unlink(path)
+                    self.counters["evictions"] += 1
+                except OSError:
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "memoized_digests": len(self._digests),
+        }
+
+
+_command_caches: dict[str, CommandCache] = {}
+
+
+def get_command_cache(root: str = ".") -> CommandCache:
+    """Return the command cache stored under `root`."""
+    key = os.path.abspath(root)
+    if key not in _command_caches:
+        _command_caches[key] = CommandCache(key)
+    return _command_caches[key]
+
+
+def command_cache_stats() -> list[dict[str, Any]]:
+    """Return hit, miss and eviction counters for every command cache in use."""
+    return [{"root": root, **cache.stats()} for root, cache in _command_caches.items()]
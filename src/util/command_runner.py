@@ -0,0 +1,190 @@
+import asyncio
+import codecs
+import inspect
+import os
+import signal
+import sys
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Union
+
+# Configuration
+APPROVAL_POLICY = os.environ.get("AGENTS_COMMAND_APPROVAL", "prompt")  # prompt, allow, allowlist or deny
+APPROVAL_ALLOWLIST = [
+    prefix.strip() for prefix in os.environ.get("AGENTS_COMMAND_ALLOWLIST", "").split(",") if prefix.strip()
+]
+MAX_CONCURRENT_COMMANDS = int(os.environ.get("AGENTS_MAX_CONCURRENT_COMMANDS", "4"))
+KILL_GRACE_PERIOD = 2.0  # seconds between SIGTERM and SIGKILL on timeout
+READ_CHUNK_SIZE = 64 * 1024
+
+APPROVAL_POLICIES = ("prompt", "allow", "allowlist", "deny")
+
+ApprovalCallback = Callable[[str], Union[bool, Awaitable[bool]]]
+OutputCallback = Callable[[str, str], None]
+
+_approval: Union[str, ApprovalCallback] = APPROVAL_POLICY
+# One semaphore per event loop; asyncio primitives cannot be shared between loops.
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+class CommandRejected(Exception):
+    """Raised when the approval policy refuses to run a command."""
+
+
+@dataclass
+class CommandResult:
+    stdout: str
+    stderr: str
+    returncode: int | None
+    timed_out: bool
+    duration: float
+
+
+def set_command_approval(policy: Union[str, ApprovalCallback]) -> None:
+    """
+    Set how commands are approved before they run.
+
+    Args:
+        policy: "prompt" to ask on the console (without blocking the event loop), "allow" to run
+            everything, "allowlist" to run only commands starting with a prefix from
+            AGENTS_COMMAND_ALLOWLIST, "deny" to run nothing, or a callable taking the command and
+            returning (or awaiting to) True to run it.
+    """
+    global _approval
+    if isinstance(policy, str) and policy not in APPROVAL_POLICIES:
+        raise ValueError(f"Unknown approval policy '{policy}', expected one of {APPROVAL_POLICIES}")
+    _approval = policy
+
+
+async def approve_command(command: str) -> bool:
+    """Return whether the current approval policy allows `command` to run."""
+    policy = _approval
+    if callable(policy):
+        decision = policy(command)
+        return bool(await decision) if inspect.isawaitable(decision) else bool(decision)
+    if policy == "allow":
+        return True
+    if policy == "deny":
+        return False
+    if policy == "allowlist":
+        stripped = command.strip()
+        return any(stripped == prefix or stripped.startswith(prefix + " ") for prefix in APPROVAL_ALLOWLIST)
+    answer = await asyncio.to_thread(input, f"Run `{command}`? [Y/n] ")
+    return answer.strip().lower() in ("", "y", "yes")
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(max(MAX_CONCURRENT_COMMANDS, 1))
+    return semaphore
+
+
+async def _pump(
+    stream: asyncio.StreamReader, name: str, parts: list[str] | None, on_output: OutputCallback | None
+) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            if parts is not None:
+                parts.append(text)
+            if on_output:
+                on_output(name, text)
+        if not chunk:
+            return
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """
+    Terminate the command's whole process group, escalating to SIGKILL. The group is signalled
+    even when the shell itself has already exited, since background children it started (e.g.
+    `sleep 30 &`) keep the group alive and hold the output pipes open.
+    """
+    if sys.platform == "win32":
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    if process.returncode is None:
+        try:
+            await asyncio.wait_for(process.wait(), KILL_GRACE_PERIOD)
+        except asyncio.TimeoutError:
+            pass
+    # Whatever ignored SIGTERM, the shell or a child of it, is killed outright.
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+async def run_command(
+    command: str,
+    timeout: float,
+    cwd: str | None = None,
+    on_output: OutputCallback | None = None,
+    capture: bool = True,
+) -> CommandResult:
+    """
+    Run a shell command without blocking the event loop.
+
+    The command must pass the approval policy first, and at most MAX_CONCURRENT_COMMANDS run at
+    once per event loop. stdout and stderr are read as they arrive and passed to `on_output` as
+    ("stdout" | "stderr", text); with `capture=False` they are only passed there and the
+    result's stdout and stderr are empty, so memory use does not grow with the output. The
+    command runs in its own process group, which is terminated on timeout or cancellation so
+    no child processes are left behind.
+
+    Raises:
+        CommandRejected: If the approval policy refuses the command.
+    """
+    if not await approve_command(command):
+        raise CommandRejected(f"Command rejected by approval policy: {command}")
+
+    async with _semaphore():
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_shell(
+            command,
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=sys.platform != "win32",
+        )
+        stdout: list[str] | None = [] if capture else None
+        stderr: list[str] | None = [] if capture else None
+        pumps = asyncio.gather(
+            _pump(process.stdout, "stdout", stdout, on_output),
+            _pump(process.stderr, "stderr", stderr, on_output),
+            process.wait(),
+        )
+        timed_out = False
+        try:
+            await asyncio.wait_for(asyncio.shield(pumps), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await _kill(process)
+            # Collect whatever was written before the kill; grandchildren holding the pipes are gone too.
+            try:
+                await asyncio.wait_for(pumps, KILL_GRACE_PERIOD)
+            except asyncio.TimeoutError:
+                pumps.cancel()
+        except asyncio.CancelledError:
+            await _kill(process)
+            pumps.cancel()
+            raise
+        return CommandResult(
+            stdout="".join(stdout or ()),
+            stderr="".join(stderr or ()),
+            returncode=process.returncode,
+            timed_out=timed_out,
+            duration=time.perf_counter() - started,
+        )
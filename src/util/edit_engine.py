@@ -0,0 +1,133 @@
+from bisect import bisect_right
+from typing import Any
+
+
+class EditError(ValueError):
+    """Raised when a batch of edit operations cannot be applied."""
+
+
+def _line_count_arg(target: dict, key: str) -> Any:
+    value = target[key]
+    if key == "line_range":
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise EditError(f"Line range {value} must be [start_line, end_line]")
+        return int(value[0]), int(value[1])
+    return int(value)
+
+
+def apply_edit_operations(original: str, operations: list[dict]) -> str:
+    """
+    Apply a batch of edit operations to `original` in a single pass.
+
+    Every target is resolved against the original text, so line numbers and search texts
+    refer to the file as it was before the batch, regardless of the order of the operations.
+    The resolved edits become (start, end, replacement) spans over the original text; spans
+    that overlap are rejected, and the result is built with one join. A batch of k operations
+    on an n-line file costs O(n + k log n) plus one search per text target.
+
+    Args:
+        original: The current file content.
+        operations: Edit operations as accepted by edit_file_tool.
+
+    Returns:
+        The edited content, with "\\n" line endings and a trailing newline.
+
+    Raises:
+        EditError: If a target is out of range or not found, or two edits overlap.
+    """
+    lines = original.splitlines()
+    text = "".join(line + "\n" for line in lines)
+    # starts[i] is the offset of line i; starts[len(lines)] is the end of the text.
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line) + 1)
+
+    def line_of(offset: int) -> int:
+        return bisect_right(starts, offset) - 1
+
+    spans: list[tuple[int, int, str, int]] = []
+    appended: list[str] = []
+
+    for order, op in enumerate(operations):
+        op_type = op.get("type")
+        target = op.get("target") or {}
+        content = op.get("content", "")
+
+        if op_type == "append":
+            appended.append(content)
+            continue
+        if op_type not in ("insert", "delete", "replace"):
+            raise EditError(f"Unknown operation type '{op_type}'")
+
+        if "line_number" in target:
+            line_idx = _line_count_arg(target, "line_number") - 1
+            limit = len(lines) if op_type == "insert" else len(lines) - 1
+            if line_idx < 0 or line_idx > limit:
+                raise EditError(f"Line number {target['line_number']} out of range")
+            if op_type == "insert":
+                spans.append((starts[line_idx], starts[line_idx], content + "\n", order))
+            else:
+                replacement = content + "\n" if op_type == "replace" else ""
+                spans.append((starts[line_idx], starts[line_idx + 1], replacement, order))
+
+        elif "line_range" in target:
+            first, last = _line_count_arg(target, "line_range")
+            start_idx, end_idx = first - 1, last - 1
+            if start_idx < 0 or end_idx >= len(lines) or start_idx > end_idx:
+                raise EditError(f"Line range {target['line_range']} out of range")
+            if op_type == "insert":
+                raise EditError("Insert operations take a line_number, before_text or after_text target")
+            replacement = content + "\n" if op_type == "replace" else ""
+            spans.append((starts[start_idx], starts[end_idx + 1], replacement, order))
+
+        elif "before_text" in target or "after_text" in target:
+            before = "before_text" in target
+            search_text = target["before_text" if before else "after_text"]
+            pos = text.find(search_text) if search_text else -1
+            if pos == -1:
+                raise EditError(f"Text '{search_text}' not found in file")
+            if op_type != "insert":
+                raise EditError("before_text and after_text targets only support insert operations")
+            line_idx = line_of(pos) if before else min(line_of(pos + len(search_text) - 1) + 1, len(lines))
+            spans.append((starts[line_idx], starts[line_idx], content + "\n", order))
+
+        elif "replace_text" in target:
+            search_text = target["replace_text"]
+            if not search_text or search_text not in text:
+                raise EditError(f"Text '{search_text}' not found in file")
+            if op_type != "replace":
+                raise EditError("replace_text targets only support replace operations")
+            # Every occurrence is replaced, as before.
+            pos = text.find(search_text)
+            while pos != -1:
+                spans.append((pos, pos + len(search_text), content, order))
+                pos = text.find(search_text, pos + len(search_text))
+        else:
+            raise EditError(f"Operation {order + 1} has no recognised target")
+
+    # Insertions sort before a replacement starting at the same offset; ties keep batch order.
+    spans.sort(key=lambda span: (span[0], span[1] > span[0], span[3]))
+    pieces = []
+    cursor = 0
+    covered_by = None
+    for start, end, replacement, order in spans:
+        if start < cursor:
+            raise EditError(
+                f"Operation {order + 1} overlaps operation {covered_by + 1}; "
+                "combine them into one operation"
+            )
+        pieces.append(text[cursor:start])
+        pieces.append(replacement)
+        cursor = end
+        if end > start:
+            covered_by = order
+    pieces.append(text[cursor:])
+    edited = "".join(pieces)
+
+    edited_lines = edited.splitlines()
+    for content in appended:
+        # Appended content is separated from a non-empty last line by a blank line.
+        if edited_lines and edited_lines[-1]:
+            edited_lines.append("")
+        edited_lines.append(content)
+    return "\n".join(edited_lines) + "\n" if edited_lines else ""
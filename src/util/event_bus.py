@@ -0,0 +1,299 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from .trigram_index import INDEX_DIR_NAME
+
+# Configuration
+EVENT_QUEUE_SIZE = 10000  # events waiting for the sinks; beyond this new events are dropped
+EVENT_TEXT_CHARS = int(os.environ.get("AGENTS_EVENT_TEXT_CHARS", "200"))  # preview kept per event
+EVENTS_FILE = os.environ.get("AGENTS_EVENTS_FILE", os.path.join(INDEX_DIR_NAME, "events.jsonl"))  # "" disables
+EVENTS_FILE_MAX_BYTES = int(os.environ.get("AGENTS_EVENTS_FILE_MAX_BYTES", str(10 * 1024 * 1024)))  # then rotated
+EVENTS_FILE_BACKUPS = 3  # rotated files kept: events.jsonl.1 (newest) ... events.jsonl.3
+EVENT_CONSOLE = os.environ.get("AGENTS_EVENT_CONSOLE", "1") == "1"
+RING_BUFFER_SIZE = 2000
+# Sampling per event kind, e.g. AGENTS_EVENT_SAMPLE="tool_start=0.1,tool_end=0.1"
+EVENT_SAMPLE_RATES = {
+    kind.strip(): float(rate)
+    for kind, _, rate in (item.partition("=") for item in os.environ.get("AGENTS_EVENT_SAMPLE", "").split(","))
+    if kind.strip() and rate
+}
+
+
+@dataclass
+class AgentEvent:
+    kind: str  # agent_start, agent_end, handoff, tool_start, tool_end
+    timestamp: float
+    source: str  # display name of the hooks that reported it
+    agent: str | None = None
+    tool: str | None = None
+    size: int | None = None  # characters of output or tool result
+    duration: float | None = None  # seconds since the matching start event
+    text: str | None = None  # the start of the output or tool result, at most EVENT_TEXT_CHARS
+    displayed: bool = False  # already shown by a streamed step
+
+
+def truncate(text: str, limit: int = EVENT_TEXT_CHARS) -> str:
+    return text if len(text) <= limit else f"{text[:limit]}… [{len(text) - limit} more characters]"
+
+
+class JsonlSink:
+    """
+    Append each event as one JSON line; the file is flushed whenever the queue runs empty.
+    When it grows past `max_bytes` it is rotated to `<path>.1` (older ones to `.2` ...), keeping
+    `backups` rotated files.
+    """
+
+    def __init__(self, path: str, max_bytes: int = EVENTS_FILE_MAX_BYTES, backups: int = EVENTS_FILE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._size = 0
+
+    def handle(self, event: AgentEvent) -> None:
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._size = self._file.tell()
+        line = json.dumps(asdict(event), ensure_ascii=False) + "\n"
+        size = len(line.encode("utf-8"))
+        if self.max_bytes and self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._size += size
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for number in range(self.backups, 0, -1):
+            source = f"{self.path}.{number - 1}" if number > 1 else self.path
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{number}")
+        if not self.backups:
+            os.unlink(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ConsoleSink:
+    """
+    Print one short line per event (sizes and durations, not the content itself). The bus runs
+    it inline, on the thread that publishes, so its lines stay in order with everything else
+    the agents print instead of landing mid-line from the worker thread.
+    """
+
+    def __init__(self, out: Any = None):
+        self.out = out or sys.stdout
+        self.counters: dict[str, int] = {}
+
+    def handle(self, event: AgentEvent) -> None:
+        if event.displayed:
+            return
+        count = self.counters[event.source] = self.counters.get(event.source, 0) + 1
+        prefix = f"### ({event.source}) {count}:"
+        if event.kind == "agent_start":
+            line = f"{prefix} Agent {event.agent} started"
+        elif event.kind == "agent_end":
+            line = f"{prefix} Agent {event.agent} ended ({event.size} chars{_took(event)})"
+        elif event.kind == "handoff":
+            line = f"{prefix} Agent {event.text} handed off to {event.agent}"
+        elif event.kind == "tool_start":
+            line = f"{prefix} Agent {event.agent} started tool {event.tool}"
+        elif event.kind == "tool_end":
+            line = f"{prefix} Agent {event.agent} ended tool {event.tool} ({event.size} chars{_took(event)})"
+        else:
+            line = f"{prefix} {event.kind} {event.agent or ''}"
+        self.out.write(line + "\n")
+
+    def flush(self) -> None:
+        self.out.flush()
+
+
+def _took(event: AgentEvent) -> str:
+    return f", {event.duration:.2f}s" if event.duration is not None else ""
+
+
+class RingBufferSink:
+    """Keep the most recent events in memory for inspection."""
+
+    def __init__(self, capacity: int = RING_BUFFER_SIZE):
+        self._events: deque[AgentEvent] = deque(maxlen=capacity)
+
+    def handle(self, event: AgentEvent) -> None:
+        self._events.append(event)
+
+    def events(self, kind: str | None = None) -> list[AgentEvent]:
+        return [event for event in list(self._events) if kind is None or event.kind == kind]
+
+
+class EventBus:
+    """
+    Delivers events to sinks on a background thread.
+
+    `publish` only samples the event and puts it on a bounded queue, so the agent's event loop
+    never waits for a file; when the queue is full the event is dropped and counted. Inline
+    sinks (the console) are the exception: they get the event in `publish` itself, on the
+    caller's thread, because output to the terminal has to stay in order with the rest of the
+    program's. A sink is any object with `handle(event)` and optionally `flush()`/`close()`.
+    """
+
+    def __init__(
+        self,
+        sinks: list[Any] | None = None,
+        sample_rates: dict[str, float] | None = None,
+        inline_sinks: list[Any] | None = None,
+    ):
+        self.sinks = list(sinks or [])
+        self.inline_sinks = list(inline_sinks or [])
+        self.sample_rates = dict(sample_rates or {})
+        self._queue: queue.Queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.counters = {"published": 0, "sampled_out": 0, "dropped": 0, "delivered": 0, "sink_errors": 0}
+        self.publish_seconds = 0.0
+
+    def add_sink(self, sink: Any, inline: bool = False) -> None:
+        (self.inline_sinks if inline else self.sinks).append(sink)
+
+    def publish(self, event: AgentEvent) -> None:
+        start = time.perf_counter()
+        rate = self.sample_rates.get(event.kind, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            self.counters["sampled_out"] += 1
+        else:
+            for sink in self.inline_sinks:
+                try:
+                    sink.handle(event)
+                except Exception:
+                    self.counters["sink_errors"] += 1
+            if self._worker is None:
+                self._start()
+            try:
+                self._queue.put_nowait(event)
+                self.counters["published"] += 1
+            except queue.Full:
+                self.counters["dropped"] += 1
+        self.publish_seconds += time.perf_counter() - start
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="event_bus", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            if event is None:
+                self._flush()
+                self._queue.task_done()
+                return
+            for sink in self.sinks:
+                try:
+                    sink.handle(event)
+                except Exception:
+                    self.counters["sink_errors"] += 1
+            self.counters["delivered"] += 1
+            if self._queue.empty():
+                self._flush()
+            self._queue.task_done()
+
+    def _flush(self) -> None:
+        for sink in self.sinks:
+            try:
+                if hasattr(sink, "flush"):
+                    sink.flush()
+            except Exception:
+                self.counters["sink_errors"] += 1
+
+    def drain(self, timeout: float = 5.0) -> None:
+        """Wait (up to `timeout` seconds) until every queued event has reached the sinks."""
+        deadline = time.monotonic() + timeout
+        while self._worker is not None and self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self.drain()
+            try:
+                self._queue.put(None, timeout=1.0)
+                self._worker.join(timeout=1.0)
+            except queue.Full:
+                pass
+            self._worker = None
+        for sink in self.sinks + self.inline_sinks:
+            if hasattr(sink, "flush"):
+                try:
+                    sink.flush()
+                except Exception:
+                    pass
+            if hasattr(sink, "close"):
+                try:
+                    sink.close()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        published = self.counters["published"] + self.counters["sampled_out"] + self.counters["dropped"]
+        return {
+            **self.counters,
+            "queued": self._queue.qsize(),
+            "publish_microseconds": round(self.publish_seconds / published * 1e6, 2) if published else 0.0,
+        }
+
+
+_event_bus: EventBus | None = None
+_ring_buffer = RingBufferSink()
+
+
+def get_event_bus() -> EventBus:
+    """
+    Return the process-wide event bus. By default it feeds an in-memory ring buffer, the
+    console (AGENTS_EVENT_CONSOLE, inline) and a JSONL file (AGENTS_EVENTS_FILE, default
+    .agents_cache/events.jsonl, rotated at AGENTS_EVENTS_FILE_MAX_BYTES).
+    """
+    global _event_bus
+    if _event_bus is None:
+        sinks: list[Any] = [_ring_buffer]
+        if EVENTS_FILE:
+            sinks.append(JsonlSink(EVENTS_FILE))
+        _event_bus = EventBus(sinks, EVENT_SAMPLE_RATES, [ConsoleSink()] if EVENT_CONSOLE else [])
+        atexit.register(_event_bus.close)
+    return _event_bus
+
+
+def publish_event(kind: str, source: str, **fields: Any) -> AgentEvent:
+    """Create an event stamped with the current time and publish it on the event bus."""
+    event = AgentEvent(kind=kind, timestamp=time.time(), source=source, **fields)
+    get_event_bus().publish(event)
+    return event
+
+
+def recent_events(kind: str | None = None) -> list[AgentEvent]:
+    """Return the events kept in the in-memory ring buffer, oldest first."""
+    return _ring_buffer.events(kind)
+
+
+def event_bus_stats() -> dict[str, Any]:
+    """Return published, sampled-out, dropped and delivered counts and the mean cost of publishing."""
+    return get_event_bus().stats()
+
@@ -0,0 +1,25 @@
+from typing import Callable
+
+# Listeners receive the path that was written, or None when an unknown set of files may
+# have changed (for example after running an arbitrary shell command).
+FileChangeListener = Callable[[str | None], None]
+
+_listeners: list[FileChangeListener] = []
+
+
+def add_file_change_listener(listener: FileChangeListener) -> None:
+    """Register a callback that is invoked whenever a tool writes to the workspace."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def notify_file_changed(path: str | None = None) -> None:
+    """
+    Tell caches and indexes that `path` was written. Pass None when the set of changed
+    files is unknown. Listener failures never break the tool that made the change.
+    """
+    for listener in list(_listeners):
+        try:
+            listener(path)
+        except Exception as e:
+            print(f"File change listener failed: {e}")
@@ -0,0 +1,219 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from .atomic_write import atomic_write, stage_file
+from .edit_engine import apply_edit_operations
+from .file_events import notify_file_changed
+from .patch_engine import apply_semantic_patch
+
+# Configuration
+TRANSACTION_WORKERS = 8
+CHANGE_ACTIONS = ("write", "edit", "patch", "delete")
+
+
+@dataclass
+class _Change:
+    index: int
+    path: str
+    action: str
+    spec: dict = field(repr=False)
+    original: bytes | None = None  # None when the file does not exist yet
+    new_content: str | None = None
+    error: str | None = None
+    status: str = "not applied"
+
+
+def _parse(index: int, spec: Any) -> _Change:
+    if not isinstance(spec, dict):
+        return _Change(index, "", "", {}, error="each change must be an object")
+    change = _Change(index, str(spec.get("path") or ""), str(spec.get("action") or ""), spec)
+    if not change.path:
+        change.error = "missing path"
+    elif change.action not in CHANGE_ACTIONS:
+        change.error = f"unknown action '{change.action}', expected one of {CHANGE_ACTIONS}"
+    return change
+
+
+def _prepare(change: _Change) -> None:
+    """
+    Read the current file and compute its new content, recording any error on the change. The
+    original is kept as bytes for rollback and only decoded for edits and patches, so binary
+    files can be overwritten and deleted.
+    """
+    try:
+        if os.path.isdir(change.path):
+            raise ValueError("path is a directory")
+        try:
+            with open(change.path, "rb") as f:
+                change.original = f.read()
+        except FileNotFoundError:
+            change.original = None
+
+        spec = change.spec
+        if change.action == "write":
+            change.new_content = str(spec.get("content", ""))
+        elif change.action == "edit":
+            operations = spec.get("operations") or []
+            if change.original is None and not all(op.get("type") == "append" for op in operations):
+                raise ValueError("file not found")
+            change.new_content = apply_edit_operations((change.original or b"").decode(), operations)
+        elif change.action == "patch":
+            if change.original is None:
+                raise ValueError("file not found")
+            change.new_content, _hunks = apply_semantic_patch(change.original.decode(), str(spec.get("patch", "")))
+        elif change.original is None:
+            raise ValueError("file not found")
+    except Exception as e:
+        change.error = str(e)
+
+
+def _missing_dirs(path: str) -> list[str]:
+    """Ancestors of `path` that do not exist yet, outermost first."""
+    missing = []
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory and not os.path.exists(directory):
+        missing.append(directory)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return missing[::-1]
+
+
+def apply_file_changes(specs: list[Any]) -> tuple[bool, list[dict[str, Any]]]:
+    """
+    Apply a batch of file changes as one transaction.
+
+    Each change is {"path", "action", ...}: "write" with "content" creates or overwrites a file,
+    "edit" with "operations" applies edit_file_tool operations, "patch" with "patch" applies a
+    semantic patch, and "delete" removes the file. Every change is resolved against the current
+    files first (in parallel); if any of them fails, nothing is written. Otherwise the new
+    contents are staged as temporary files next to their targets (in parallel) and renamed into
+    place. If staging or a rename fails, files already replaced are restored, deleted files are
+    put back and directories created for the batch are removed.
+
+    Returns:
+        (success, one result per change in order with its path, action, status and error).
+        Statuses are "created", "updated", "deleted", "failed", "not applied" or "rolled back".
+    """
+    changes = [_parse(i, spec) for i, spec in enumerate(specs)]
+    seen: dict[str, int] = {}
+    for change in changes:
+        if change.error:
+            continue
+        key = os.path.abspath(change.path)
+        if key in seen:
+            change.error = f"same file as change {seen[key] + 1}; combine them into one change"
+        else:
+            seen[key] = change.index
+
+    pending = [change for change in changes if not change.error]
+    with ThreadPoolExecutor(max_workers=TRANSACTION_WORKERS) as pool:
+        list(pool.map(_prepare, pending))
+
+        if any(change.error for change in changes):
+            return False, _results(changes)
+
+        created_dirs: list[str] = []
+        staged: dict[int, str] = {}
+        backups: dict[int, str] = {}
+        replaced: list[_Change] = []
+        failed: _Change | None = None
+        try:
+            for change in changes:
+                failed = change
+                if change.action != "delete":
+                    for directory in _missing_dirs(change.path):
+                        os.mkdir(directory)
+                        created_dirs.append(directory)
+
+            failed = None
+            writes = [change for change in changes if change.action != "delete"]
+            futures = {change.index: pool.submit(stage_file, change.path, change.new_content) for change in writes}
+            stage_error = None
+            for change in writes:
+                try:
+                    staged[change.index] = futures[change.index].result()
+                except Exception as e:
+                    if stage_error is None:
+                        failed, stage_error = change, e
+            if stage_error is not None:
+                raise stage_error
+
+            for change in changes:
+                failed = change
+                if change.action == "delete":
+                    directory = os.path.dirname(os.path.abspath(change.path))
+                    fd, backup = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(change.path)}.", suffix=".bak")
+                    os.close(fd)
+                    try:
+                        os.replace(change.path, backup)
+                    except OSError:
+                        os.unlink(backup)
+                        raise
+                    backups[change.index] = backup
+                else:
+                    os.replace(staged[change.index], change.path)
+                    del staged[change.index]
+                replaced.append(change)
+            failed = None
+        except Exception as e:
+            _rollback(replaced, backups, created_dirs)
+            for tmp_path in staged.values():
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            for change in changes:
+                change.status = "rolled back" if change in replaced else "not applied"
+            if failed is not None:
+                failed.status = "failed"
+                failed.error = str(e)
+            return False, _results(changes)
+
+    for change in changes:
+        if change.action == "delete":
+            try:
+                os.unlink(backups[change.index])
+            except OSError:
+                pass
+            change.status = "deleted"
+        else:
+            change.status = "created" if change.original is None else "updated"
+        notify_file_changed(change.path)
+    return True, _results(changes)
+
+
+def _rollback(replaced: list["_Change"], backups: dict[int, str], created_dirs: list[str]) -> None:
+    for change in reversed(replaced):
+        try:
+            if change.action == "delete":
+                os.replace(backups[change.index], change.path)
+            elif change.original is None:
+                os.unlink(change.path)
+            else:
+                atomic_write(change.path, change.original)
+        except OSError:
+            pass
+        notify_file_changed(change.path)
+    for directory in reversed(created_dirs):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+
+def _results(changes: list[_Change]) -> list[dict[str, Any]]:
+    results = []
+    for change in changes:
+        result: dict[str, Any] = {"path": change.path, "action": change.action}
+        if change.error:
+            result["status"] = "failed"
+            result["error"] = change.error
+        else:
+            result["status"] = change.status
+        results.append(result)
+    return results
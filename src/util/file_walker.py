@@ -0,0 +1,236 @@
+import heapq
+import os
+import re
+from fnmatch import fnmatch, translate as fnmatch_translate
+from typing import Iterator, NamedTuple
+
+# Directories that never contain anything an agent should search through.
+DEFAULT_IGNORED_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".venv",
+        "venv",
+        "node_modules",
+        "__pycache__",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".tox",
+        ".nox",
+        ".idea",
+        ".agents_cache",
+    }
+)
+BINARY_SNIFF_BYTES = 8192
+
+
+class WalkEntry(NamedTuple):
+    """A file or directory yielded by `walk_entries`."""
+
+    entry: os.DirEntry
+    rel_path: str
+    depth: int
+
+
+class IgnoreRules:
+    """
+    A small subset of .gitignore semantics: name globs, path globs anchored to the
+    directory holding the .gitignore, trailing "/" for directory-only rules and "!" negation.
+    """
+
+    def __init__(self, rules: list[tuple[str, str, bool, bool, bool]] | None = None):
+        # (base_rel_dir, pattern, dir_only, negated, anchored)
+        self.rules = rules or []
+
+    def extended(self, directory: str, rel_dir: str) -> "IgnoreRules":
+        """Return the rules with the .gitignore of `directory` (if any) appended."""
+        gitignore = os.path.join(directory, ".gitignore")
+        try:
+            with open(gitignore, "r", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return self
+
+        rules = list(self.rules)
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            # A slash anywhere but the end anchors the pattern to this directory.
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                rules.append((rel_dir, line, dir_only, negated, anchored))
+        return IgnoreRules(rules)
+
+    def is_ignored(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        ignored = False
+        for base, pattern, dir_only, negated, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                if base:
+                    if not rel_path.startswith(base + "/"):
+                        continue
+                    candidate = rel_path[len(base) + 1:]
+                else:
+                    candidate = rel_path
+                matched = fnmatch(candidate, pattern)
+            else:
+                matched = fnmatch(name, pattern)
+            if matched:
+                ignored = not negated
+        return ignored
+
+
+def is_binary(chunk: bytes) -> bool:
+    """Heuristic used by git and grep: a NUL byte near the start means binary."""
+    return b"\0" in chunk[:BINARY_SNIFF_BYTES]
+
+
+def matches_any(name: str, patterns: list[str] | None) -> bool:
+    """Return True when no patterns are given or `name` matches one of the globs."""
+    return not patterns or any(fnmatch(name, p) for p in patterns)
+
+
+def walk_entries(
+    root: str,
+    max_depth: int | None = None,
+    include_dirs: bool = False,
+    respect_gitignore: bool = True,
+    ignored_dirs: frozenset[str] = DEFAULT_IGNORED_DIRS,
+) -> Iterator[WalkEntry]:
+    """
+    Walk `root` depth-first with os.scandir, pruning ignored directories before descending.
+
+    Entries are yielded in pre-order, sorted by name within each directory, so results are
+    stable between calls. Each os.DirEntry caches its stat result, so callers needing size or mtime pay for
+    at most one stat per entry.
+
+    Args:
+        root: Directory to walk.
+        max_depth: Maximum depth to descend to (1 lists only the direct children). None is unlimited.
+        include_dirs: Whether directories are yielded as well as files.
+        respect_gitignore: Whether .gitignore files found along the way prune the walk.
+        ignored_dirs: Directory names that are never descended into.
+    """
+    def scan(directory: str, rel_dir: str, rules: IgnoreRules):
+        if respect_gitignore:
+            rules = rules.extended(directory, rel_dir)
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            entries = []
+        return iter(entries), rel_dir, rules
+
+    # A stack of directory iterators gives a pre-order walk: each directory is followed
+    # directly by its contents.
+    stack = [(*scan(root, "", IgnoreRules()), 1)]
+    while stack:
+        entries, rel_dir, rules, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir and entry.name in ignored_dirs:
+            continue
+        if respect_gitignore and rules.rules and rules.is_ignored(rel_path, entry.name, is_dir):
+            continue
+        if not is_dir:
+            yield WalkEntry(entry, rel_path, depth)
+            continue
+        if include_dirs:
+            yield WalkEntry(entry, rel_path, depth)
+        if (max_depth is None or depth < max_depth) and not entry.is_symlink():
+            stack.append((*scan(entry.path, rel_path, rules), depth + 1))
+
+
+def iter_files(
+    root: str,
+    include: list[str] | None = None,
+    respect_gitignore: bool = True,
+) -> Iterator[str]:
+    """Yield the paths of all non-ignored files under `root` whose name matches `include`."""
+    for item in walk_entries(root, respect_gitignore=respect_gitignore):
+        if matches_any(item.entry.name, include):
+            yield item.entry.path
+
+
+SORT_KEYS = ("path", "mtime", "size")
+
+
+def compile_globs(patterns: list[str]) -> list[tuple[bool, re.Pattern]]:
+    """Translate globs once; patterns containing "/" match the relative path, others the name."""
+    return [("/" in p, re.compile(fnmatch_translate(p))) for p in patterns]
+
+
+def find_files(
+    root: str,
+    patterns: list[str],
+    recursive: bool = True,
+    limit: int = 0,
+    sort_by: str = "path",
+) -> tuple[list[str], int, bool]:
+    """
+    Find files under `root` matching any of `patterns` without materialising the whole tree.
+
+    With sort_by="path" the walk stops as soon as `limit` matches are found. With "mtime" or
+    "size" (newest or largest first) every match is visited but only the best `limit` are kept.
+
+    Args:
+        root: Directory to search.
+        patterns: Glob patterns, e.g. ["*.py", "tests/*.toml"].
+        recursive: Whether to descend into subdirectories.
+        limit: Maximum number of paths to return; 0 is unlimited.
+        sort_by: One of SORT_KEYS.
+
+    Returns:
+        (paths, matches_seen, truncated)
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort_by '{sort_by}', expected one of {SORT_KEYS}")
+    globs = compile_globs(patterns)
+    found = (
+        (item.entry.path, item.rel_path, item.entry)
+        for item in walk_entries(root, max_depth=None if recursive else 1)
+    )
+
+    results: list = []
+    seen = 0
+    for path, rel_path, entry in found:
+        name = rel_path.rsplit("/", 1)[-1]
+        if not any(regex.match(rel_path if on_path else name) for on_path, regex in globs):
+            continue
+        seen += 1
+        if sort_by == "path":
+            if limit and seen > limit:
+                return results, seen, True
+            results.append(path)
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        key = stat.st_mtime_ns if sort_by == "mtime" else stat.st_size
+        if not limit or len(results) < limit:
+            heapq.heappush(results, (key, path))
+        elif key > results[0][0]:
+            heapq.heapreplace(results, (key, path))
+
+    if sort_by != "path":
+        results = [path for _key, path in sorted(results, reverse=True)]
+    return results, seen, bool(limit) and seen > limit
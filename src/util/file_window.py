@@ -0,0 +1,164 @@
+import mmap
+import os
+from typing import Any
+
+# Configuration
+DEFAULT_MAX_TOKENS = 8000
+CHARS_PER_TOKEN = 4  # rough estimate used to turn a token budget into a byte budget
+MMAP_THRESHOLD = 1024 * 1024  # files at least this large are mapped instead of read
+DEFAULT_WINDOW_LINES = 50
+READ_MODES = ("full", "lines", "head", "tail", "around", "bytes")
+
+
+def _line_offset(buf, line_number: int) -> int:
+    """Byte offset at which 1-indexed `line_number` starts (len(buf) if past the end)."""
+    pos = 0
+    for _ in range(line_number - 1):
+        newline = buf.find(b"\n", pos)
+        if newline == -1:
+            return len(buf)
+        pos = newline + 1
+    return pos
+
+
+def _tail_offset(buf, count: int) -> tuple[int, int]:
+    """Byte offset of the start of the last `count` lines, and how many lines were found."""
+    end = len(buf)
+    if end and buf[end - 1:end] == b"\n":
+        end -= 1
+    found = 0
+    while found < count:
+        newline = buf.rfind(b"\n", 0, end)
+        found += 1
+        if newline == -1:
+            return 0, found
+        end = newline
+    return end + 1, found
+
+
+def _read_lines(buf, offset: int, line_number: int, max_lines: int, max_bytes: int) -> dict[str, Any]:
+    """Read whole lines from `offset` until `max_lines` (0 = unlimited) or `max_bytes` is reached."""
+    size = len(buf)
+    pos = offset
+    lines = 0
+    while pos < size and (not max_lines or lines < max_lines):
+        newline = buf.find(b"\n", pos)
+        line_end = size if newline == -1 else newline + 1
+        if line_end - offset > max_bytes:
+            if lines == 0:
+                # A single line longer than the budget is cut; the cursor resumes mid-line.
+                pos = offset + max_bytes
+            break
+        pos = line_end
+        lines += 1
+
+    return {
+        "content": buf[offset:pos].decode("utf-8", errors="replace"),
+        "start_line": line_number,
+        "end_line": line_number + max(lines - 1, 0),
+        "next_cursor": f"{pos}:{line_number + lines}" if pos < size else None,
+    }
+
+
+def _window(buf, mode: str, start: int, count: int, max_bytes: int, cursor: str) -> dict[str, Any]:
+    if cursor:
+        if mode == "bytes":
+            offset = int(cursor.split(":")[0])
+            end = min(len(buf), offset + min(count or max_bytes, max_bytes))
+            return _byte_window(buf, offset, end)
+        offset, line_number = (int(part) for part in cursor.split(":"))
+        return _read_lines(buf, offset, line_number, count, max_bytes)
+
+    if mode == "full":
+        return _read_lines(buf, 0, 1, 0, max_bytes)
+    if mode == "head":
+        return _read_lines(buf, 0, 1, count or DEFAULT_WINDOW_LINES, max_bytes)
+    if mode == "lines":
+        first = max(start, 1)
+        return _read_lines(buf, _line_offset(buf, first), first, count, max_bytes)
+    if mode == "around":
+        if start < 1:
+            raise ValueError(f"Mode 'around' needs the line number to read around as start (1 or more), got {start}")
+        radius = count or DEFAULT_WINDOW_LINES // 2
+        first = max(start - radius, 1)
+        return _read_lines(buf, _line_offset(buf, first), first, start + radius - first + 1, max_bytes)
+    if mode == "tail":
+        offset, found = _tail_offset(buf, count or DEFAULT_WINDOW_LINES)
+        # Line numbers are unknown without scanning the whole file, so they count back from
+        # the end (-1 is the last line).
+        return _read_lines(buf, offset, -found, 0, max_bytes)
+    offset = max(start, 0)
+    end = min(len(buf), offset + min(count or max_bytes, max_bytes))
+    return _byte_window(buf, offset, end)
+
+
+def _byte_window(buf, offset: int, end: int) -> dict[str, Any]:
+    return {
+        "content": buf[offset:end].decode("utf-8", errors="replace"),
+        "start_byte": offset,
+        "end_byte": end,
+        "next_cursor": f"{end}" if end < len(buf) else None,
+    }
+
+
+def window_from_buffer(
+    buf,
+    mode: str = "full",
+    start: int = 0,
+    count: int = 0,
+    max_tokens: int = 0,
+    cursor: str = "",
+) -> dict[str, Any]:
+    """
+    Cut a window out of an in-memory or memory mapped file buffer. See `read_window` for the
+    meaning of the arguments.
+
+    Raises:
+        ValueError: If the mode or cursor is invalid.
+    """
+    if mode not in READ_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {READ_MODES}")
+    max_bytes = (max(max_tokens, 0) or DEFAULT_MAX_TOKENS) * CHARS_PER_TOKEN
+
+    if len(buf) == 0:
+        window = {"content": "", "start_line": 1, "end_line": 1, "next_cursor": None}
+    else:
+        window = _window(buf, mode, start, count, max_bytes, cursor)
+    window["size"] = len(buf)
+    window["truncated"] = window["next_cursor"] is not None
+    return window
+
+
+def read_window(
+    path: str,
+    mode: str = "full",
+    start: int = 0,
+    count: int = 0,
+    max_tokens: int = 0,
+    cursor: str = "",
+) -> dict[str, Any]:
+    """
+    Read part of a file without loading the rest of it.
+
+    Files of MMAP_THRESHOLD bytes or more are memory mapped, so fetching a window from a
+    huge file only touches the pages that are actually read. Every window is capped at
+    `max_tokens` (estimated from bytes) and returns a `next_cursor` to continue from.
+
+    Args:
+        path: File to read.
+        mode: One of READ_MODES.
+        start: First line for "lines", center line for "around", byte offset for "bytes".
+        count: Lines (or bytes, for "bytes") to return; 0 uses the mode's default.
+        max_tokens: Token budget for the returned content; 0 uses DEFAULT_MAX_TOKENS.
+        cursor: A `next_cursor` from a previous call to continue reading from.
+
+    Raises:
+        ValueError: If the mode or cursor is invalid.
+        OSError: If the file cannot be read.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return window_from_buffer(buf, mode, start, count, max_tokens, cursor)
+        return window_from_buffer(f.read(), mode, start, count, max_tokens, cursor)
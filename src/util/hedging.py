@@ -0,0 +1,234 @@
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from agents.models.interface import Model, ModelProvider
+
+from .run_context import current_agent_name
+
+# Configuration
+HEDGE_REQUESTS = os.environ.get("AGENTS_HEDGE_REQUESTS", "1") == "1"
+LATENCY_WINDOW = 200  # recent successful calls per model used for percentiles
+
+
+@dataclass
+class HedgePolicy:
+    """
+    How one agent's model calls are timed out and hedged.
+
+    Until a model has `min_samples` recorded latencies, attempts get `max_deadline` and are not
+    hedged. After that an attempt's deadline is `deadline_multiplier` times the
+    `deadline_percentile` latency (clamped to [min_deadline, max_deadline]), and a duplicate
+    request is sent to `fallback_model` (or the same model) once a call has run longer than the
+    `hedge_percentile` latency (at least `min_hedge_delay`). The first answer wins.
+    """
+
+    hedge: bool = HEDGE_REQUESTS
+    hedge_percentile: float = 0.95
+    min_hedge_delay: float = 2.0
+    fallback_model: str | None = None
+    deadline_percentile: float = 0.99
+    deadline_multiplier: float = 3.0
+    min_deadline: float = 10.0
+    max_deadline: float = 60.0
+    min_samples: int = 20
+
+
+class ModelCallTimeout(TimeoutError):
+    """Raised when a model call attempt exceeds its deadline. Retried like a server timeout."""
+
+    code = "timeout"
+
+
+class LatencyTracker:
+    """Recent successful model call latencies, per model."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, model_name: str, seconds: float) -> None:
+        samples = self._samples.get(model_name)
+        if samples is None:
+            samples = self._samples[model_name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, model_name: str, fraction: float, min_samples: int = 1) -> float | None:
+        samples = self._samples.get(model_name)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {
+                "samples": len(samples),
+                "p50": round(self.percentile(name, 0.5) or 0.0, 3),
+                "p95": round(self.percentile(name, 0.95) or 0.0, 3),
+                "p99": round(self.percentile(name, 0.99) or 0.0, 3),
+            }
+            for name, samples in self._samples.items()
+        }
+
+
+_policies: dict[str, HedgePolicy] = {}
+_default_policy = HedgePolicy()
+_latencies = LatencyTracker()
+_counters = {"attempts": 0, "timeouts": 0, "hedged_calls": 0, "hedge_wins": 0, "primary_wins": 0}
+
+
+def set_hedge_policy(policy: HedgePolicy, agent_name: str | None = None) -> None:
+    """Use `policy` for the named agent's model calls, or for every agent without its own policy."""
+    global _default_policy
+    if agent_name is None:
+        _default_policy = policy
+    else:
+        _policies[agent_name] = policy
+
+
+def hedge_policy(agent_name: str | None = None) -> HedgePolicy:
+    """Return the policy for `agent_name` (default: the agent of the running call)."""
+    return _policies.get(agent_name or current_agent_name() or "", _default_policy)
+
+
+def attempt_deadline(model_name: str, policy: HedgePolicy) -> float:
+    p = _latencies.percentile(model_name, policy.deadline_percentile, policy.min_samples)
+    if p is None:
+        return policy.max_deadline
+    return min(max(p * policy.deadline_multiplier, policy.min_deadline), policy.max_deadline)
+
+
+class TimedModel(Model):
+    """
+    A Model whose attempts are cut off at a deadline derived from the model's observed latency,
+    raising ModelCallTimeout so the retry layer tries again instead of waiting for the client
+    timeout. Streams are given the deadline to produce their first event.
+    """
+
+    def __init__(self, model: Model, model_name: str):
+        self.model = model
+        self.model_name = model_name
+
+    async def get_response(self, *args, **kwargs):
+        deadline = attempt_deadline(self.model_name, hedge_policy())
+        _counters["attempts"] += 1
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(deadline):
+                response = await self.model.get_response(*args, **kwargs)
+        except TimeoutError:
+            _counters["timeouts"] += 1
+            raise ModelCallTimeout(f"{self.model_name} did not answer within {deadline:.1f}s") from None
+        _latencies.record(self.model_name, time.monotonic() - start)
+        return response
+
+    async def stream_response(self, *args, **kwargs):
+        deadline = attempt_deadline(self.model_name, hedge_policy())
+        _counters["attempts"] += 1
+        stream = self.model.stream_response(*args, **kwargs).__aiter__()
+        try:
+            async with asyncio.timeout(deadline):
+                first = await stream.__anext__()
+        except StopAsyncIteration:
+            return
+        except TimeoutError:
+            _counters["timeouts"] += 1
+            raise ModelCallTimeout(f"{self.model_name} sent nothing within {deadline:.1f}s") from None
+        yield first
+        async for event in stream:
+            yield event
+
+    async def close(self) -> None:
+        await self.model.close()
+
+
+class TimedModelProvider(ModelProvider):
+    def __init__(self, provider: ModelProvider):
+        self.provider = provider
+
+    def get_model(self, model_name: str | None) -> Model:
+        return TimedModel(self.provider.get_model(model_name), model_name or "default")
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+
+class HedgedModel(Model):
+    """
+    A Model that sends a duplicate request when a call runs past the agent's hedge delay and
+    returns whichever answer arrives first, cancelling the other. Streams are not hedged, since
+    two streams cannot be merged into one.
+    """
+
+    def __init__(self, model: Model, model_name: str, provider: ModelProvider):
+        self.model = model
+        self.model_name = model_name
+        self.provider = provider
+
+    def _hedge_delay(self, policy: HedgePolicy) -> float | None:
+        p = _latencies.percentile(self.model_name, policy.hedge_percentile, policy.min_samples)
+        return None if p is None else max(p, policy.min_hedge_delay)
+
+    async def get_response(self, *args, **kwargs):
+        policy = hedge_policy()
+        delay = self._hedge_delay(policy) if policy.hedge else None
+        if delay is None:
+            return await self.model.get_response(*args, **kwargs)
+
+        primary = asyncio.ensure_future(self.model.get_response(*args, **kwargs))
+        running = {primary}
+        try:
+            done, running = await asyncio.wait(running, timeout=delay)
+            if done:
+                return primary.result()
+
+            _counters["hedged_calls"] += 1
+            backup_model = self.provider.get_model(policy.fallback_model) if policy.fallback_model else self.model
+            backup = asyncio.ensure_future(backup_model.get_response(*args, **kwargs))
+            running = {primary, backup}
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        _counters["hedge_wins" if task is backup else "primary_wins"] += 1
+                        return task.result()
+            # Both failed; report the original call's error.
+            return primary.result()
+        finally:
+            for task in running:
+                await _cancel(task)
+
+    def stream_response(self, *args, **kwargs):
+        return self.model.stream_response(*args, **kwargs)
+
+    async def close(self) -> None:
+        await self.model.close()
+
+
+class HedgedModelProvider(ModelProvider):
+    """Wrap every model from `provider` in a HedgedModel; hedges to fallbacks come from `provider` too."""
+
+    def __init__(self, provider: ModelProvider):
+        self.provider = provider
+
+    def get_model(self, model_name: str | None) -> Model:
+        return HedgedModel(self.provider.get_model(model_name), model_name or "default", self.provider)
+
+
+def model_latency(model_name: str, fraction: float, min_samples: int = 1) -> float | None:
+    """Return the given percentile of the model's recent call latencies, or None without enough samples."""
+    return _latencies.percentile(model_name, fraction, min_samples)
+
+
+def hedging_stats() -> dict[str, Any]:
+    """Return attempt, timeout and hedge counters and the latency percentiles per model."""
+    return {**_counters, "latency": _latencies.stats()}
@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from agents import custom_span, set_trace_processors, set_tracing_disabled, trace
+from agents.tracing import TracingProcessor
+
+from .trigram_index import INDEX_DIR_NAME
+
+# Configuration
+LOCAL_TRACING = os.environ.get("AGENTS_TRACING", "1") == "1"
+TRACE_DIR = os.environ.get("AGENTS_TRACE_DIR", os.path.join(INDEX_DIR_NAME, "traces"))
+
+
+def _size(value: Any) -> int | None:
+    """Characters in a span's input or output: the text itself, or the JSON of messages and tool arguments."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+def _span_record(span: Any, start: float, end: float) -> dict[str, Any]:
+    """A span as stored in the trace file; prompts and outputs are replaced by their sizes."""
+    data = span.span_data.export() or {}
+    kind = data.get("type", "span")
+    if kind == "generation":
+        name = f"model {data.get('model')}"
+    elif kind in ("agent", "function"):
+        name = f"{'tool' if kind == 'function' else kind} {data.get('name')}"
+    elif kind == "handoff":
+        name = f"handoff {data.get('from_agent')} → {data.get('to_agent')}"
+    else:
+        name = data.get("name") or kind
+    details = {key: value for key, value in data.items() if key not in ("type", "input", "output")}
+    if "input" in data:
+        details["input_chars"] = _size(data["input"])
+    if "output" in data:
+        details["output_chars"] = _size(data["output"])
+    return {
+        "id": span.span_id,
+        "parent_id": span.parent_id,
+        "type": kind,
+        "name": name,
+        "start": start,
+        "end": end,
+        "error": span.error,
+        "data": details,
+    }
+
+
+class LocalTraceProcessor(TracingProcessor):
+    """
+    Collects the SDK's spans (agent runs, model calls, tool calls, handoffs and custom spans
+    such as pipeline iterations) and writes each finished trace to
+    `<directory>/<trace id>.json` as {"trace_id", "name", "start", "end", "spans": [...]},
+    with times in seconds since the epoch. Nothing leaves the machine.
+    """
+
+    def __init__(self, directory: str = TRACE_DIR):
+        self.directory = directory
+        self._traces: dict[str, dict[str, Any]] = {}
+        self._starts: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def on_trace_start(self, trace: Any) -> None:
+        with self._lock:
+            self._traces[trace.trace_id] = {"trace_id": trace.trace_id, "name": trace.name, "start": time.time(), "spans": []}
+
+    def on_trace_end(self, trace: Any) -> None:
+        with self._lock:
+            record = self._traces.pop(trace.trace_id, None)
+        if record is None:
+            return
+        record["end"] = time.time()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(trace_file(trace.trace_id, self.directory), "w", encoding="utf-8") as f:
+            json.dump(record, f, default=str)
+
+    def on_span_start(self, span: Any) -> None:
+        self._starts[span.span_id] = time.time()
+
+    def on_span_end(self, span: Any) -> None:
+        end = time.time()
+        start = self._starts.pop(span.span_id, end)
+        with self._lock:
+            record = self._traces.get(span.trace_id)
+            if record is not None:
+                record["spans"].append(_span_record(span, start, end))
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+
+def configure_local_tracing() -> LocalTraceProcessor | None:
+    """
+    Send the SDK's traces to a LocalTraceProcessor instead of the OpenAI backend, or turn
+    tracing off when AGENTS_TRACING=0. Returns the processor, if any.
+    """
+    if not LOCAL_TRACING:
+        set_tracing_disabled(disabled=True)
+        return None
+    processor = LocalTraceProcessor()
+    set_trace_processors([processor])
+    set_tracing_disabled(disabled=False)
+    return processor
+
+
+def trace_file(trace_id: str, directory: str = TRACE_DIR) -> str:
+    return os.path.join(directory, f"{trace_id}.json")
+
+
+class PipelineTrace:
+    """
+    The trace of one pipeline run, with a span per iteration, so the runs the pipeline starts
+    nest as pipeline → iteration → agent → model call / tool call (→ agent called as a tool ...).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._trace: Any = None
+        self._iteration: Any = None
+
+    def start(self) -> None:
+        self._trace = trace(self.name)
+        self._trace.start(mark_as_current=True)
+
+    def iteration(self, number: int) -> None:
+        """End the previous iteration's span, if any, and start the span for iteration `number`."""
+        self._end_iteration()
+        self._iteration = custom_span(f"iteration {number}", {"iteration": number})
+        self._iteration.start(mark_as_current=True)
+
+    def _end_iteration(self) -> None:
+        if self._iteration is not None:
+            self._iteration.finish(reset_current=True)
+            self._iteration = None
+
+    def finish(self) -> str | None:
+        """End the trace. Returns the file it was written to, or None when tracing is off."""
+        if self._trace is None:
+            return None
+        self._end_iteration()
+        self._trace.finish(reset_current=True)
+        path = trace_file(self._trace.trace_id)
+        self._trace = None
+        return path if os.path.exists(path) else None
+
+
+def load_trace(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def span_tree(trace_record: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return the trace as a tree: the root stands for the whole trace, and every node has
+    "children" (by start time) and "self_seconds", the part of its duration not covered by any
+    child — the node's own work plus idle gaps, such as waiting for a rate limit.
+    """
+    root = {"id": trace_record["trace_id"], "parent_id": None, "type": "trace", "name": trace_record["name"],
+            "start": trace_record["start"], "end": trace_record["end"], "data": {}}
+    nodes = {root["id"]: root}
+    for span in trace_record["spans"]:
+        nodes[span["id"]] = dict(span)
+    for node in nodes.values():
+        node["children"] = []
+    for span in trace_record["spans"]:
+        parent = nodes.get(span["parent_id"] or "", root)
+        nodes[span["id"]]["parent_id"] = parent["id"]
+        parent["children"].append(nodes[span["id"]])
+    for node in nodes.values():
+        node["children"].sort(key=lambda child: child["start"])
+        covered, reach = 0.0, node["start"]
+        for child in node["children"]:
+            start, end = max(child["start"], reach), min(child["end"], node["end"])
+            if end > start:
+                covered += end - start
+                reach = end
+        node["self_seconds"] = max(node["end"] - node["start"] - covered, 0.0)
+    return root
+
+
+def critical_path(trace_record: dict[str, Any]) -> list[dict[str, Any]]:
+    """From the root, follow the child that finished last at each level: the chain that set the run's duration."""
+    path = [span_tree(trace_record)]
+    while path[-1]["children"]:
+        path.append(max(path[-1]["children"], key=lambda child: child["end"]))
+    return path
+
+
+def format_critical_path(trace_record: dict[str, Any]) -> str:
+    return " → ".join(f"{node['name']} {node['end'] - node['start']:.1f}s" for node in critical_path(trace_record))
+
+
+def export_chrome_trace(trace_path: str, path: str | None = None) -> str:
+    """
+    Convert a trace file to the Chrome trace event format, which chrome://tracing,
+    ui.perfetto.dev and speedscope.app open as a flamegraph. Spans that overlap their siblings
+    (parallel tool calls, hedged requests) go on a lane of their own. Returns the path written
+    (default: next to the trace, ending in .chrome.json).
+    """
+    trace_record = load_trace(trace_path)
+    root = span_tree(trace_record)
+    origin = root["start"]
+    events: list[dict[str, Any]] = []
+    lanes: list[list[dict[str, Any]]] = []  # per lane, the spans still open at the current time
+    lane_of: dict[str, int] = {}
+
+    def place(node: dict[str, Any], parent_lane: int | None) -> int:
+        for stack in lanes:
+            while stack and stack[-1]["end"] <= node["start"]:
+                stack.pop()
+        if parent_lane is not None and lanes[parent_lane] and lanes[parent_lane][-1]["id"] == node["parent_id"]:
+            return parent_lane
+        for lane, stack in enumerate(lanes):
+            if not stack:
+                return lane
+        lanes.append([])
+        return len(lanes) - 1
+
+    spans = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        spans.append(node)
+        pending.extend(node["children"])
+    for node in sorted(spans, key=lambda node: (node["start"], -node["end"])):
+        lane = place(node, lane_of.get(node["parent_id"] or ""))
+        lanes[lane].append(node)
+        lane_of[node["id"]] = lane
+        events.append({
+            "name": node["name"],
+            "cat": node["type"],
+            "ph": "X",
+            "ts": round((node["start"] - origin) * 1e6),
+            "dur": round((node["end"] - node["start"]) * 1e6),
+            "pid": 1,
+            "tid": lane,
+            "args": {**node["data"], "self_seconds": round(node["self_seconds"], 3), "error": node.get("error")},
+        })
+    for lane in range(len(lanes)):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": f"lane {lane}"}})
+
+    path = path or trace_path.removesuffix(".json") + ".chrome.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    return path
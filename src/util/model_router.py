@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from agents.models.interface import Model, ModelProvider
+
+from .hedging import model_latency
+from .rate_limiter import estimate_tokens
+from .run_context import current_agent_name
+
+# Configuration
+DEFAULT_MODEL = os.environ.get("AGENTS_DEFAULT_MODEL", "gemini-2.0-flash")
+MODEL_ROUTES_FILE = os.environ.get(
+    "AGENTS_MODEL_ROUTES_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_routes.json")
+)
+MAX_ERROR_RATE = 0.2  # models failing more often than this are skipped while another fits
+MIN_SAMPLES = 5  # outcomes (or latencies) needed before they influence routing
+OUTCOME_WINDOW = 50
+
+
+@dataclass
+class Route:
+    """
+    The models one agent may use, cheapest first. A call starts at the agent's escalation
+    level and takes the first model that fits it: large calls (over `large_input_tokens`) skip
+    the first model, and a model is passed over while its recent error rate is above
+    MAX_ERROR_RATE or its p95 latency is above `max_latency` seconds. Once the agent has spent
+    `max_cost` dollars in the current pipeline run, escalation no longer applies and calls
+    start from the cheapest model again.
+    """
+
+    models: list[str]
+    large_input_tokens: int | None = None
+    max_latency: float | None = None
+    max_cost: float | None = None
+
+
+@dataclass
+class _ModelStats:
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=OUTCOME_WINDOW))
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        if len(self.outcomes) < MIN_SAMPLES:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class ModelRouter:
+    """
+    Picks the model for each call from the calling agent's Route, using live error rates and
+    latencies, the agent's escalation level and its spend so far in the pipeline run, priced
+    from the routes file ({"models": {name: {"input_cost", "output_cost", "max_input_tokens"}},
+    "routes": {agent name: {"models", ...}}}, costs in dollars per million tokens). Agents
+    without a route use the model they were created with.
+    """
+
+    def __init__(self, routes: dict[str, Route], models: dict[str, dict[str, float]] | None = None):
+        self.routes = routes
+        self.models = models or {}
+        self.escalation: dict[str, int] = {}
+        self.spend: dict[str, float] = {}  # dollars per agent since the pipeline run started
+        self._stats: dict[tuple[str, str], _ModelStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "ModelRouter":
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        routes = {agent: Route(**route) for agent, route in config.get("routes", {}).items()}
+        return cls(routes, config.get("models", {}))
+
+    def _model_stats(self, agent_name: str, model_name: str) -> _ModelStats:
+        key = (agent_name, model_name)
+        with self._lock:
+            if key not in self._stats:
+                self._stats[key] = _ModelStats()
+            return self._stats[key]
+
+    def _error_rate(self, model_name: str) -> float:
+        outcomes = [ok for (_agent, model), stats in self._stats.items() if model == model_name for ok in stats.outcomes]
+        if len(outcomes) < MIN_SAMPLES:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def choose(self, agent_name: str | None, requested_model: str, input_tokens: int) -> str:
+        route = self.routes.get(agent_name or "")
+        if route is None or not route.models:
+            return requested_model
+        level = min(self.escalation.get(agent_name, 0), len(route.models) - 1)
+        if route.max_cost is not None and self.spend.get(agent_name, 0.0) >= route.max_cost:
+            level = 0
+        candidates = route.models[level:]
+        for index, model_name in enumerate(candidates):
+            if index == len(candidates) - 1:
+                return model_name
+            limit = self.models.get(model_name, {}).get("max_input_tokens")
+            if limit and input_tokens > limit:
+                continue
+            if level == 0 and index == 0 and route.large_input_tokens and input_tokens > route.large_input_tokens:
+                continue
+            if self._error_rate(model_name) > MAX_ERROR_RATE:
+                continue
+            latency = model_latency(model_name, 0.95, MIN_SAMPLES)
+            if route.max_latency and latency is not None and latency > route.max_latency:
+                continue
+            return model_name
+        return candidates[-1]
+
+    def record(self, agent_name: str | None, model_name: str, ok: bool, usage: Any = None) -> None:
+        stats = self._model_stats(agent_name or "", model_name)
+        price = self.models.get(model_name, {})
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+        cost = (input_tokens * price.get("input_cost", 0) + output_tokens * price.get("output_cost", 0)) / 1e6
+        with self._lock:
+            stats.outcomes.append(ok)
+            stats.calls += 1
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost += cost
+            self.spend[agent_name or ""] = self.spend.get(agent_name or "", 0.0) + cost
+
+    def escalate(self, agent_names: list[str]) -> dict[str, str]:
+        """
+        Move the named agents one model up their route, e.g. after their work failed
+        evaluation. Returns the model each agent now starts from.
+        """
+        started = {}
+        for agent_name in agent_names:
+            route = self.routes.get(agent_name)
+            if route is None or not route.models:
+                continue
+            level = min(self.escalation.get(agent_name, 0) + 1, len(route.models) - 1)
+            self.escalation[agent_name] = level
+            started[agent_name] = route.models[level]
+        return started
+
+    def reset_escalation(self) -> None:
+        self.escalation.clear()
+
+    def start_run(self) -> None:
+        """Start a pipeline run: every agent back on its first model, with no spend counted yet."""
+        with self._lock:
+            self.escalation.clear()
+            self.spend.clear()
+
+    def stats(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "agent": agent_name,
+                    "model": model_name,
+                    "calls": stats.calls,
+                    "error_rate": round(stats.error_rate, 3),
+                    "input_tokens": stats.input_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "cost": round(stats.cost, 6),
+                }
+                for (agent_name, model_name), stats in self._stats.items()
+            ]
+
+
+class RoutedModel(Model):
+    """A Model that asks the router which model to use for each call, then calls it through `provider`."""
+
+    def __init__(self, router: ModelRouter, provider: ModelProvider, requested_model: str):
+        self.router = router
+        self.provider = provider
+        self.requested_model = requested_model
+
+    def _route(self, system_instructions, input, model_settings, tools) -> tuple[str | None, str]:
+        agent_name = current_agent_name()
+        size = estimate_tokens(system_instructions, input, tools, model_settings)
+        return agent_name, self.router.choose(agent_name, self.requested_model, size)
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        agent_name, model_name = self._route(system_instructions, input, model_settings, tools)
+        try:
+            response = await self.provider.get_model(model_name).get_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+            )
+        except Exception:
+            self.router.record(agent_name, model_name, False)
+            raise
+        self.router.record(agent_name, model_name, True, response.usage)
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        agent_name, model_name = self._route(system_instructions, input, model_settings, tools)
+        usage = None
+        try:
+            async for event in self.provider.get_model(model_name).stream_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+            ):
+                if getattr(event, "type", None) == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+                yield event
+        except Exception:
+            self.router.record(agent_name, model_name, False)
+            raise
+        self.router.record(agent_name, model_name, True, usage)
+
+
+class RoutedModelProvider(ModelProvider):
+    def __init__(self, router: ModelRouter, provider: ModelProvider):
+        self.router = router
+        self.provider = provider
+
+    def get_model(self, model_name: str | None) -> Model:
+        return RoutedModel(self.router, self.provider, model_name or DEFAULT_MODEL)
+
+
+_model_router: ModelRouter | None = None
+_router_loaded = False
+
+
+def get_model_router() -> ModelRouter | None:
+    """Return the router loaded from AGENTS_MODEL_ROUTES_FILE (src/model_routes.json), or None without one."""
+    global _model_router, _router_loaded
+    if not _router_loaded:
+        _router_loaded = True
+        if os.path.exists(MODEL_ROUTES_FILE):
+            _model_router = ModelRouter.from_file(MODEL_ROUTES_FILE)
+    return _model_router
+
+
+def escalate_models(agent_names: list[str]) -> dict[str, str]:
+    """Move the named agents to a stronger model for their next calls (no-op without a router)."""
+    router = get_model_router()
+    return router.escalate(agent_names) if router else {}
+
+
+def start_model_routing() -> None:
+    """Reset escalation levels and per-agent spend at the start of a pipeline run (no-op without a router)."""
+    router = get_model_router()
+    if router:
+        router.start_run()
+
+
+def model_router_stats() -> list[dict[str, Any]]:
+    """Return calls, error rate, tokens and cost per agent and model."""
+    router = get_model_router()
+    return router.stats() if router else []
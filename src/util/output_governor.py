@@ -0,0 +1,237 @@
+import dataclasses
+import json
+import os
+import threading
+from typing import Any
+
+from agents import FunctionTool
+
+from .output_spool import OutputSpool
+
+# Configuration
+DEFAULT_TOOL_OUTPUT_TOKENS = int(os.environ.get("AGENTS_TOOL_OUTPUT_TOKENS", "6000"))
+CHARS_PER_TOKEN = 4
+MIN_TABLE_ROWS = 3  # lists of at least this many objects are sent as a table
+MAX_TABLE_COLUMNS = 12
+MIN_REPEATED_LINES = 3  # runs of identical lines at least this long are collapsed
+MAX_SHRINK_STEPS = 64
+
+_stats: dict[str, dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _dedupe_lines(text: str) -> str:
+    """Collapse runs of identical non-blank lines into one line and a repeat count."""
+    if "\n" not in text:
+        return text
+    lines = text.split("\n")
+    out = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j + 1 < len(lines) and lines[j + 1] == lines[i]:
+            j += 1
+        run = j - i + 1
+        if run >= MIN_REPEATED_LINES and lines[i].strip():
+            out.append(f"{lines[i]}  [line repeated {run} times]")
+        else:
+            out.extend(lines[i:j + 1])
+        i = j + 1
+    return "\n".join(out)
+
+
+def compact(value: Any, dedupe_lines: bool = False) -> Any:
+    """
+    Rewrite a tool result into a smaller equivalent: None-valued keys are dropped, lists of
+    similar objects become {"columns": [...], "rows": [[...], ...]}, and with `dedupe_lines`
+    repeated lines in strings are collapsed.
+    """
+    if isinstance(value, dict):
+        return {key: compact(item, dedupe_lines) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        items = [compact(item, dedupe_lines) for item in value]
+        if len(items) >= MIN_TABLE_ROWS and all(isinstance(item, dict) for item in items):
+            columns: list[str] = []
+            for item in items:
+                for key in item:
+                    if key not in columns:
+                        columns.append(key)
+            if len(columns) <= MAX_TABLE_COLUMNS:
+                return {"columns": columns, "rows": [[item.get(key) for key in columns] for item in items]}
+        return items
+    if isinstance(value, str) and dedupe_lines:
+        return _dedupe_lines(value)
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _largest_piece(
+    value: Any, parent: Any = None, key: Any = None, best: tuple | None = None, spent: set | None = None
+) -> tuple | None:
+    """
+    Find (size, parent, key) of the largest string or list in `value`, passing over the pieces
+    in `spent` ((id(parent), key) of pieces that cannot be cut any further) but not their children.
+    """
+    if isinstance(value, _Omitted):
+        size = 0
+    elif isinstance(value, str):
+        size = len(value)
+    elif isinstance(value, list):
+        size = len(_dumps(value))
+    else:
+        size = 0
+    if parent is not None and size and (best is None or size > best[0]) and (id(parent), key) not in (spent or ()):
+        best = (size, parent, key)
+    if isinstance(value, dict):
+        for child_key, child in value.items():
+            best = _largest_piece(child, value, child_key, best, spent)
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            best = _largest_piece(child, value, index, best, spent)
+    return best
+
+
+class _Omitted(str):
+    """The marker closing a shortened list, remembering how many items it stands for."""
+
+    def __new__(cls, count: int):
+        marker = super().__new__(cls, f"... [{count} more items omitted]")
+        marker.count = count
+        return marker
+
+
+def _shrink(value: Any, max_chars: int) -> Any:
+    """
+    Cut the largest strings and lists in `value` until its JSON fits in `max_chars`. A list
+    down to a single item is left alone from then on, so the item inside gets cut instead.
+    """
+    root = {"value": value}
+    originals: dict[tuple[int, Any], str] = {}
+    spent: set[tuple[int, Any]] = set()
+    for _ in range(MAX_SHRINK_STEPS):
+        size = len(_dumps(root["value"]))
+        if size <= max_chars:
+            break
+        piece = _largest_piece(root["value"], root, "value", spent=spent)
+        if piece is None:
+            break
+        piece_size, parent, key = piece
+        target = max(piece_size - (size - max_chars) - 64, piece_size // 2, 0)
+        item = parent[key]
+        if isinstance(item, str):
+            if len(item) < 200:
+                spent.add((id(parent), key))
+                continue
+            # Always cut from the untouched string so there is a single, accurate marker.
+            original = originals.setdefault((id(parent), key), item)
+            head = original[:target * 2 // 3]
+            tail = original[len(original) - target // 3:]
+            parent[key] = f"{head}\n... [{len(original) - len(head) - len(tail)} characters omitted] ...\n{tail}"
+        else:
+            omitted = 0
+            if item and isinstance(item[-1], _Omitted):
+                omitted = item[-1].count
+                item = item[:-1]
+            keep = min(max(len(item) * target // max(piece_size, 1), 1), len(item) - 1)
+            if keep < 1:
+                spent.add((id(parent), key))
+                continue
+            parent[key] = item[:keep] + [_Omitted(len(item) - keep + omitted)]
+    return root["value"]
+
+
+def _spool_text(value: Any, label: str = "") -> str:
+    """
+    A tool result as plain text for the spool, one source line per line: every scalar on a
+    "path.to.field: value" line, with multi-line strings written out raw below their label, so
+    read_command_output_tool can page through file contents and logs line by line.
+    """
+    if isinstance(value, dict):
+        return "\n".join(_spool_text(item, f"{label}.{key}" if label else str(key)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return "\n".join(_spool_text(item, f"{label}[{index}]") for index, item in enumerate(value))
+    if isinstance(value, str):
+        return f"{label}:\n{value}" if "\n" in value else f"{label}: {value}"
+    return f"{label}: {_dumps(value)}"
+
+
+def govern_output(tool_name: str, result: Any, max_tokens: int, dedupe_lines: bool = False) -> Any:
+    """
+    Return `result` in the form sent to the model: compacted JSON text for dicts and lists,
+    and at most `max_tokens` (estimated) long. When it had to be cut, the full result is saved
+    and the returned JSON carries a "_truncated" entry with the output_id to page through it
+    with read_command_output_tool.
+    """
+    if isinstance(result, str):
+        value: Any = result
+        original_size = len(result)
+        full_text = result
+    else:
+        try:
+            value = compact(result, dedupe_lines)
+        except Exception:
+            return result
+        full_text = None
+        original_size = len(str(result))
+    if isinstance(value, str) and dedupe_lines:
+        value = _dedupe_lines(value)
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    text = value if isinstance(value, str) else _dumps(value)
+    truncated = len(text) > max_chars
+    if truncated:
+        if full_text is None:
+            full_text = _spool_text(result)
+        spool = OutputSpool()
+        spool.write("stdout", full_text)
+        spool.close()
+        handle = {
+            "output_id": spool.output_id,
+            "hint": "This result was shortened. Page through the full result with "
+            f'read_command_output_tool("{spool.output_id}", "stdout", offset, limit, pattern).',
+        }
+        if isinstance(value, dict):
+            shrunk = _shrink(value, max_chars - 300)
+            text = _dumps({**shrunk, "_truncated": handle})
+        else:
+            text = _dumps({"result": _shrink(value, max_chars - 300), "_truncated": handle})
+
+    with _stats_lock:
+        stats = _stats.setdefault(
+            tool_name, {"calls": 0, "chars_in": 0, "chars_out": 0, "chars_saved": 0, "truncated": 0}
+        )
+        stats["calls"] += 1
+        stats["chars_in"] += original_size
+        stats["chars_out"] += len(text)
+        stats["chars_saved"] += max(original_size - len(text), 0)
+        stats["truncated"] += int(truncated)
+    return text
+
+
+def govern_tool(tool: FunctionTool, max_tokens: int = 0, dedupe_lines: bool = False) -> FunctionTool:
+    """
+    Return a copy of `tool` whose results pass through `govern_output`.
+
+    Args:
+        tool: A tool created with @function_tool.
+        max_tokens: Output budget for the tool; 0 uses DEFAULT_TOOL_OUTPUT_TOKENS
+            (AGENTS_TOOL_OUTPUT_TOKENS).
+        dedupe_lines: Collapse runs of identical lines, for log-like output. Leave off for
+            tools that return file content verbatim.
+    """
+    budget = max_tokens or DEFAULT_TOOL_OUTPUT_TOKENS
+    invoke = tool.on_invoke_tool
+
+    async def on_invoke_tool(ctx, arguments: str) -> Any:
+        return govern_output(tool.name, await invoke(ctx, arguments), budget, dedupe_lines)
+
+    return dataclasses.replace(tool, on_invoke_tool=on_invoke_tool)
+
+
+def tool_output_stats() -> dict[str, dict[str, int]]:
+    """Return per-tool counters of characters received, sent to the model and saved."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
@@ -0,0 +1,219 @@
+import itertools
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from .trigram_index import INDEX_DIR_NAME
+
+# Configuration
+SPOOL_DIR = os.path.join(INDEX_DIR_NAME, "command_output")
+MAX_SPOOLED_OUTPUTS = 20  # older spool files are deleted when a new command starts
+INLINE_OUTPUT_CHARS = 8000  # streams up to this size are returned whole
+HEAD_CHARS = 2000
+TAIL_CHARS = 4000
+MAX_FAILURE_LINES = 40
+FAILURE_PATTERN = re.compile(
+    r"FAILED|\bFAIL\b|Error\b|Exception\b|Traceback \(most recent call last\)|\berror:|^E\s", re.MULTILINE
+)
+STREAMS = ("stdout", "stderr")
+MAX_PAGE_LINE_CHARS = 2000  # longer lines are cut when read back
+MAX_PAGE_CHARS = 24000  # a page ends early rather than grow past this
+
+_counter = itertools.count(1)
+_counter_lock = threading.Lock()
+
+
+class _StreamSpool:
+    """One stream written to disk as it arrives, with only a head, tail and failures kept in memory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.head: list[str] = []
+        self.head_chars = 0
+        self.tail: deque[str] = deque()
+        self.tail_chars = 0
+        self.chars = 0
+        self.lines = 0
+        self.partial = ""
+        self.failures: list[str] = []
+
+    def write(self, text: str) -> None:
+        self.file.write(text)
+        self.chars += len(text)
+        if self.head_chars < HEAD_CHARS:
+            piece = text[:HEAD_CHARS - self.head_chars]
+            self.head.append(piece)
+            self.head_chars += len(piece)
+        self.tail.append(text)
+        self.tail_chars += len(text)
+        while self.tail and self.tail_chars - len(self.tail[0]) >= TAIL_CHARS:
+            self.tail_chars -= len(self.tail.popleft())
+
+        # Failures are found by scanning whole chunks rather than line by line.
+        buffer = self.partial + text
+        end = buffer.rfind("\n") + 1
+        self.partial = buffer[end:]
+        self._scan(buffer[:end])
+
+    def _scan(self, complete: str) -> None:
+        """Count the lines in `complete` and record those matching FAILURE_PATTERN."""
+        position = 0
+        line_number = self.lines
+        last_reported = -1
+        for match in FAILURE_PATTERN.finditer(complete):
+            if len(self.failures) >= MAX_FAILURE_LINES:
+                break
+            line_number += complete.count("\n", position, match.start())
+            position = match.start()
+            if line_number == last_reported:
+                continue
+            last_reported = line_number
+            start = complete.rfind("\n", 0, match.start()) + 1
+            stop = complete.find("\n", match.start())
+            line = complete[start:stop if stop != -1 else len(complete)]
+            self.failures.append(f"{line_number + 1}: {line.rstrip()[:300]}")
+        self.lines += complete.count("\n")
+
+    def close(self) -> None:
+        if self.partial:
+            self._scan(self.partial + "\n")
+            self.partial = ""
+        self.file.close()
+
+    def preview(self, output_id: str, name: str) -> str:
+        """The whole stream when it is small, otherwise its head and tail around an omission marker."""
+        if self.chars <= INLINE_OUTPUT_CHARS:
+            with open(self.path, encoding="utf-8") as f:
+                return f.read()
+        tail = "".join(self.tail)[-TAIL_CHARS:]
+        omitted = self.chars - self.head_chars - len(tail)
+        return (
+            "".join(self.head)
+            + f"\n... [{omitted} characters omitted; page through them with "
+            f"read_command_output_tool(\"{output_id}\", \"{name}\", ...)] ...\n"
+            + tail
+        )
+
+
+class OutputSpool:
+    """
+    Spools a command's stdout and stderr to files under .agents_cache/command_output.
+
+    Use `write` as the on_output callback of run_command. Memory use stays bounded whatever
+    the command prints: only the head and tail of each stream and the first lines that look
+    like failures are kept. Spooled output can be read back with read_spooled_output.
+    """
+
+    def __init__(self, root: str = "."):
+        directory = os.path.join(root, SPOOL_DIR)
+        os.makedirs(directory, exist_ok=True)
+        _prune(directory)
+        with _counter_lock:
+            self.output_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_counter)}"
+        self.streams = {
+            name: _StreamSpool(os.path.join(directory, f"{self.output_id}.{name}")) for name in STREAMS
+        }
+
+    def write(self, name: str, text: str) -> None:
+        self.streams[name].write(text)
+
+    def close(self) -> None:
+        for stream in self.streams.values():
+            stream.close()
+
+    @property
+    def truncated(self) -> bool:
+        return any(stream.chars > INLINE_OUTPUT_CHARS for stream in self.streams.values())
+
+    def summary(self) -> dict:
+        """stdout/stderr previews plus, when anything was cut, the output id, sizes and failure lines."""
+        result = {name: stream.preview(self.output_id, name) for name, stream in self.streams.items()}
+        if self.truncated:
+            result["output_id"] = self.output_id
+            result["output_lines"] = {name: stream.lines for name, stream in self.streams.items()}
+            result["failures"] = [
+                f"{name}:{line}" for name, stream in self.streams.items() for line in stream.failures
+            ]
+        else:
+            self.discard()
+        return result
+
+    def discard(self) -> None:
+        for stream in self.streams.values():
+            try:
+                os.unlink(stream.path)
+            except OSError:
+                pass
+
+
+def _prune(directory: str) -> None:
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.stat().st_mtime)
+    except OSError:
+        return
+    excess = len(entries) - (MAX_SPOOLED_OUTPUTS - 1) * len(STREAMS)
+    for entry in entries[:max(excess, 0)]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def has_spooled_output(output_id: str, root: str = ".") -> bool:
+    """Return whether the output saved under `output_id` still exists."""
+    return os.path.exists(os.path.join(root, SPOOL_DIR, f"{output_id}.stdout"))
+
+
+def read_spooled_output(
+    output_id: str, stream: str, offset: int, limit: int, pattern: str | None = None, root: str = "."
+) -> dict:
+    """
+    Page through spooled command output without loading it into memory.
+
+    Without a pattern, returns `limit` lines starting at line `offset` (0-based). With a
+    pattern, returns up to `limit` lines matching the regular expression, searching from line
+    `offset`. Lines are prefixed with their 1-based line number. Lines longer than
+    MAX_PAGE_LINE_CHARS are cut, and a page stops before it exceeds MAX_PAGE_CHARS (continue
+    from its next_offset).
+
+    Raises:
+        FileNotFoundError: If no spooled output exists for `output_id` and `stream`.
+        ValueError: If `stream` is not "stdout" or "stderr".
+        re.error: If `pattern` is not a valid regular expression.
+    """
+    if stream not in STREAMS:
+        raise ValueError(f"Unknown stream '{stream}', expected one of {STREAMS}")
+    if os.path.basename(output_id) != output_id:
+        raise ValueError(f"Invalid output id '{output_id}'")
+    path = os.path.join(root, SPOOL_DIR, f"{output_id}.{stream}")
+    regex = re.compile(pattern) if pattern else None
+
+    lines = []
+    chars = 0
+    next_offset = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(itertools.islice(f, max(offset, 0), None), start=max(offset, 0) + 1):
+            if regex and not regex.search(line):
+                continue
+            line = line.rstrip(chr(10))
+            if len(line) > MAX_PAGE_LINE_CHARS:
+                line = f"{line[:MAX_PAGE_LINE_CHARS]}... [{len(line) - MAX_PAGE_LINE_CHARS} more characters]"
+            line = f"{number}: {line}"
+            if len(lines) >= limit or (lines and chars + len(line) > MAX_PAGE_CHARS):
+                next_offset = number - 1
+                break
+            lines.append(line)
+            chars += len(line) + 1
+    return {"lines": "\n".join(lines), "count": len(lines), "next_offset": next_offset}
+
+
+def spooled_result(spool: OutputSpool, result, timeout: float) -> dict:
+    """The tool result for a command whose output went to `spool`, as returned by run_command_tool."""
+    spool.close()
+    output = {**spool.summary(), "returncode": result.returncode}
+    if result.timed_out:
+        return {**output, "error": f"Command timed out after {timeout} seconds"}
+    return {**output, "duration": round(result.duration, 3), "error": None}
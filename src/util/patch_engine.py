@@ -0,0 +1,261 @@
+import bisect
+import textwrap
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+
+# Configuration
+MIN_CONFIDENCE = 0.8  # fuzzy matches scoring lower than this are rejected
+SEARCH_WINDOW = 60  # lines after a hunk's context line searched for its removal block
+MAX_FUZZY_LINES = 20000  # line comparisons spent per hunk looking for a fuzzy removal block
+
+
+class PatchError(ValueError):
+    """Raised when a semantic patch cannot be applied."""
+
+
+@dataclass
+class Hunk:
+    """One "@@ context @@" section of a semantic patch."""
+
+    context: str
+    # (kind, text) pairs in patch order; kind is " " (context), "-" (remove) or "+" (add)
+    body: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def old_lines(self) -> list[str]:
+        return [text for kind, text in self.body if kind != "+"]
+
+
+@dataclass
+class HunkResult:
+    """Where a hunk was applied and how confident the match was."""
+
+    context: str
+    line_number: int
+    confidence: float
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def parse_patch(patch: str) -> list[Hunk]:
+    """
+    Parse the semantic patch format. The patch as a whole is dedented first, so indentation
+    after the "-", "+" and " " markers is kept relative to the rest of the hunk.
+    """
+    hunks: list[Hunk] = []
+    for raw in textwrap.dedent(patch.strip("\n")).splitlines():
+        stripped = raw.strip()
+        if stripped.startswith("@@") and stripped.endswith("@@") and len(stripped) >= 4:
+            hunks.append(Hunk(stripped[2:-2].strip()))
+        elif hunks and raw[:1] in ("-", "+", " ") and stripped:
+            hunks[-1].body.append((raw[0], raw[1:]))
+    if not hunks:
+        raise PatchError("Patch contains no '@@ context @@' sections")
+    return hunks
+
+
+class _FileIndex:
+    """Whitespace-normalized view of a file, built once per patch."""
+
+    def __init__(self, lines: list[str]):
+        self.lines = lines
+        self.normalized = [_normalize(line) for line in lines]
+        self.by_text: dict[str, list[int]] = {}
+        for i, text in enumerate(self.normalized):
+            self.by_text.setdefault(text, []).append(i)
+
+    def anchors(self, context: str) -> list[tuple[int, float]]:
+        """Lines matching a hunk's context: exact, then containing it, then fuzzy."""
+        target = _normalize(context)
+        if not target:
+            return [(0, 1.0)]
+        exact = self.by_text.get(target)
+        if exact:
+            return [(i, 1.0) for i in exact]
+        containing = [(i, 1.0) for i, text in enumerate(self.normalized) if target in text]
+        if containing:
+            return containing
+        fuzzy = []
+        for i, text in enumerate(self.normalized):
+            matcher = SequenceMatcher(None, target, text)
+            if matcher.real_quick_ratio() >= MIN_CONFIDENCE and matcher.quick_ratio() >= MIN_CONFIDENCE:
+                score = matcher.ratio()
+                if score >= MIN_CONFIDENCE:
+                    fuzzy.append((i, score))
+        return fuzzy
+
+    def matches(self, start: int, block: list[str]) -> bool:
+        """Whether the normalized `block` occurs exactly at `start`."""
+        return self.normalized[start:start + len(block)] == block
+
+    def block_score(self, start: int, block: list[str], minimum: float = 0.0) -> float:
+        """
+        Mean line similarity of the normalized `block` at `start`, or 0.0 as soon as the block
+        cannot reach `minimum`: each line's quick_ratio() bounds its ratio() from above, so
+        hopeless lines are never scored in full.
+        """
+        if start + len(block) > len(self.lines):
+            return 0.0
+        needed = minimum * len(block)
+        total = 0.0
+        for offset, expected in enumerate(block):
+            actual = self.normalized[start + offset]
+            remaining = len(block) - offset - 1
+            if expected == actual:
+                total += 1.0
+                continue
+            matcher = SequenceMatcher(None, expected, actual)
+            if total + matcher.real_quick_ratio() + remaining < needed or total + matcher.quick_ratio() + remaining < needed:
+                return 0.0
+            total += matcher.ratio()
+            if total + remaining < needed:
+                return 0.0
+        return total / len(block)
+
+
+def _reindent(lines: list[str], patch_base: str, file_base: str) -> list[str]:
+    """Shift `lines` so text indented at `patch_base` in the patch lands at `file_base`."""
+    result = []
+    for line in lines:
+        if not line.strip():
+            result.append("")
+            continue
+        relative = len(_indent(line).expandtabs(4)) - len(patch_base.expandtabs(4))
+        if relative >= 0:
+            result.append(file_base + " " * relative + line.lstrip())
+        else:
+            result.append(file_base[:max(len(file_base) + relative, 0)] + line.lstrip())
+    return result
+
+
+def _locate(index: _FileIndex, hunk: Hunk, floor: int) -> tuple[int, float]:
+    """Return (start line, confidence) of the hunk's old block, preferring matches after `floor`."""
+    anchors = index.anchors(hunk.context)
+    if not anchors:
+        raise PatchError(f"Context '{hunk.context}' not found in file")
+    block = hunk.old_lines
+    if not block:
+        # Pure insertion: the new lines go right after the context line.
+        later = [a for a in anchors if a[0] >= floor] or anchors
+        line, score = later[0]
+        return line + 1, score
+
+    block = [_normalize(line) for line in block]
+    exact = _locate_exact(index, anchors, block, floor)
+    if exact is not None:
+        return exact
+
+    # No exact occurrence: score the windows fuzzily, anchors after `floor` first, within a
+    # fixed budget of line comparisons so files full of identical context lines stay fast.
+    ordered = [a for a in anchors if a[0] >= floor] + [a for a in anchors if a[0] < floor]
+    best = (-1, 0.0)
+    budget = MAX_FUZZY_LINES
+    for anchor, anchor_score in ordered:
+        if budget <= 0 or anchor_score < max(best[1], MIN_CONFIDENCE):
+            continue
+        for start in range(anchor, min(anchor + SEARCH_WINDOW, len(index.lines))):
+            budget -= len(block)
+            score = index.block_score(start, block, max(best[1], MIN_CONFIDENCE) / anchor_score) * anchor_score
+            if score > best[1]:
+                best = (start, score)
+            if budget <= 0:
+                break
+    if best[1] < MIN_CONFIDENCE:
+        detail = f" (best candidate at line {best[0] + 1}, confidence {best[1]:.2f})" if best[0] >= 0 else ""
+        raise PatchError(f"Block to remove not found near context '{hunk.context}'{detail}")
+    return best
+
+
+def _locate_exact(index: _FileIndex, anchors: list[tuple[int, float]], block: list[str], floor: int) -> tuple[int, float] | None:
+    """
+    Find an exact occurrence of the normalized `block` within SEARCH_WINDOW lines after an
+    anchor. Only the lines equal to the block's first line are tried, each against the anchors
+    covering it; occurrences after `floor` win, then the earliest.
+    """
+    lines = [line for line, _ in anchors]
+    found = None
+    for start in index.by_text.get(block[0], []):
+        first = bisect.bisect_left(lines, start - SEARCH_WINDOW + 1)
+        last = bisect.bisect_right(lines, start)
+        if first == last or not index.matches(start, block):
+            continue
+        candidate = (start < floor, start, max(score for _, score in anchors[first:last]))
+        if found is None or candidate < found:
+            found = candidate
+    return (found[1], found[2]) if found else None
+
+
+def apply_semantic_patch(original: str, patch: str) -> tuple[str, list[HunkResult]]:
+    """
+    Apply every hunk of `patch` to `original` in a single pass.
+
+    Each hunk is anchored at the first line matching its context that follows the previous
+    hunk, and its removal block is matched line by line with whitespace normalized. When no
+    exact match exists, the best fuzzy match scoring at least MIN_CONFIDENCE is used. Only
+    the matched occurrence is replaced, added lines are re-indented to the indentation found
+    in the file, and context lines keep the file's exact text. Nothing is applied unless every
+    hunk matches.
+
+    Returns:
+        The patched text and one HunkResult per hunk.
+
+    Raises:
+        PatchError: If the patch is malformed, a hunk cannot be matched, or two hunks overlap.
+    """
+    hunks = parse_patch(patch)
+    newline = "\r\n" if "\r\n" in original else "\n"
+    lines = original.splitlines()
+    index = _FileIndex(lines)
+
+    edits: list[tuple[int, int, list[str]]] = []
+    results: list[HunkResult] = []
+    floor = 0
+    for hunk in hunks:
+        start, confidence = _locate(index, hunk, floor)
+        old_count = len(hunk.old_lines)
+        end = start + old_count
+
+        if old_count:
+            patch_base = _indent(hunk.old_lines[0])
+            file_base = _indent(lines[start])
+        else:
+            adds = [text for _, text in hunk.body if text.strip()]
+            patch_base = min((_indent(text) for text in adds), key=len, default="")
+            following = next((line for line in lines[start:] if line.strip()), lines[start - 1] if start else "")
+            file_base = _indent(following)
+
+        new_lines = []
+        file_line = start
+        for kind, text in hunk.body:
+            if kind == " ":
+                new_lines.append(lines[file_line])
+            elif kind == "+":
+                new_lines.extend(_reindent([text], patch_base, file_base))
+            if kind != "+":
+                file_line += 1
+
+        edits.append((start, end, new_lines))
+        results.append(HunkResult(hunk.context, start + 1, round(confidence, 3)))
+        floor = end
+
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    pieces: list[str] = []
+    cursor = 0
+    for start, end, new_lines in edits:
+        if start < cursor:
+            raise PatchError(f"Hunks overlap at line {start + 1}")
+        pieces.extend(lines[cursor:start])
+        pieces.extend(new_lines)
+        cursor = end
+    pieces.extend(lines[cursor:])
+
+    patched = newline.join(pieces)
+    if original.endswith(("\n", "\r")) and pieces:
+        patched += newline
+    return patched, results
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from agents import TResponseInputItem
+from agents.models.interface import Model, ModelProvider
+
+from .run_context import current_agent_name
+
+
+class PromptLayout:
+    """
+    Builds an agent's input so that what stays the same between calls comes first.
+
+    Providers cache the longest prompt prefix they have seen recently, so the order is: the
+    shared instruction prefix and tool schemas (sent by the SDK ahead of the input), then the
+    durable context added here (the task and anything that holds for the whole run), then the
+    per-turn deltas passed to `items` (iteration numbers, summaries, feedback). Changing a
+    delta never invalidates the cached prefix before it.
+    """
+
+    def __init__(self, task: str):
+        self._durable: list[TResponseInputItem] = [{"content": task, "role": "user"}]
+
+    def add_durable(self, content: str, role: str = "user") -> None:
+        """Add context that stays valid for the rest of the run. It is placed before every delta."""
+        self._durable.append({"content": content, "role": role})
+
+    def items(self, *deltas: str, role: str = "user") -> list[TResponseInputItem]:
+        """Return the durable context followed by this turn's `deltas`."""
+        return list(self._durable) + [{"content": delta, "role": role} for delta in deltas]
+
+
+@dataclass
+class _CacheUsage:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    last_ratio: float = 0.0
+    prefix_changes: int = 0
+    prefix: str = ""
+
+
+_usage: dict[str, _CacheUsage] = {}
+_lock = threading.Lock()
+
+
+def _prefix_digest(system_instructions: str | None, tools: list[Any]) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update((system_instructions or "").encode())
+    for tool in tools:
+        digest.update(f"\0{getattr(tool, 'name', '')}\0{getattr(tool, 'params_json_schema', '')}".encode())
+    return digest.hexdigest()
+
+
+def record_prompt_cache(agent_name: str, model_name: str, prefix: str, usage: Any) -> None:
+    """Record one call's cached share of its input tokens."""
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    details = getattr(usage, "input_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    ratio = cached / input_tokens if input_tokens else 0.0
+    with _lock:
+        stats = _usage.setdefault(agent_name, _CacheUsage())
+        stats.calls += 1
+        stats.input_tokens += input_tokens
+        stats.cached_tokens += cached
+        stats.last_ratio = ratio
+        if stats.prefix and stats.prefix != prefix:
+            stats.prefix_changes += 1
+        stats.prefix = prefix
+    logging.debug(f"Prompt cache: {agent_name} on {model_name} had {cached}/{input_tokens} input tokens cached ({ratio:.0%})")
+
+
+class PromptCacheTrackingModel(Model):
+    """
+    A Model that records, for every call sent to the provider, how many input tokens the
+    provider served from its prompt cache, and whether the agent's instructions or tools (the
+    cacheable prefix) changed since its previous call.
+    """
+
+    def __init__(self, model: Model, model_name: str):
+        self.model = model
+        self.model_name = model_name
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        response = await self.model.get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        )
+        record_prompt_cache(
+            current_agent_name() or "unknown", self.model_name, _prefix_digest(system_instructions, tools), response.usage
+        )
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        async for event in self.model.stream_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        ):
+            if getattr(event, "type", None) == "response.completed" and getattr(event.response, "usage", None):
+                record_prompt_cache(
+                    current_agent_name() or "unknown",
+                    self.model_name,
+                    _prefix_digest(system_instructions, tools),
+                    event.response.usage,
+                )
+            yield event
+
+    async def close(self) -> None:
+        await self.model.close()
+
+
+class PromptCacheTrackingModelProvider(ModelProvider):
+    def __init__(self, provider: ModelProvider):
+        self.provider = provider
+
+    def get_model(self, model_name: str | None) -> Model:
+        return PromptCacheTrackingModel(self.provider.get_model(model_name), model_name or "default")
+
+
+def prompt_cache_stats() -> dict[str, dict[str, Any]]:
+    """Return per-agent calls, input and cached tokens, the cached ratio and prefix changes."""
+    with _lock:
+        return {
+            agent_name: {
+                "calls": stats.calls,
+                "input_tokens": stats.input_tokens,
+                "cached_tokens": stats.cached_tokens,
+                "cached_ratio": round(stats.cached_tokens / stats.input_tokens, 3) if stats.input_tokens else 0.0,
+                "last_ratio": round(stats.last_ratio, 3),
+                "prefix_changes": stats.prefix_changes,
+            }
+            for agent_name, stats in _usage.items()
+        }
+
+
+def format_prompt_cache_stats() -> str:
+    """One line per agent with the share of its input tokens served from the provider's prompt cache."""
+    lines = []
+    for agent_name, stats in prompt_cache_stats().items():
+        lines.append(
+            f"{agent_name}: {stats['cached_tokens']}/{stats['input_tokens']} input tokens cached "
+            f"({stats['cached_ratio']:.0%}) over {stats['calls']} calls, {stats['prefix_changes']} prefix changes"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,112 @@
+"""
+Warm pytest worker, started by util.shell_session.PytestWorker with the project's interpreter.
+
+It imports pytest once, then serves one JSON request per stdin line:
+    {"args": [...], "cwd": "...", "stdout": "<path>", "stderr": "<path>", "timeout": 60}
+Each run happens in a forked child, so test modules are imported fresh every time while the
+interpreter and pytest itself are already loaded. The reply is one JSON line:
+    {"returncode": 0, "timed_out": false}
+
+This file is run as a script and must not import anything from the agents package.
+"""
+
+import json
+import os
+import signal
+import sys
+import time
+
+
+def _preload() -> None:
+    # Plugins are left to each run: importing them here would stop pytest rewriting their asserts.
+    import pytest  # noqa: F401
+    import _pytest.python  # noqa: F401
+    import _pytest.assertion.rewrite  # noqa: F401
+    import _pytest.terminal  # noqa: F401
+
+
+def _run_child(request: dict) -> None:
+    os.setpgid(0, 0)
+    os.chdir(request["cwd"])
+    for fd, key in ((1, "stdout"), (2, "stderr")):
+        target = os.open(request[key], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(target, fd)
+        os.close(target)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+    sys.path.insert(0, request["cwd"])
+    code = 1
+    try:
+        import pytest
+
+        code = int(pytest.main(list(request["args"])))
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def _wait(pid: int, timeout: float) -> tuple[int | None, bool]:
+    deadline = time.monotonic() + timeout
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status), False
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.02)
+    for sig, grace in ((signal.SIGTERM, 2.0), (signal.SIGKILL, None)):
+        try:
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            pass
+        until = time.monotonic() + (grace or 5.0)
+        while time.monotonic() < until:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return os.waitstatus_to_exitcode(status), True
+            time.sleep(0.02)
+    return None, True
+
+
+def main() -> None:
+    # Running this file puts its directory first on sys.path; the tests must not see it.
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    protocol = os.fdopen(os.dup(1), "w")
+    # Anything printed while preloading must not reach the protocol channel.
+    os.dup2(2, 1)
+    try:
+        _preload()
+    except Exception as e:
+        protocol.write(json.dumps({"error": f"{type(e).__name__}: {e}"}) + "\n")
+        protocol.flush()
+        return
+    import pytest
+
+    protocol.write(json.dumps({"ready": True, "pytest": pytest.__file__}) + "\n")
+    protocol.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        pid = os.fork()
+        if pid == 0:
+            _run_child(request)
+        returncode, timed_out = _wait(pid, float(request.get("timeout", 600)))
+        protocol.write(json.dumps({"returncode": returncode, "timed_out": timed_out}) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from agents.models.interface import Model, ModelProvider
+from openai import RateLimitError
+
+from .retry_runner import retry_after, retry_with_exponential_backoff
+from .telemetry import record_queue_wait, record_retry
+
+# Configuration
+REQUESTS_PER_MINUTE = float(os.environ.get("AGENTS_REQUESTS_PER_MINUTE", "60"))  # 0 disables the bucket
+TOKENS_PER_MINUTE = float(os.environ.get("AGENTS_TOKENS_PER_MINUTE", "0"))  # 0 disables the bucket
+MAX_CONCURRENT_MODEL_CALLS = int(os.environ.get("AGENTS_MAX_CONCURRENT_MODEL_CALLS", "8"))
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    A bucket refilled at `per_minute` units per minute holding at most one minute's worth.
+
+    `reserve` takes units immediately and returns how long the caller must wait before using
+    them, so callers queue in arrival order without a lock and a request larger than the bucket
+    still goes through once its share of the minute has elapsed.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        self._refill()
+        self.level -= amount
+        return max(-self.level / self.rate, 0.0)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, when negative, take) units after the real cost is known."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Admission control for model calls shared by every agent in the process.
+
+    A call is admitted once the requests-per-minute and tokens-per-minute buckets allow it, no
+    Retry-After pause is in effect, and fewer calls than the concurrency limit are in flight.
+    The concurrency limit adapts AIMD-style: it grows by about one per limit's worth of
+    successful calls and halves on a rate-limit error.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = TOKENS_PER_MINUTE,
+        max_concurrency: int = MAX_CONCURRENT_MODEL_CALLS,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max(max_concurrency, 1)
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        # asyncio primitives cannot be shared between event loops.
+        self._conditions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Condition]" = weakref.WeakKeyDictionary()
+        self.counters = {
+            "calls": 0,
+            "waited_calls": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "rate_limited": 0,
+            "retries": 0,
+            "backoff_seconds": 0.0,
+        }
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        condition = self._conditions.get(loop)
+        if condition is None:
+            condition = self._conditions[loop] = asyncio.Condition()
+        return condition
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Wait until a call estimated at `estimated_tokens` may be sent; return the seconds waited."""
+        start = time.monotonic()
+        delay = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        if delay:
+            await asyncio.sleep(delay)
+        while (pause := self.paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(pause)
+        condition = self._condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.concurrency_limit))
+            self.in_flight += 1
+        waited = time.monotonic() - start
+        self.counters["calls"] += 1
+        if waited > 0.001:
+            self.counters["waited_calls"] += 1
+            self.counters["wait_seconds"] += waited
+            self.counters["max_wait_seconds"] = max(self.counters["max_wait_seconds"], waited)
+            record_queue_wait(waited)
+        return waited
+
+    async def release(self, admitted_at: float, error: BaseException | None = None) -> None:
+        if isinstance(error, RateLimitError) or getattr(error, "status_code", None) == 429:
+            self.counters["rate_limited"] += 1
+            pause = retry_after(error)
+            if pause:
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            # Calls admitted before the last decrease saw the old limit; halve only once per wave.
+            if admitted_at >= self._last_decrease:
+                self.concurrency_limit = max(self.concurrency_limit / 2, 1.0)
+                self._last_decrease = time.monotonic()
+        elif error is None:
+            self.concurrency_limit = min(self.concurrency_limit + 1 / self.concurrency_limit, self.max_concurrency)
+        condition = self._condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def admit(self, estimated_tokens: int) -> AsyncIterator[dict[str, Any]]:
+        """
+        Hold an admission for the duration of a call. Set "tokens" on the yielded dict to the
+        call's real token count to correct the tokens-per-minute bucket.
+        """
+        await self.acquire(estimated_tokens)
+        ticket: dict[str, Any] = {"tokens": None}
+        admitted_at = time.monotonic()
+        try:
+            yield ticket
+        except BaseException as e:
+            await self.release(admitted_at, e)
+            raise
+        await self.release(admitted_at)
+        self.settle(estimated_tokens, ticket["tokens"])
+
+    def settle(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """Correct the tokens-per-minute bucket once a call's real token count is known."""
+        if self.tokens and actual_tokens is not None:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def record_backoff(self, delay: float) -> None:
+        self.counters["retries"] += 1
+        self.counters["backoff_seconds"] += delay
+        record_retry(delay)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.counters.items()},
+            "concurrency_limit": round(self.concurrency_limit, 2),
+            "in_flight": self.in_flight,
+            "paused_for": round(max(self.paused_until - time.monotonic(), 0.0), 2),
+        }
+
+
+def estimate_tokens(system_instructions: str | None, input: Any, tools: list[Any], model_settings: Any) -> int:
+    """A rough count of the tokens a call sends and may receive, for the tokens-per-minute bucket."""
+    size = len(system_instructions or "")
+    size += len(input) if isinstance(input, str) else len(json.dumps(input, default=str))
+    for tool in tools:
+        size += len(json.dumps(getattr(tool, "params_json_schema", None) or {})) + len(getattr(tool, "description", "") or "")
+    return size // CHARS_PER_TOKEN + (getattr(model_settings, "max_tokens", None) or 0)
+
+
+class RateLimitedModel(Model):
+    """
+    A Model whose calls are admitted by a RateLimiter and retried (honoring Retry-After) by
+    retry_with_exponential_backoff. This is the only retry layer; the OpenAI client in runner.py
+    is created with max_retries=0 so retries do not multiply.
+    """
+
+    def __init__(self, model: Model, limiter: "RateLimiter"):
+        self.model = model
+        self.limiter = limiter
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        estimated = estimate_tokens(system_instructions, input, tools, model_settings)
+
+        async def attempt():
+            async with self.limiter.admit(estimated) as ticket:
+                response = await self.model.get_response(
+                    system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+                )
+                ticket["tokens"] = response.usage.total_tokens or None
+                return response
+
+        return await retry_with_exponential_backoff(attempt, on_retry=self.limiter.record_backoff)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        estimated = estimate_tokens(system_instructions, input, tools, model_settings)
+
+        # A stream is retried only until its first event; after that a retry would repeat output.
+        async def attempt():
+            await self.limiter.acquire(estimated)
+            admitted_at = time.monotonic()
+            stream = self.model.stream_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+            ).__aiter__()
+            try:
+                return admitted_at, stream, await stream.__anext__()
+            except StopAsyncIteration:
+                await self.limiter.release(admitted_at)
+                return None
+            except BaseException as e:
+                await self.limiter.release(admitted_at, e)
+                raise
+
+        started = await retry_with_exponential_backoff(attempt, on_retry=self.limiter.record_backoff)
+        if started is None:
+            return
+        admitted_at, stream, event = started
+        tokens = None
+        error: BaseException | None = None
+        try:
+            while True:
+                if getattr(event, "type", None) == "response.completed" and getattr(event.response, "usage", None):
+                    tokens = event.response.usage.total_tokens
+                yield event
+                try:
+                    event = await stream.__anext__()
+                except StopAsyncIteration:
+                    break
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            await self.limiter.release(admitted_at, error)
+            self.limiter.settle(estimated, tokens)
+
+    async def close(self) -> None:
+        await self.model.close()
+
+
+class RateLimitedModelProvider(ModelProvider):
+    """Wrap every model from `provider` in a RateLimitedModel sharing one RateLimiter."""
+
+    def __init__(self, provider: ModelProvider, limiter: RateLimiter):
+        self.provider = provider
+        self.limiter = limiter
+
+    def get_model(self, model_name: str | None) -> Model:
+        return RateLimitedModel(self.provider.get_model(model_name), self.limiter)
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, configured from AGENTS_REQUESTS_PER_MINUTE,
+    AGENTS_TOKENS_PER_MINUTE and AGENTS_MAX_CONCURRENT_MODEL_CALLS."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def rate_limiter_stats() -> dict[str, Any]:
+    """Return admission wait times, rate-limit errors, retries and the current concurrency limit."""
+    return get_rate_limiter().stats()
@@ -0,0 +1,240 @@
+import difflib
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from .file_events import add_file_change_listener
+from .file_window import read_window, window_from_buffer, MMAP_THRESHOLD
+
+# Configuration
+READ_CACHE_MAX_BYTES = 64 * 1024 * 1024  # file buffers kept in memory between reads
+SEEN_TEXT_MAX_BYTES = 32 * 1024 * 1024  # previously returned contents kept for diffs
+MAX_DIFF_RATIO = 0.5  # send a diff only when it is at most this fraction of the new content
+
+
+@dataclass(frozen=True)
+class ReadReceipt:
+    """What a read would deliver, to be recorded with `ReadCache.mark_delivered` once it is sent."""
+
+    window_key: tuple
+    digest: bytes
+    text: str | None  # kept for diffs against full reads
+
+
+class ReadCache:
+    """
+    Per-run cache in front of read_file_tool.
+
+    File buffers are cached by path and validated with (mtime_ns, size), so repeated reads of
+    an unchanged file cost one stat instead of a read. Separately, every conversation (one
+    Runner.run) remembers a digest of what was delivered to it; asking for the same window
+    again returns "unchanged" instead of the content, and a changed full read returns a
+    unified diff against the previous version when that is smaller. Only content actually
+    handed to the model may be recorded: callers that might drop or cut a window use `peek`
+    and call `mark_delivered` for what they send. Write tools invalidate the buffers through
+    the file change listener.
+    """
+
+    def __init__(self):
+        self._buffers: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+        self._buffer_bytes = 0
+        self._texts: OrderedDict[bytes, str] = OrderedDict()
+        self._text_bytes = 0
+        self._seen: dict[int, dict[tuple, bytes]] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            "reads": 0,
+            "buffer_hits": 0,
+            "buffer_misses": 0,
+            "unchanged": 0,
+            "diffs": 0,
+            "invalidations": 0,
+            "chars_saved": 0,
+        }
+
+    # File buffers
+
+    def _buffer(self, path: str) -> bytes | None:
+        """Return the cached contents of `path` if still valid, reading small files on a miss."""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._buffers.get(path)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                self._buffers.move_to_end(path)
+                self.counters["buffer_hits"] += 1
+                return cached[2]
+        self.counters["buffer_misses"] += 1
+        if stat.st_size >= MMAP_THRESHOLD:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            self._drop_buffer(path)
+            self._buffers[path] = (stat.st_mtime_ns, stat.st_size, data)
+            self._buffer_bytes += len(data)
+            while self._buffer_bytes > READ_CACHE_MAX_BYTES and self._buffers:
+                _, (_, _, evicted) = self._buffers.popitem(last=False)
+                self._buffer_bytes -= len(evicted)
+        return data
+
+    def _drop_buffer(self, path: str) -> None:
+        cached = self._buffers.pop(path, None)
+        if cached:
+            self._buffer_bytes -= len(cached[2])
+
+    def invalidate(self, path: str | None) -> None:
+        """File change listener: drop the buffer for `path`, or every buffer when None."""
+        with self._lock:
+            self.counters["invalidations"] += 1
+            if path is None:
+                self._buffers.clear()
+                self._buffer_bytes = 0
+            else:
+                self._drop_buffer(os.path.abspath(path))
+
+    # Conversations
+
+    def _conversation(self, owner: Any) -> dict[tuple, bytes] | None:
+        if owner is None:
+            return None
+        key = id(owner)
+        seen = self._seen.get(key)
+        if seen is None:
+            seen = self._seen[key] = {}
+            try:
+                weakref.finalize(owner, self._seen.pop, key, None)
+            except TypeError:
+                pass
+        return seen
+
+    def _remember_text(self, digest: bytes, text: str) -> None:
+        if digest in self._texts:
+            self._texts.move_to_end(digest)
+            return
+        self._texts[digest] = text
+        self._text_bytes += len(text)
+        while self._text_bytes > SEEN_TEXT_MAX_BYTES and self._texts:
+            _, evicted = self._texts.popitem(last=False)
+            self._text_bytes -= len(evicted)
+
+    def read(
+        self,
+        owner: Any,
+        path: str,
+        mode: str = "full",
+        start: int = 0,
+        count: int = 0,
+        max_tokens: int = 0,
+        cursor: str = "",
+    ) -> dict[str, Any]:
+        """
+        Read a window of `path` like `read_window`, answering from the cache where possible,
+        and record it as delivered to the conversation.
+
+        Args:
+            owner: An object that lives exactly as long as the conversation doing the reading
+                (the run's Usage object). None disables the unchanged/diff responses.
+            path, mode, start, count, max_tokens, cursor: As for `read_window`.
+        """
+        window, receipt = self.peek(owner, path, mode, start, count, max_tokens, cursor)
+        self.mark_delivered(owner, receipt)
+        return window
+
+    def mark_delivered(self, owner: Any, receipt: "ReadReceipt | None") -> None:
+        """Record that the window behind `receipt` (from `peek`) was handed to the conversation."""
+        if receipt is None:
+            return
+        with self._lock:
+            seen = self._conversation(owner)
+            if seen is None:
+                return
+            seen[receipt.window_key] = receipt.digest
+            if receipt.text is not None:
+                self._remember_text(receipt.digest, receipt.text)
+
+    def peek(
+        self,
+        owner: Any,
+        path: str,
+        mode: str = "full",
+        start: int = 0,
+        count: int = 0,
+        max_tokens: int = 0,
+        cursor: str = "",
+    ) -> tuple[dict[str, Any], "ReadReceipt | None"]:
+        """
+        Like `read`, but without recording anything: "unchanged" and diffs are relative to what
+        was delivered before. Returns the window and a receipt to pass to `mark_delivered` if
+        the window is sent (None when there is nothing to record).
+        """
+        abs_path = os.path.abspath(path)
+        self.counters["reads"] += 1
+        data = self._buffer(abs_path)
+        if data is None:
+            window = read_window(abs_path, mode, start, count, max_tokens, cursor)
+        else:
+            window = window_from_buffer(data, mode, start, count, max_tokens, cursor)
+
+        content = window["content"]
+        digest = hashlib.blake2b(content.encode("utf-8", errors="replace"), digest_size=16).digest()
+        window_key = (abs_path, mode, start, count, max_tokens, cursor)
+        with self._lock:
+            seen = self._conversation(owner)
+            if seen is None:
+                return window, None
+            previous = seen.get(window_key)
+            receipt = ReadReceipt(window_key, digest, content if mode == "full" and not cursor else None)
+
+            if previous == digest:
+                self.counters["unchanged"] += 1
+                self.counters["chars_saved"] += len(content)
+                window["content"] = None
+                window["unchanged"] = True
+                window["message"] = "Unchanged since you last read this; refer to that earlier result."
+                return window, None
+
+            old_text = self._texts.get(previous) if previous and mode == "full" and not cursor else None
+        if old_text is not None:
+            diff = "".join(difflib.unified_diff(
+                old_text.splitlines(keepends=True),
+                content.splitlines(keepends=True),
+                fromfile=f"{path} (previous read)",
+                tofile=path,
+            ))
+            if len(diff) <= len(content) * MAX_DIFF_RATIO:
+                self.counters["diffs"] += 1
+                self.counters["chars_saved"] += len(content) - len(diff)
+                window["content"] = None
+                window["diff"] = diff
+                window["message"] = "Changed since you last read this; apply the diff to that earlier result."
+        return window, receipt
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "cached_files": len(self._buffers),
+                "cached_bytes": self._buffer_bytes,
+                "conversations": len(self._seen),
+            }
+
+
+_read_cache: ReadCache | None = None
+
+
+def get_read_cache() -> ReadCache:
+    """Return the process wide read cache, registering it for write invalidation on first use."""
+    global _read_cache
+    if _read_cache is None:
+        _read_cache = ReadCache()
+        add_file_change_listener(_read_cache.invalidate)
+    return _read_cache
+
+
+def read_cache_stats() -> dict[str, Any]:
+    """Return hit, unchanged and diff counters for the read cache."""
+    return get_read_cache().stats()
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator
+
+from agents import ModelResponse, Usage
+from agents.models.interface import Model, ModelProvider
+from openai.types.responses import Response, ResponseCompletedEvent, ResponseOutputItem
+from pydantic import BaseModel, TypeAdapter
+
+from .trigram_index import INDEX_DIR_NAME
+
+# Configuration
+RESPONSE_CACHE_MODE = os.environ.get("AGENTS_RESPONSE_CACHE", "off")  # off, on or replay
+RESPONSE_CACHE_PATH = os.path.join(INDEX_DIR_NAME, "model_responses.sqlite3")
+RESPONSE_CACHE_TTL = float(os.environ.get("AGENTS_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("AGENTS_RESPONSE_CACHE_MB", "256")) * 1024 * 1024
+CACHE_FORMAT_VERSION = 1
+
+RESPONSE_CACHE_MODES = ("off", "on", "replay")
+
+_output_items = TypeAdapter(list[ResponseOutputItem])
+
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay mode when a model call has no recorded response."""
+
+
+def _plain(value: Any) -> Any:
+    """Turn SDK/pydantic objects into JSON-compatible values for hashing and storage."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _normalize_input(input: Any) -> Any:
+    """
+    Input items without the ids the provider assigned to earlier output items. Those differ on
+    every live call (and chat completions uses a placeholder), while call_id, role and content
+    are what the model actually sees.
+    """
+    if isinstance(input, str):
+        return input
+    items = []
+    for item in _plain(input):
+        if isinstance(item, dict):
+            item = {key: value for key, value in item.items() if key != "id"}
+        items.append(item)
+    return items
+
+
+def _tool_schema(tool: Any) -> Any:
+    schema = {"name": getattr(tool, "name", type(tool).__name__), "type": type(tool).__name__}
+    for attribute in ("description", "params_json_schema", "strict_json_schema"):
+        if hasattr(tool, attribute):
+            schema[attribute] = _plain(getattr(tool, attribute))
+    return schema
+
+
+def response_cache_key(
+    model_name: str,
+    system_instructions: str | None,
+    input: Any,
+    model_settings: Any,
+    tools: list[Any],
+    output_schema: Any,
+    handoffs: list[Any],
+    extra: dict[str, Any] | None = None,
+) -> str:
+    """
+    Hash everything that determines a model call's answer: the model, instructions, tool and
+    output schemas, handoffs, settings and the normalized input items.
+    """
+    settings = model_settings.to_json_dict() if hasattr(model_settings, "to_json_dict") else _plain(model_settings)
+    material = {
+        "version": CACHE_FORMAT_VERSION,
+        "model": model_name,
+        "instructions": system_instructions,
+        "input": _normalize_input(input),
+        "settings": settings,
+        "tools": [_tool_schema(tool) for tool in tools],
+        "output_schema": output_schema.json_schema() if output_schema is not None else None,
+        "handoffs": [
+            {"name": handoff.tool_name, "description": handoff.tool_description, "schema": handoff.input_json_schema}
+            for handoff in handoffs
+        ],
+        "extra": _plain(extra or {}),
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite store of model responses, keyed by `response_cache_key`.
+
+    Entries older than `ttl` seconds are not served (except in replay mode) and are removed on
+    the next store; beyond `max_bytes` the least recently used entries are removed.
+    """
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, ttl: float = RESPONSE_CACHE_TTL, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "tokens_saved": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, created REAL, accessed REAL, size INTEGER, body TEXT)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._db = db
+        return self._db
+
+    def get(self, key: str, ignore_ttl: bool = False) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute("SELECT created, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (not ignore_ttl and now - row[0] > self.ttl):
+                self.counters["misses"] += 1
+                return None
+            self._connect().execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            entry = json.loads(row[1])
+            self.counters["hits"] += 1
+            self.counters["tokens_saved"] += entry.get("usage", {}).get("total_tokens", 0)
+        return entry
+
+    def put(self, key: str, model_name: str, entry: dict[str, Any]) -> None:
+        body = json.dumps(entry, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, created, accessed, size, body) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, now, now, len(body), body),
+            )
+            self.counters["stores"] += 1
+            self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        self.counters["evictions"] += db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.counters["evictions"] += len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": entries,
+            "bytes": size,
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _usage_dict(usage: Any) -> dict[str, int]:
+    if usage is None:
+        return {}
+    cached = getattr(getattr(usage, "input_tokens_details", None), "cached_tokens", 0) or 0
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        "cached_tokens": cached,
+    }
+
+
+class CachingModel(Model):
+    """
+    A Model that answers from a ResponseCache when it can and records what `model` answers
+    otherwise. In "replay" mode it never calls `model` and raises ResponseCacheMiss instead.
+    A cached answer reports zero usage, since it cost nothing.
+    """
+
+    def __init__(self, model: Model, model_name: str, cache: ResponseCache, mode: str):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+        self.mode = mode
+
+    def _key(self, system_instructions, input, model_settings, tools, output_schema, handoffs, kwargs) -> str:
+        extra = {name: value for name, value in kwargs.items() if name == "prompt"}
+        return response_cache_key(
+            self.model_name, system_instructions, input, model_settings, tools, output_schema, handoffs, extra
+        )
+
+    def _lookup(self, key: str) -> dict[str, Any] | None:
+        entry = self.cache.get(key, ignore_ttl=self.mode == "replay")
+        if entry is None and self.mode == "replay":
+            raise ResponseCacheMiss(f"No recorded response for this {self.model_name} call (replay mode, key {key[:12]})")
+        return entry
+
+    def _store(self, key: str, output: list[Any], usage: Any, response_id: str | None) -> None:
+        self.cache.put(
+            key,
+            self.model_name,
+            {"output": _plain(output), "usage": _usage_dict(usage), "response_id": response_id},
+        )
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs) -> ModelResponse:
+        key = self._key(system_instructions, input, model_settings, tools, output_schema, handoffs, kwargs)
+        entry = self._lookup(key)
+        if entry is not None:
+            return ModelResponse(
+                output=_output_items.validate_python(entry["output"]), usage=Usage(), response_id=entry.get("response_id")
+            )
+        response = await self.model.get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        )
+        self._store(key, response.output, response.usage, response.response_id)
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs) -> AsyncIterator[Any]:
+        key = self._key(system_instructions, input, model_settings, tools, output_schema, handoffs, kwargs)
+        entry = self._lookup(key)
+        if entry is not None:
+            # A single completed event is all the runner needs to build the turn.
+            yield ResponseCompletedEvent(
+                type="response.completed",
+                sequence_number=0,
+                response=Response(
+                    id=entry.get("response_id") or f"cached-{key[:16]}",
+                    created_at=time.time(),
+                    model=self.model_name,
+                    object="response",
+                    output=_output_items.validate_python(entry["output"]),
+                    parallel_tool_calls=False,
+                    tool_choice="auto",
+                    tools=[],
+                ),
+            )
+            return
+        done_items: list[Any] = []
+        async for event in self.model.stream_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        ):
+            if getattr(event, "type", None) == "response.output_item.done":
+                done_items.append(event.item)
+            elif isinstance(event, ResponseCompletedEvent):
+                response = event.response
+                self._store(key, response.output or done_items, response.usage, response.id)
+            yield event
+
+    async def close(self) -> None:
+        await self.model.close()
+
+
+class CachingModelProvider(ModelProvider):
+    """Wrap every model from `provider` in a CachingModel sharing one ResponseCache."""
+
+    def __init__(self, provider: ModelProvider, cache: ResponseCache, mode: str):
+        self.provider = provider
+        self.cache = cache
+        self.mode = mode
+
+    def get_model(self, model_name: str | None) -> Model:
+        return CachingModel(self.provider.get_model(model_name), model_name or "default", self.cache, self.mode)
+
+
+_mode = RESPONSE_CACHE_MODE
+_response_caches: dict[str, ResponseCache] = {}
+
+
+def set_response_cache_mode(mode: str) -> None:
+    """
+    Set how RetryRunner uses the model response cache.
+
+    Args:
+        mode: "off" to always call the model, "on" to answer identical calls from the cache and
+            record new ones, or "replay" to answer only from the cache and raise
+            ResponseCacheMiss for any call that was not recorded (ignoring the TTL).
+    """
+    global _mode
+    if mode not in RESPONSE_CACHE_MODES:
+        raise ValueError(f"Unknown response cache mode '{mode}', expected one of {RESPONSE_CACHE_MODES}")
+    _mode = mode
+
+
+def response_cache_mode() -> str:
+    return _mode
+
+
+def get_response_cache(path: str = RESPONSE_CACHE_PATH) -> ResponseCache:
+    """Return the response cache stored at `path`."""
+    key = os.path.abspath(path)
+    if key not in _response_caches:
+        _response_caches[key] = ResponseCache(key)
+    return _response_caches[key]
+
+
+def response_cache_stats() -> list[dict[str, Any]]:
+    """Return hit, miss and eviction counters for every response cache in use."""
+    return [{"path": path, **cache.stats()} for path, cache in _response_caches.items()]
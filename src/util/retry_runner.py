@@ -1,18 +1,51 @@
 import asyncio
+import dataclasses
 import random
+import time
+from email.utils import parsedate_to_datetime
 from typing import Callable
-from openai import APIError, RateLimitError
-from agents import Runner
+from openai import APIConnectionError, APIError, RateLimitError
+from agents import Runner, RunConfig
+from .response_cache import CachingModelProvider, get_response_cache, response_cache_mode
+from .hedging import HedgedModelProvider, TimedModelProvider
+from .run_context import agent_scope
+from .client_pool import PooledModelProvider, get_client_pool
+from .prompt_layout import PromptCacheTrackingModelProvider
+from .telemetry import TelemetryModelProvider, run_scope
 
 # Constants
 MAX_RETRIES = 3
-RETRY_BASE_DELAY = 6  # seconds
+RETRY_BASE_DELAY = 2  # seconds, used when the server gives no Retry-After
+MAX_RETRY_AFTER = 120  # seconds; longer Retry-After values are capped
+
+def retry_after(error: BaseException | None) -> float | None:
+    """
+    Return the delay the server asked for in the Retry-After (or retry-after-ms) header of
+    `error`'s response, in seconds, or None when there is none.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return min(float(headers["retry-after-ms"]) / 1000, MAX_RETRY_AFTER)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return None
 
 async def retry_with_exponential_backoff(
     func: Callable,
     *args,
     max_retries: int = MAX_RETRIES,
     base_delay: float = RETRY_BASE_DELAY,
+    on_retry: Callable[[float], None] | None = None,
     **kwargs,
 ):
     """
@@ -22,7 +55,8 @@ async def retry_with_exponential_backoff(
         func: The async function to call
         *args: Arguments to pass to the function
         max_retries: Maximum number of retries
-        base_delay: Base delay between retries in seconds
+        base_delay: Base delay between retries in seconds, when the server sends no Retry-After
+        on_retry: Called with the delay before each retry, for metrics
         **kwargs: Keyword arguments to pass to the function
 
     Returns:
@@ -38,33 +72,38 @@ async def retry_with_exponential_backoff(
                 print(f"Rate limit exceeded after {max_retries} retries. Giving up.")
                 raise
 
-            delay = base_delay * (2**retries) + (0.1 * random.random())
+            delay = retry_after(e) or base_delay * (2**retries) * (0.5 + random.random())
             retries += 1
 
             print(
                 f"Rate limited. Retrying in {delay:.2f} seconds... (Attempt {retries}/{max_retries})"
             )
+            if on_retry:
+                on_retry(delay)
             await asyncio.sleep(delay)
         except (APIError, Exception) as e:
             error_code = getattr(e, "code", None)
             status_code = getattr(e, "status_code", None)
 
             # Only retry on certain error types
-            if (status_code and status_code >= 500) or error_code in [
-                "server_error",
-                "timeout",
-            ]:
+            if (
+                (status_code and (status_code >= 500 or status_code == 408))
+                or error_code in ["server_error", "timeout"]
+                or isinstance(e, APIConnectionError)
+            ):
                 if retries >= max_retries:
                     print(f"API error after {max_retries} retries. Giving up.")
                     raise
 
-                delay = base_delay * (2**retries) + (0.1 * random.random())
+                delay = retry_after(e) or base_delay * (2**retries) * (0.5 + random.random())
                 retries += 1
 
                 error_message = str(e)
                 print(
                     f"API error: {error_message}. Retrying in {delay:.2f} seconds... (Attempt {retries}/{max_retries})"
                 )
+                if on_retry:
+                    on_retry(delay)
                 await asyncio.sleep(delay)
             else:
                 # Don't retry other errors
@@ -72,12 +111,59 @@ async def retry_with_exponential_backoff(
 
 class RetryRunner:
     """
-    Runner that includes retry logic for rate limits and API errors.
+    Runner whose model calls are rate limited and retried.
+
+    Retrying happens per model call in the rate-limited model layer (util/rate_limiter.py), not
+    around the whole run, so a failed call does not repeat the tool calls that preceded it.
     """
 
+    @staticmethod
+    def run_config(run_config: RunConfig | None = None) -> RunConfig:
+        """
+        Return `run_config` (or a default one) with its model provider wrapped in the model
+        layers. Without a run config, calls go to the client pool when one is configured
+        (util/client_pool.py). From the top: the model router when a routes file exists
+        (util/model_router.py), the response cache when switched on (AGENTS_RESPONSE_CACHE),
+        hedging, the shared rate limiter with retries, per-attempt deadlines, prompt cache
+        accounting and per-request telemetry. Agents called as tools inherit the run config, so nested runs go through
+        them too. With the client pool, deadlines apply per endpoint inside the pool instead, so
+        an endpoint that hangs is failed over rather than retried.
+        """
+        # Imported here because rate_limiter builds on retry_with_exponential_backoff above.
+        from .rate_limiter import RateLimitedModelProvider, get_rate_limiter
+        from .model_router import RoutedModelProvider, get_model_router
+
+        if run_config is None:
+            pool = get_client_pool()
+            run_config = RunConfig(model_provider=PooledModelProvider(pool)) if pool else RunConfig()
+        provider = TelemetryModelProvider(run_config.model_provider)
+        provider = PromptCacheTrackingModelProvider(provider)
+        if not isinstance(run_config.model_provider, PooledModelProvider):
+            provider = TimedModelProvider(provider)
+        provider = RateLimitedModelProvider(provider, get_rate_limiter())
+        provider = HedgedModelProvider(provider)
+        mode = response_cache_mode()
+        if mode != "off":
+            provider = CachingModelProvider(provider, get_response_cache(), mode)
+        router = get_model_router()
+        if router is not None:
+            provider = RoutedModelProvider(router, provider)
+        return dataclasses.replace(run_config, model_provider=provider)
+
     @staticmethod
     async def run(agent, input_items, **kwargs):
-        """Run an agent with retry logic for rate limits."""
-        return await retry_with_exponential_backoff(
-            Runner.run, agent, input_items, **kwargs
-        )
+        """
+        Run an agent; its model calls are rate limited and retried by the model layer, and the
+        run is measured in the pipeline's telemetry (util/telemetry.py).
+        """
+        kwargs["run_config"] = RetryRunner.run_config(kwargs.get("run_config"))
+        with agent_scope(agent.name), run_scope(agent.name):
+            return await Runner.run(agent, input_items, **kwargs)
+
+    @staticmethod
+    def run_streamed(agent, input_items, **kwargs):
+        """Start a streamed run of an agent through the same model layers as run()."""
+        kwargs["run_config"] = RetryRunner.run_config(kwargs.get("run_config"))
+        # The streamed run's task copies the context here, agent scope included.
+        with agent_scope(agent.name):
+            return Runner.run_streamed(agent, input_items, **kwargs)
@@ -0,0 +1,43 @@
+import contextvars
+import dataclasses
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from agents import Agent, FunctionTool
+
+from .telemetry import run_scope
+
+# The agent whose run the current task belongs to. Model layers (hedging, routing, metrics)
+# read it to apply per-agent settings; agent hooks cannot set it because the SDK runs them in
+# separate tasks.
+_current_agent: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_agent", default=None)
+
+
+@contextmanager
+def agent_scope(agent_name: str) -> Iterator[None]:
+    """Attribute model calls made inside the block (and tasks started from it) to `agent_name`."""
+    token = _current_agent.set(agent_name)
+    try:
+        yield
+    finally:
+        _current_agent.reset(token)
+
+
+def current_agent_name() -> str | None:
+    """Return the name of the agent the running model call belongs to, if known."""
+    return _current_agent.get()
+
+
+def agent_as_tool(agent: Agent, tool_name: str, tool_description: str, **kwargs: Any) -> FunctionTool:
+    """
+    `agent.as_tool(...)`, with the nested run attributed to `agent` rather than to the agent
+    calling the tool, and measured as a run of its own in the telemetry.
+    """
+    tool = agent.as_tool(tool_name=tool_name, tool_description=tool_description, **kwargs)
+    invoke = tool.on_invoke_tool
+
+    async def on_invoke_tool(ctx, arguments: str) -> Any:
+        with agent_scope(agent.name), run_scope(agent.name):
+            return await invoke(ctx, arguments)
+
+    return dataclasses.replace(tool, on_invoke_tool=on_invoke_tool)
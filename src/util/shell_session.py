@@ -0,0 +1,320 @@
+import asyncio
+import atexit
+import codecs
+import json
+import os
+import secrets
+import shlex
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import weakref
+
+from .command_runner import (
+    approve_command,
+    CommandRejected,
+    CommandResult,
+    OutputCallback,
+    KILL_GRACE_PERIOD,
+    READ_CHUNK_SIZE,
+    _semaphore,
+)
+
+# Configuration
+SESSION_SHELL = os.environ.get("AGENTS_SESSION_SHELL") or shutil.which("bash") or "/bin/sh"
+WORKER_START_TIMEOUT = 60.0  # seconds allowed for the pytest worker to import pytest
+
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pytest_worker.py")
+
+# Live subprocesses, killed when the interpreter exits.
+_live_processes: "weakref.WeakSet[asyncio.subprocess.Process]" = weakref.WeakSet()
+
+
+def _kill_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        if sys.platform == "win32":
+            process.kill()
+        else:
+            os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _terminate(process: asyncio.subprocess.Process | None) -> None:
+    if process is None or process.returncode is not None:
+        return
+    _kill_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        _kill_group(process, signal.SIGKILL)
+        await process.wait()
+
+
+@atexit.register
+def _kill_live_processes() -> None:
+    for process in list(_live_processes):
+        if process.returncode is None:
+            _kill_group(process, signal.SIGKILL)
+
+
+class ShellSession:
+    """
+    A long-lived shell that runs commands one after another.
+
+    Working directory, environment variables, shell functions and activated virtualenvs persist
+    between commands, and no shell is started per command. Each command runs with stdin from
+    /dev/null and is followed by a marker line on stdout and stderr carrying its exit status and
+    the shell's working directory. Commands are passed to `eval` as one quoted word, so one that
+    does not parse (an unclosed quote, a dangling `if`) fails with the shell's syntax error
+    status instead of swallowing the marker. A command that times out takes the session down
+    with it; the next command starts a fresh shell in the session's original directory. Running
+    commands count against run_command's MAX_CONCURRENT_COMMANDS.
+    """
+
+    def __init__(self, cwd: str, shell: str = SESSION_SHELL):
+        self.cwd = os.path.abspath(cwd)
+        self.shell = shell
+        self.current_dir = self.cwd
+        self.commands_run = 0
+        self.restarts = 0
+        self._process: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def _start(self) -> None:
+        if self._process is not None:
+            self.restarts += 1
+        self._process = await asyncio.create_subprocess_exec(
+            self.shell,
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=sys.platform != "win32",
+        )
+        _live_processes.add(self._process)
+        self.current_dir = self.cwd
+
+    async def run(self, command: str, timeout: float, on_output: OutputCallback | None = None) -> CommandResult:
+        """
+        Run `command` in the session. Output is passed to `on_output` as it arrives, as with
+        run_command; the result's stdout and stderr are left empty.
+
+        Raises:
+            CommandRejected: If the approval policy refuses the command.
+        """
+        if not await approve_command(command):
+            raise CommandRejected(f"Command rejected by approval policy: {command}")
+        async with self._lock, _semaphore():
+            if not self.alive:
+                await self._start()
+            process = self._process
+            marker = f"__agents_done_{secrets.token_hex(8)}__"
+            script = (
+                f"eval {shlex.quote(command)} < /dev/null\n"
+                f"printf '\\n{marker} %s %s\\n' \"$?\" \"$PWD\"\n"
+                f"printf '\\n{marker}\\n' >&2\n"
+            )
+            started = time.perf_counter()
+            process.stdin.write(script.encode())
+            await process.stdin.drain()
+            self.commands_run += 1
+
+            readers = asyncio.gather(
+                _read_until(process.stdout, "stdout", marker, on_output),
+                _read_until(process.stderr, "stderr", marker, on_output),
+            )
+            try:
+                trailer, _ = await asyncio.wait_for(asyncio.shield(readers), timeout)
+            except asyncio.TimeoutError:
+                await _terminate(process)
+                readers.cancel()
+                self.current_dir = self.cwd
+                return CommandResult("", "", None, True, time.perf_counter() - started)
+            except asyncio.CancelledError:
+                await _terminate(process)
+                readers.cancel()
+                raise
+
+            if trailer is None:
+                # The command ended the shell (exit, exec, set -e ...).
+                returncode = await process.wait()
+            else:
+                status, _, directory = trailer.partition(" ")
+                returncode = int(status)
+                self.current_dir = directory or self.current_dir
+            return CommandResult("", "", returncode, False, time.perf_counter() - started)
+
+    async def close(self) -> None:
+        await _terminate(self._process)
+
+
+async def _read_until(
+    stream: asyncio.StreamReader, name: str, marker: str, on_output: OutputCallback | None
+) -> str | None:
+    """
+    Forward `stream` to `on_output` up to the marker line and return the rest of that line,
+    or None if the stream ended first.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    needle = "\n" + marker
+    pending = ""
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        pending += decoder.decode(chunk, final=not chunk)
+        found = pending.find(needle)
+        if found != -1:
+            line_end = pending.find("\n", found + len(needle))
+            if line_end == -1 and chunk:
+                continue
+            if found and on_output:
+                on_output(name, pending[:found])
+            return pending[found + len(needle):line_end if line_end != -1 else None].strip()
+        if not chunk:
+            if pending and on_output:
+                on_output(name, pending)
+            return None
+        # Hold back just enough to recognise a marker split across reads.
+        keep = len(needle)
+        if len(pending) > keep:
+            if on_output:
+                on_output(name, pending[:-keep])
+            pending = pending[-keep:]
+
+
+def project_python(cwd: str) -> str:
+    """The interpreter tests in `cwd` should run with: AGENTS_PYTHON, the project's .venv, or this one."""
+    configured = os.environ.get("AGENTS_PYTHON")
+    if configured:
+        return configured
+    for candidate in (os.path.join(".venv", "bin", "python"), os.path.join(".venv", "Scripts", "python.exe")):
+        path = os.path.join(cwd, candidate)
+        if os.path.exists(path):
+            return path
+    return sys.executable
+
+
+class PytestWorker:
+    """
+    A Python process with pytest already imported.
+
+    Every run forks the worker, so each test session starts from a clean import state without
+    paying for interpreter start-up and the pytest import. The worker is restarted when the
+    pytest installation it loaded changes. Runs see the environment the worker was started with
+    and count against run_command's MAX_CONCURRENT_COMMANDS. POSIX only, since it relies on fork.
+    """
+
+    def __init__(self, cwd: str, python: str | None = None):
+        self.cwd = os.path.abspath(cwd)
+        self.python = python or project_python(self.cwd)
+        self.runs = 0
+        self.starts = 0
+        self._process: asyncio.subprocess.Process | None = None
+        self._pytest_file: str | None = None
+        self._pytest_mtime = 0.0
+        self._lock = asyncio.Lock()
+
+    def _stale(self) -> bool:
+        if self._process is None or self._process.returncode is not None:
+            return True
+        try:
+            return os.stat(self._pytest_file).st_mtime != self._pytest_mtime
+        except (OSError, TypeError):
+            return True
+
+    async def _start(self) -> None:
+        await _terminate(self._process)
+        self._process = await asyncio.create_subprocess_exec(
+            self.python,
+            _WORKER_SCRIPT,
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        _live_processes.add(self._process)
+        self.starts += 1
+        line = await asyncio.wait_for(self._process.stdout.readline(), WORKER_START_TIMEOUT)
+        reply = json.loads(line) if line else {"error": "worker exited during start-up"}
+        if not reply.get("ready"):
+            await _terminate(self._process)
+            raise RuntimeError(f"Could not start pytest worker with {self.python}: {reply.get('error')}")
+        self._pytest_file = reply["pytest"]
+        self._pytest_mtime = os.stat(self._pytest_file).st_mtime
+
+    async def run(self, args: list[str], timeout: float, on_output: OutputCallback | None = None) -> CommandResult:
+        """
+        Run `pytest <args>` in the worker's directory. Output is passed to `on_output` once the
+        run has finished; the result's stdout and stderr are left empty.
+
+        Raises:
+            CommandRejected: If the approval policy refuses the equivalent pytest command.
+            RuntimeError: If the worker cannot be started, e.g. because pytest is not installed.
+        """
+        command = " ".join(["pytest", *args])
+        if not await approve_command(command):
+            raise CommandRejected(f"Command rejected by approval policy: {command}")
+        async with self._lock, _semaphore():
+            if self._stale():
+                await self._start()
+            started = time.perf_counter()
+            with tempfile.TemporaryDirectory(prefix="agents_pytest_") as tmp:
+                paths = {name: os.path.join(tmp, name) for name in ("stdout", "stderr")}
+                request = {"args": args, "cwd": self.cwd, "timeout": timeout, **paths}
+                self._process.stdin.write((json.dumps(request) + "\n").encode())
+                await self._process.stdin.drain()
+                self.runs += 1
+                try:
+                    # The worker enforces the timeout itself; this only guards against a stuck worker.
+                    line = await asyncio.wait_for(self._process.stdout.readline(), timeout + 2 * KILL_GRACE_PERIOD + 5)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    await _terminate(self._process)
+                    raise
+                reply = json.loads(line) if line else {"returncode": None, "timed_out": False}
+                if on_output:
+                    for name, path in paths.items():
+                        if os.path.exists(path):
+                            with open(path, encoding="utf-8", errors="replace") as f:
+                                while chunk := f.read(READ_CHUNK_SIZE):
+                                    on_output(name, chunk)
+            return CommandResult("", "", reply["returncode"], reply["timed_out"], time.perf_counter() - started)
+
+    async def close(self) -> None:
+        await _terminate(self._process)
+
+
+# Sessions and workers belong to the event loop that started their processes.
+_shell_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_pytest_workers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+
+def get_shell_session(name: str = "default", cwd: str = ".") -> ShellSession:
+    """Return the shell session called `name` for the workspace at `cwd`, creating it if needed."""
+    sessions = _shell_sessions.setdefault(asyncio.get_running_loop(), {})
+    key = (os.path.abspath(cwd), name)
+    if key not in sessions:
+        sessions[key] = ShellSession(cwd)
+    return sessions[key]
+
+
+def get_pytest_worker(cwd: str = ".") -> PytestWorker:
+    """Return the warm pytest worker for the workspace at `cwd`, creating it if needed."""
+    workers = _pytest_workers.setdefault(asyncio.get_running_loop(), {})
+    key = os.path.abspath(cwd)
+    if key not in workers:
+        workers[key] = PytestWorker(cwd)
+    return workers[key]
+
+
+async def close_sessions() -> None:
+    """Stop every shell session and pytest worker started on the running event loop."""
+    loop = asyncio.get_running_loop()
+    for registry in (_shell_sessions, _pytest_workers):
+        for session in registry.pop(loop, {}).values():
+            await session.close()
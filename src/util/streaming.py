@@ -0,0 +1,158 @@
+import contextvars
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .retry_runner import RetryRunner
+from .telemetry import run_scope
+
+# Configuration
+STREAM_PIPELINES = os.environ.get("AGENTS_STREAM", "0") == "1"
+
+ProgressCallback = Callable[[str, dict[str, Any]], None]
+
+# Where agent and tool progress goes while a streamed step runs. Nested agents (called as tools)
+# inherit it, so their progress shows up under the step that called them.
+_progress: contextvars.ContextVar[ProgressCallback | None] = contextvars.ContextVar("progress", default=None)
+
+
+def emit_progress(kind: str, **fields: Any) -> bool:
+    """
+    Report progress ("agent_start", "agent_end", "tool_start", "tool_end", ...) to the streamed
+    step running in this context. Returns False when no streamed step is listening.
+    """
+    callback = _progress.get()
+    if callback is None:
+        return False
+    callback(kind, fields)
+    return True
+
+
+@dataclass
+class StepTiming:
+    step: str
+    agent: str
+    duration: float = 0.0
+    first_output: float | None = None  # seconds until the first token or tool call
+    first_token: float | None = None
+    tool_calls: int = 0
+
+
+class StreamPrinter:
+    """Write a streamed step to the terminal: text as it arrives, tool calls and nested agents as one line each."""
+
+    def __init__(self, out: Any = None):
+        self.out = out or sys.stdout
+        self._mid_line = False
+
+    def _line(self, text: str) -> None:
+        if self._mid_line:
+            self.out.write("\n")
+            self._mid_line = False
+        self.out.write(text + "\n")
+        self.out.flush()
+
+    def text(self, delta: str) -> None:
+        self.out.write(delta)
+        self.out.flush()
+        self._mid_line = not delta.endswith("\n")
+
+    def progress(self, kind: str, fields: dict[str, Any], nested: bool) -> None:
+        indent = "    " if nested else "  "
+        if kind == "tool_start":
+            self._line(f"{indent}▶ {fields.get('agent')}: {fields.get('tool')}")
+        elif kind == "tool_end":
+            self._line(f"{indent}✓ {fields.get('agent')}: {fields.get('tool')} ({fields.get('size', 0)} chars)")
+        elif kind == "agent_start" and nested:
+            self._line(f"  ↳ {fields.get('agent')} started")
+        elif kind == "agent_end" and nested:
+            self._line(f"  ↳ {fields.get('agent')} finished")
+
+    def end(self) -> None:
+        if self._mid_line:
+            self.out.write("\n")
+            self._mid_line = False
+
+
+_timings: list[StepTiming] = []
+
+
+async def run_step(step: str, agent: Any, input_items: Any, stream: bool = STREAM_PIPELINES, printer: StreamPrinter | None = None, **kwargs: Any):
+    """
+    Run one pipeline step. Without `stream` this is RetryRunner.run. With it the step uses the
+    streamed runner: the agent's text is printed as it is generated, tool calls (including
+    those of agents it calls as tools) as they start and end, and the time to first output is
+    recorded in step_timings(). Either way the run is measured in the pipeline's telemetry.
+
+    Returns:
+        The run result; a streamed result is fully consumed, so final_output, new_items and
+        to_input_list() are available as usual.
+    """
+    if not stream:
+        return await RetryRunner.run(agent, input_items, **kwargs)
+
+    printer = printer or StreamPrinter()
+    timing = StepTiming(step=step, agent=agent.name)
+    start = time.monotonic()
+    # Structured output arrives as JSON fragments; only plain text is worth echoing.
+    echo_text = getattr(agent, "output_type", None) in (None, str)
+
+    def mark_output(first_token: bool = False) -> None:
+        elapsed = time.monotonic() - start
+        if timing.first_output is None:
+            timing.first_output = elapsed
+        if first_token and timing.first_token is None:
+            timing.first_token = elapsed
+
+    def on_progress(kind: str, fields: dict[str, Any]) -> None:
+        if kind == "tool_start":
+            timing.tool_calls += 1
+            mark_output()
+        printer.progress(kind, fields, nested=fields.get("agent") != agent.name)
+
+    token = _progress.set(on_progress)
+    try:
+        with run_scope(agent.name):
+            result = RetryRunner.run_streamed(agent, input_items, **kwargs)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event":
+                    if getattr(event.data, "type", None) == "response.output_text.delta":
+                        mark_output(first_token=True)
+                        if echo_text:
+                            printer.text(event.data.delta)
+                elif event.type == "run_item_stream_event":
+                    mark_output()
+                elif event.type == "agent_updated_stream_event":
+                    printer.progress("agent_start", {"agent": event.new_agent.name}, nested=event.new_agent.name != agent.name)
+    finally:
+        _progress.reset(token)
+        printer.end()
+        timing.duration = time.monotonic() - start
+        _timings.append(timing)
+    return result
+
+
+def step_timings() -> list[StepTiming]:
+    """Return the timing of every streamed step run so far, in order."""
+    return list(_timings)
+
+
+def format_step_timings(timings: list[StepTiming] | None = None) -> str:
+    """A table of each streamed step's time to first output, first token, duration and tool calls."""
+    timings = step_timings() if timings is None else timings
+    if not timings:
+        return ""
+
+    def seconds(value: float | None) -> str:
+        return "-" if value is None else f"{value:.2f}s"
+
+    width = max(len(timing.step) for timing in timings)
+    lines = [f"{'step'.ljust(width)}  first output  first token  duration  tools"]
+    for timing in timings:
+        lines.append(
+            f"{timing.step.ljust(width)}  {seconds(timing.first_output):>12}  {seconds(timing.first_token):>11}"
+            f"  {seconds(timing.duration):>8}  {timing.tool_calls:>5}"
+        )
+    return "\n".join(lines)
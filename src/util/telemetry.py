@@ -0,0 +1,284 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterator
+
+from agents.models.interface import Model, ModelProvider
+
+from .trigram_index import INDEX_DIR_NAME
+
+# Configuration
+TELEMETRY_DIR = os.path.join(INDEX_DIR_NAME, "telemetry")
+
+
+@dataclass
+class Metrics:
+    """Counters for a group of agent runs; times in seconds."""
+
+    runs: int = 0
+    wall_seconds: float = 0.0
+    model_calls: int = 0
+    model_seconds: float = 0.0
+    queue_seconds: float = 0.0  # waiting for rate limiter admission
+    backoff_seconds: float = 0.0  # sleeping between retries
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    tool_calls: int = 0
+    tool_seconds: float = 0.0
+
+    def add(self, **deltas: float) -> None:
+        for name, value in deltas.items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+@dataclass
+class RunRecord:
+    """One agent run. Its metrics include the runs of agents it called as tools."""
+
+    agent: str
+    iteration: int | None
+    depth: int  # 0 for runs started by a pipeline, 1 for agents they called as tools, ...
+    started: float
+    metrics: Metrics = field(default_factory=Metrics)
+
+
+class Telemetry:
+    """
+    Collects model call, rate limiter, retry and tool metrics for one pipeline run and
+    aggregates them per agent, per iteration, per tool and for the whole run.
+    """
+
+    def __init__(self, pipeline: str = "pipeline"):
+        self.pipeline = pipeline
+        self.run_id = f"{pipeline}-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.runs: list[RunRecord] = []
+        self.agents: dict[str, Metrics] = {}
+        self.iterations: dict[int, Metrics] = {}
+        self.tools: dict[str, Metrics] = {}
+        self.total = Metrics()
+        self._lock = threading.Lock()
+
+    def record(self, agent: str | None = None, **deltas: float) -> None:
+        """Add `deltas` to the running agents, the agent (default: the innermost run's), the iteration and the total."""
+        stack = _runs.get()
+        agent = agent or (stack[-1].agent if stack else "unknown")
+        iteration = _iteration.get()
+        with self._lock:
+            for run in stack:
+                run.metrics.add(**deltas)
+            self.agents.setdefault(agent, Metrics()).add(**deltas)
+            if iteration is not None:
+                self.iterations.setdefault(iteration, Metrics()).add(**deltas)
+            self.total.add(**deltas)
+
+    def record_run(self, run: RunRecord, seconds: float) -> None:
+        with self._lock:
+            run.metrics.add(runs=1, wall_seconds=seconds)
+            self.runs.append(run)
+            self.agents.setdefault(run.agent, Metrics()).add(runs=1, wall_seconds=seconds)
+            # Nested runs are already inside their caller's wall time.
+            if run.depth == 0:
+                if run.iteration is not None:
+                    self.iterations.setdefault(run.iteration, Metrics()).add(runs=1, wall_seconds=seconds)
+                self.total.add(runs=1, wall_seconds=seconds)
+
+    def record_tool(self, agent: str, tool: str, seconds: float) -> None:
+        self.record(agent, tool_calls=1, tool_seconds=seconds)
+        with self._lock:
+            self.tools.setdefault(tool, Metrics()).add(tool_calls=1, tool_seconds=seconds)
+
+    def export(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "pipeline": self.pipeline,
+                "started": self.started,
+                "elapsed_seconds": round(time.monotonic() - self._start, 3),
+                "total": asdict(self.total),
+                "agents": {name: asdict(metrics) for name, metrics in self.agents.items()},
+                "iterations": {str(number): asdict(metrics) for number, metrics in self.iterations.items()},
+                "tools": {name: asdict(metrics) for name, metrics in self.tools.items()},
+                "runs": [asdict(run) for run in self.runs],
+            }
+
+
+# The agent runs the current task is inside, outermost first, and the pipeline iteration.
+_runs: contextvars.ContextVar[tuple[RunRecord, ...]] = contextvars.ContextVar("telemetry_runs", default=())
+_iteration: contextvars.ContextVar[int | None] = contextvars.ContextVar("telemetry_iteration", default=None)
+_telemetry = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    return _telemetry
+
+
+def start_telemetry_run(pipeline: str) -> Telemetry:
+    """Start collecting metrics for a new pipeline run, discarding the previous run's."""
+    global _telemetry
+    _telemetry = Telemetry(pipeline)
+    return _telemetry
+
+
+def start_iteration(iteration: int) -> None:
+    """Attribute the agent runs started from here on (in this task) to pipeline iteration `iteration`."""
+    _iteration.set(iteration)
+
+
+@contextmanager
+def run_scope(agent_name: str) -> Iterator[RunRecord]:
+    """Measure one agent run; model calls and tool calls made inside the block are added to it."""
+    stack = _runs.get()
+    run = RunRecord(agent=agent_name, iteration=_iteration.get(), depth=len(stack), started=time.time())
+    token = _runs.set(stack + (run,))
+    start = time.monotonic()
+    try:
+        yield run
+    finally:
+        _runs.reset(token)
+        _telemetry.record_run(run, time.monotonic() - start)
+
+
+def record_model_call(seconds: float, usage: Any = None) -> None:
+    """Record one request sent to a provider and the tokens it used."""
+    details = getattr(usage, "input_tokens_details", None)
+    _telemetry.record(
+        model_calls=1,
+        model_seconds=seconds,
+        input_tokens=getattr(usage, "input_tokens", 0) or 0,
+        output_tokens=getattr(usage, "output_tokens", 0) or 0,
+        cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+    )
+
+
+class TelemetryModel(Model):
+    """A Model that records each request it sends to the provider with record_model_call."""
+
+    def __init__(self, model: Model):
+        self.model = model
+
+    async def get_response(self, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            response = await self.model.get_response(*args, **kwargs)
+        except Exception:
+            record_model_call(time.monotonic() - start)
+            raise
+        record_model_call(time.monotonic() - start, response.usage)
+        return response
+
+    async def stream_response(self, *args, **kwargs):
+        start = time.monotonic()
+        usage = None
+        try:
+            async for event in self.model.stream_response(*args, **kwargs):
+                if getattr(event, "type", None) == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+                yield event
+        finally:
+            record_model_call(time.monotonic() - start, usage)
+
+    async def close(self) -> None:
+        await self.model.close()
+
+
+class TelemetryModelProvider(ModelProvider):
+    def __init__(self, provider: ModelProvider):
+        self.provider = provider
+
+    def get_model(self, model_name: str | None) -> Model:
+        return TelemetryModel(self.provider.get_model(model_name))
+
+
+def record_queue_wait(seconds: float) -> None:
+    _telemetry.record(queue_seconds=seconds)
+
+
+def record_retry(delay: float) -> None:
+    _telemetry.record(retries=1, backoff_seconds=delay)
+
+
+def record_tool_call(agent_name: str, tool_name: str, seconds: float) -> None:
+    _telemetry.record_tool(agent_name, tool_name, seconds)
+
+
+def telemetry_stats() -> dict[str, Any]:
+    """Return the current pipeline run's metrics: totals, per agent, per iteration, per tool and per agent run."""
+    return _telemetry.export()
+
+
+def format_telemetry(telemetry: Telemetry | None = None) -> str:
+    """
+    A table of wall time, model time, queue and backoff time, retries, tokens and tool time per
+    agent and per iteration, with the run's total. An agent's wall time includes the agents it
+    called as tools; model calls, tokens and waits count for the agent that made them.
+    """
+    telemetry = telemetry or _telemetry
+    rows = [(name, metrics) for name, metrics in telemetry.agents.items()]
+    rows += [(f"iteration {number}", metrics) for number, metrics in sorted(telemetry.iterations.items())]
+    rows.append(("total", telemetry.total))
+    if not telemetry.total.runs and not telemetry.total.model_calls:
+        return ""
+
+    width = max(len(name) for name, _ in rows)
+    header = (
+        f"{''.ljust(width)}  runs      wall  calls     model     queue   backoff  retries"
+        f"     input    output    cached  tools  tool time"
+    )
+    lines = [header]
+    for name, m in rows:
+        lines.append(
+            f"{name.ljust(width)}  {m.runs:>4}  {m.wall_seconds:>7.1f}s  {m.model_calls:>5}  {m.model_seconds:>7.1f}s"
+            f"  {m.queue_seconds:>7.1f}s  {m.backoff_seconds:>7.1f}s  {m.retries:>7}  {m.input_tokens:>8}"
+            f"  {m.output_tokens:>8}  {m.cached_tokens:>8}  {m.tool_calls:>5}  {m.tool_seconds:>8.1f}s"
+        )
+    return "\n".join(lines)
+
+
+def export_telemetry(path: str | None = None) -> str:
+    """
+    Write the current pipeline run's metrics as JSON (default: .agents_cache/telemetry/<run
+    id>.json), together with the model router's per-model cost and the counters of the caches,
+    the output governor, hedging, the rate limiter, the client pool and the event bus, so one
+    file shows where a run's time went and what saved it. Returns the path written.
+    """
+    # Imported here: rate_limiter and model_router import this module, and the rest only matter here.
+    from .client_pool import client_pool_stats
+    from .command_cache import command_cache_stats
+    from .event_bus import event_bus_stats
+    from .hedging import hedging_stats
+    from .model_router import model_router_stats
+    from .output_governor import tool_output_stats
+    from .rate_limiter import rate_limiter_stats
+    from .read_cache import read_cache_stats
+    from .response_cache import response_cache_stats
+    from .trigram_index import workspace_index_stats
+
+    path = path or os.path.join(TELEMETRY_DIR, f"{_telemetry.run_id}.json")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = telemetry_stats()
+    report["models"] = model_router_stats()
+    report["subsystems"] = {
+        "workspace_index": workspace_index_stats(),
+        "read_cache": read_cache_stats(),
+        "command_cache": command_cache_stats(),
+        "tool_output": tool_output_stats(),
+        "hedging": hedging_stats(),
+        "rate_limiter": rate_limiter_stats(),
+        "response_cache": response_cache_stats(),
+        "client_pool": client_pool_stats(),
+        "event_bus": event_bus_stats(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
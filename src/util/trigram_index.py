@@ -0,0 +1,434 @@
+import atexit
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from re import _parser
+from typing import Any
+
+from .file_events import add_file_change_listener
+from .file_walker import walk_entries, is_binary, matches_any
+
+# Configuration
+WORKSPACE_INDEX_ENABLED = os.environ.get("AGENTS_WORKSPACE_INDEX", "1") != "0"
+INDEX_DIR_NAME = ".agents_cache"
+INDEX_FILE_NAME = "trigram_index.pkl"
+INDEX_FORMAT_VERSION = 1
+MAX_INDEXED_FILE_BYTES = 2 * 1024 * 1024  # larger files are always treated as candidates
+MIN_FILTER_BITS = 1024
+MAX_FILTER_BITS = 1 << 20
+PARALLEL_BUILD_THRESHOLD = 256  # files to (re)index before worker processes are used
+
+# Per-file record: (mtime_ns, size, digest, filter_bits, filter)
+#   filter_bits == 0 and filter == 0 -> binary file, never a grep candidate
+#   filter is None                   -> too large to index, always a candidate
+FileRecord = tuple[int, int, bytes, int, int | None]
+
+
+def _filter_bits(trigram_count: int) -> int:
+    bits = MIN_FILTER_BITS
+    while bits < trigram_count * 4 and bits < MAX_FILTER_BITS:
+        bits <<= 1
+    return bits
+
+
+def _trigrams(data: bytes) -> set[tuple[int, int, int]]:
+    # zip + set keeps the per-byte work in C. Tuples of ints hash identically in every
+    # process (unlike bytes), so positions derived from hash() can be persisted.
+    return set(zip(data, data[1:], data[2:]))
+
+
+def _build_filter(data: bytes) -> tuple[int, int]:
+    """
+    Build a one-hash Bloom filter over the lower-cased byte trigrams of `data`. The filter is
+    sized to ~4 bits per distinct trigram, which keeps the false positive rate of a three
+    trigram query around 1% while costing a few hundred bytes per typical source file.
+    """
+    trigrams = _trigrams(data.lower())
+    bits = _filter_bits(len(trigrams))
+    mask = bits - 1
+    bitmap = bytearray(bits // 8)
+    for p in {h & mask for h in map(hash, trigrams)}:
+        bitmap[p >> 3] |= 1 << (p & 7)
+    return bits, int.from_bytes(bitmap, "little")
+
+
+def _filter_mask(trigrams: set[tuple[int, int, int]], bits: int) -> int:
+    mask = bits - 1
+    return sum(1 << p for p in {h & mask for h in map(hash, trigrams)})
+
+
+def _summarize_file(path: str, previous_digest: bytes | None) -> tuple[bytes, int, int | None] | None:
+    """
+    Read `path` and return (digest, filter_bits, filter) for its record. filter_bits is -1
+    when the content still matches `previous_digest`. Runs in worker processes on big builds.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_INDEXED_FILE_BYTES + 1)
+    except OSError:
+        return None
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    if digest == previous_digest:
+        return digest, -1, None
+    if is_binary(data):
+        return digest, 0, 0
+    if len(data) > MAX_INDEXED_FILE_BYTES:
+        return digest, 0, None
+    return (digest, *_build_filter(data))
+
+
+def _collect_literals(items, runs: list[str]) -> None:
+    current: list[str] = []
+    for op, av in items:
+        if op is _parser.LITERAL and av < 128:
+            current.append(chr(av))
+            continue
+        if current:
+            runs.append("".join(current))
+            current = []
+        if op is _parser.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            # A scoped flag group such as (?i:...) matches its literals differently from the
+            # rest of the pattern, so they cannot be required verbatim.
+            if not add_flags and not del_flags:
+                _collect_literals(sub, runs)
+        elif op is _parser.ATOMIC_GROUP:
+            _collect_literals(av, runs)
+        elif op in (_parser.MAX_REPEAT, _parser.MIN_REPEAT, _parser.POSSESSIVE_REPEAT):
+            low, _high, sub = av
+            if low >= 1:
+                _collect_literals(sub, runs)
+        # Alternations, classes, wildcards and assertions guarantee no literal text.
+    if current:
+        runs.append("".join(current))
+
+
+def required_literals(pattern: str) -> list[str]:
+    """
+    Return the runs of literal ASCII text that every match of `pattern` must contain, in
+    pattern order. An empty list means the pattern guarantees no literal text.
+    """
+    try:
+        parsed = _parser.parse(pattern)
+    except (re.error, RecursionError):
+        return []
+    runs: list[str] = []
+    _collect_literals(parsed, runs)
+    return runs
+
+
+def required_trigrams(pattern: str) -> set[tuple[int, int, int]]:
+    """
+    Return the lower-cased trigrams that every match of `pattern` must contain. An empty set
+    means the pattern cannot be narrowed (alternations, classes, short literals, ...).
+    """
+    trigrams = set()
+    for run in required_literals(pattern):
+        trigrams.update(_trigrams(run.lower().encode("ascii")))
+    return trigrams
+
+
+class TrigramIndex:
+    """
+    On-disk content index over a workspace, used to narrow the files a regex search has to open.
+
+    Each file is summarised by a Bloom filter of its byte trigrams. A query extracts the literal
+    trigrams a match must contain and keeps only the files whose filter holds all of them, so
+    regex matching only ever runs on a small candidate set. Records are refreshed from mtime and
+    size, and a content digest avoids re-tokenising files that were touched but not changed.
+
+    The first query under a directory walks it; later queries only stat the known directories
+    and files, and walk again when a directory's mtime shows entries were added or removed.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, INDEX_DIR_NAME, INDEX_FILE_NAME)
+        self.files: dict[str, FileRecord] = {}
+        self._walked: set[str] = set()  # subtrees walked since the last full invalidation
+        self._dirs: dict[str, int] = {}  # directory -> mtime_ns when last walked
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.counters = {
+            "queries": 0,
+            "hits": 0,
+            "misses": 0,
+            "candidates": 0,
+            "files_considered": 0,
+            "refreshes": 0,
+            "verifications": 0,
+            "files_indexed": 0,
+            "files_unchanged": 0,
+            "write_updates": 0,
+            "refresh_seconds": 0.0,
+        }
+
+    # Persistence
+
+    def load(self) -> bool:
+        """Load the index from disk. Returns False when there is no usable saved index."""
+        try:
+            with open(self.index_path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        if (
+            saved.get("version") != INDEX_FORMAT_VERSION
+            or saved.get("hash_width") != sys.hash_info.width
+            or saved.get("root") != self.root
+        ):
+            return False
+        with self._lock:
+            self.files = saved["files"]
+        return True
+
+    def save(self) -> None:
+        """Atomically write the index to disk if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": INDEX_FORMAT_VERSION,
+                "hash_width": sys.hash_info.width,
+                "root": self.root,
+                "files": dict(self.files),
+            }
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not save workspace index: {e}")
+
+    # Maintenance
+
+    def _rel(self, path: str) -> str | None:
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == os.curdir:
+            return ""
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return None
+        return rel.replace(os.sep, "/")
+
+    def _needs_update(self, rel_path: str, stat: os.stat_result) -> bool:
+        previous = self.files.get(rel_path)
+        return not (previous and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size)
+
+    def _apply_summary(
+        self, rel_path: str, stat: os.stat_result, summary: tuple[bytes, int, int | None] | None
+    ) -> None:
+        self._dirty = True
+        if summary is None:
+            self.files.pop(rel_path, None)
+            return
+        digest, bits, bloom = summary
+        if bits == -1:
+            previous = self.files[rel_path]
+            self.files[rel_path] = (stat.st_mtime_ns, stat.st_size, digest, previous[3], previous[4])
+            self.counters["files_unchanged"] += 1
+        else:
+            self.files[rel_path] = (stat.st_mtime_ns, stat.st_size, digest, bits, bloom)
+            self.counters["files_indexed"] += 1
+
+    def _index_files(self, todo: list[tuple[str, os.stat_result]]) -> None:
+        paths = [os.path.join(self.root, rel_path) for rel_path, _ in todo]
+        digests = [self.files[rel_path][2] if rel_path in self.files else None for rel_path, _ in todo]
+        if len(todo) >= PARALLEL_BUILD_THRESHOLD and (os.cpu_count() or 1) > 1:
+            # Tokenising is CPU bound Python, so large builds fan out to processes, not threads.
+            with ProcessPoolExecutor() as pool:
+                summaries = list(pool.map(_summarize_file, paths, digests, chunksize=64))
+        else:
+            summaries = list(map(_summarize_file, paths, digests))
+        for (rel_path, stat), summary in zip(todo, summaries):
+            self._apply_summary(rel_path, stat, summary)
+
+    def _is_walked(self, rel_dir: str) -> bool:
+        return any(d == "" or rel_dir == d or rel_dir.startswith(d + "/") for d in self._walked)
+
+    def _verify(self, rel_dir: str) -> None:
+        """
+        Bring the walked subtree `rel_dir` up to date with stat calls only: re-index files whose
+        mtime or size changed, and walk again if a directory changed (entries added or removed)
+        or a .gitignore was edited.
+        """
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for directory, mtime_ns in list(self._dirs.items()):
+            if directory == rel_dir or directory.startswith(prefix):
+                try:
+                    changed = os.stat(os.path.join(self.root, directory)).st_mtime_ns != mtime_ns
+                except OSError:
+                    changed = True
+                if changed:
+                    self.refresh(rel_dir)
+                    return
+        todo = []
+        for rel_path in [p for p in self.files if p.startswith(prefix)]:
+            try:
+                stat = os.stat(os.path.join(self.root, rel_path))
+            except OSError:
+                self.refresh(rel_dir)
+                return
+            if self._needs_update(rel_path, stat):
+                if rel_path.rsplit("/", 1)[-1] == ".gitignore":
+                    self.refresh(rel_dir)
+                    return
+                todo.append((rel_path, stat))
+        self._index_files(todo)
+        self.counters["verifications"] += 1
+
+    def refresh(self, rel_dir: str = "") -> None:
+        """Re-verify the subtree `rel_dir` against the disk, re-indexing changed files."""
+        with self._lock:
+            started = time.perf_counter()
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            seen = set()
+            todo = []
+            directory = os.path.join(self.root, rel_dir)
+            # Create the index's own directory first so saving it does not look like a change.
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            self._dirs = {d: m for d, m in self._dirs.items() if not (d == rel_dir or d.startswith(prefix))}
+            try:
+                self._dirs[rel_dir] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+            for item in walk_entries(directory, include_dirs=True):
+                rel_path = prefix + item.rel_path
+                try:
+                    stat = item.entry.stat()
+                except OSError:
+                    continue
+                if item.entry.is_dir():
+                    self._dirs[rel_path] = stat.st_mtime_ns
+                    continue
+                seen.add(rel_path)
+                if self._needs_update(rel_path, stat):
+                    todo.append((rel_path, stat))
+            self._index_files(todo)
+            for rel_path in [p for p in self.files if p.startswith(prefix) and p not in seen]:
+                del self.files[rel_path]
+                self._dirty = True
+
+            self._walked = {d for d in self._walked if not (d + "/").startswith(prefix)}
+            self._walked.add(rel_dir)
+            self.counters["refreshes"] += 1
+            self.counters["refresh_seconds"] += time.perf_counter() - started
+        self.save()
+
+    def on_file_changed(self, path: str | None) -> None:
+        """File change listener: re-index a written file, or mark everything stale."""
+        with self._lock:
+            if path is None:
+                self._walked.clear()
+                return
+            rel_path = self._rel(path)
+            if rel_path is None:
+                return
+            try:
+                stat = os.stat(os.path.join(self.root, rel_path))
+            except OSError:
+                if self.files.pop(rel_path, None) is not None:
+                    self._dirty = True
+                return
+            if self._needs_update(rel_path, stat):
+                self._index_files([(rel_path, stat)])
+            self.counters["write_updates"] += 1
+
+    # Queries
+
+    def _files_under(self, directory: str) -> tuple[str, list[str]] | None:
+        rel_dir = self._rel(directory)
+        if rel_dir is None or rel_dir.split("/")[0] == INDEX_DIR_NAME:
+            return None
+        if self._is_walked(rel_dir):
+            self._verify(rel_dir)
+        else:
+            self.refresh(rel_dir)
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        return prefix, sorted(p for p in self.files if p.startswith(prefix))
+
+    def candidates(
+        self, directory: str, pattern: str, ignore_case: bool, include: list[str] | None = None
+    ) -> list[str] | None:
+        """
+        Return the files under `directory` that may contain a match for `pattern`, as paths
+        joined onto `directory`, or None when `directory` lies outside the indexed workspace.
+        """
+        trigrams = required_trigrams(pattern)
+        with self._lock:
+            found = self._files_under(directory)
+            if found is None:
+                return None
+            prefix, rel_paths = found
+
+            masks: dict[int, int] = {}
+            result = []
+            for rel_path in rel_paths:
+                if not matches_any(rel_path.rsplit("/", 1)[-1], include):
+                    continue
+                _mtime, _size, _digest, bits, bloom = self.files[rel_path]
+                if bloom == 0 and bits == 0:
+                    continue
+                if trigrams and bloom is not None:
+                    mask = masks.get(bits)
+                    if mask is None:
+                        mask = masks[bits] = _filter_mask(trigrams, bits)
+                    if bloom & mask != mask:
+                        continue
+                result.append(os.path.join(directory, rel_path[len(prefix):]))
+
+            self.counters["queries"] += 1
+            self.counters["hits" if trigrams else "misses"] += 1
+            self.counters["candidates"] += len(result)
+            self.counters["files_considered"] += len(rel_paths)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"root": self.root, "indexed_files": len(self.files), **self.counters}
+
+
+_indexes: dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _on_file_changed(path: str | None) -> None:
+    for index in list(_indexes.values()):
+        index.on_file_changed(path)
+
+
+def _save_all() -> None:
+    for index in list(_indexes.values()):
+        index.save()
+
+
+def get_workspace_index(root: str = ".") -> TrigramIndex | None:
+    """
+    Return the shared index for the workspace at `root`, loading it from disk on first use.
+    Returns None when indexing is disabled with AGENTS_WORKSPACE_INDEX=0.
+    """
+    if not WORKSPACE_INDEX_ENABLED:
+        return None
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = TrigramIndex(key)
+            index.load()
+            if not _indexes:
+                add_file_change_listener(_on_file_changed)
+                atexit.register(_save_all)
+            _indexes[key] = index
+    return index
+
+
+def workspace_index_stats() -> list[dict[str, Any]]:
+    """Return hit/miss and maintenance statistics for every workspace index in use."""
+    return [index.stats() for index in list(_indexes.values())]
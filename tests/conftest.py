@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_openai_server import FakeOpenAIServer  # noqa: E402
+
+
+@pytest.fixture
+def fake_openai():
+    """Start fake OpenAI-compatible servers: `fake_openai(delay=..., status=...)`; all are stopped after the test."""
+    servers: list[FakeOpenAIServer] = []
+
+    def start(**options) -> FakeOpenAIServer:
+        server = FakeOpenAIServer(**options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
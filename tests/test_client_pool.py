@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+from agents import ModelSettings, RunConfig
+from agents.models.interface import ModelTracing
+
+from util import hedging
+from util import client_pool
+from util.client_pool import ClientPool, Endpoint, PooledModelProvider
+from util.retry_runner import RetryRunner
+
+
+@pytest.fixture(autouse=True)
+def short_deadlines(monkeypatch):
+    """Half a second per attempt, no hedging, and no probes reordering the endpoints."""
+    monkeypatch.setattr(client_pool, "PROBE_FRACTION", 0.0)
+    default = hedging.hedge_policy()
+    hedging.set_hedge_policy(hedging.HedgePolicy(hedge=False, min_deadline=0.1, max_deadline=0.5))
+    yield
+    hedging.set_hedge_policy(default)
+
+
+def _pool(*servers) -> ClientPool:
+    return ClientPool([Endpoint(name=f"endpoint{i}", base_url=server.base_url, api_key="test") for i, server in enumerate(servers)])
+
+
+async def _ask(model):
+    return await model.get_response(
+        None, "hello", ModelSettings(), [], None, [], ModelTracing.DISABLED,
+        previous_response_id=None, conversation_id=None, prompt=None,
+    )
+
+
+def _text(response) -> str:
+    return response.output[0].content[0].text
+
+
+def test_hanging_endpoint_fails_over_within_its_deadline(fake_openai):
+    hanging = fake_openai(delay=5.0)
+    healthy = fake_openai(reply="from healthy")
+    pool = _pool(hanging, healthy)
+
+    async def main():
+        start = time.monotonic()
+        response = await _ask(PooledModelProvider(pool).get_model("fake-model"))
+        await pool.close()
+        return response, time.monotonic() - start
+
+    response, elapsed = asyncio.run(main())
+    assert _text(response) == "from healthy"
+    assert elapsed < 2.0
+    assert list(pool.health["endpoint0"].outcomes) == [False]
+    assert list(pool.health["endpoint1"].outcomes) == [True]
+
+
+def test_server_error_fails_over(fake_openai):
+    failing = fake_openai(status=500)
+    healthy = fake_openai(reply="from healthy")
+    pool = _pool(failing, healthy)
+
+    async def main():
+        response = await _ask(PooledModelProvider(pool).get_model("fake-model"))
+        await pool.close()
+        return response
+
+    assert _text(asyncio.run(main())) == "from healthy"
+    assert failing.requests == 1
+    assert pool.health["endpoint0"].consecutive_failures == 1
+
+
+def test_run_config_leaves_deadlines_to_the_pool(fake_openai):
+    """The full model chain must not cut a call off while the pool is failing over."""
+    hanging = fake_openai(delay=0.4)
+    healthy = fake_openai(reply="from healthy", delay=0.3)
+    pool = _pool(hanging, healthy)
+    hedging.set_hedge_policy(hedging.HedgePolicy(hedge=False, min_deadline=0.1, max_deadline=0.35))
+    provider = RetryRunner.run_config(RunConfig(model_provider=PooledModelProvider(pool))).model_provider
+
+    async def main():
+        response = await _ask(provider.get_model("fake-model"))
+        await pool.close()
+        return response
+
+    assert _text(asyncio.run(main())) == "from healthy"
+    assert hanging.requests == 1 and healthy.requests == 1
+
+
+def test_cancelled_call_is_recorded(fake_openai):
+    hanging = fake_openai(delay=2.0)
+    pool = _pool(hanging)
+    hedging.set_hedge_policy(hedging.HedgePolicy(hedge=False, max_deadline=5.0))
+
+    async def main():
+        task = asyncio.create_task(_ask(PooledModelProvider(pool).get_model("fake-model")))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await pool.close()
+
+    asyncio.run(main())
+    health = pool.health["endpoint0"]
+    assert list(health.outcomes) == [False]
+    assert health.in_flight == 0
+    assert health.consecutive_failures == 0
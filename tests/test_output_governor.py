@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from util.output_governor import CHARS_PER_TOKEN, govern_output
+from util.output_spool import read_spooled_output
+
+BODY = "\n".join(f"line {i}: " + "x" * 60 for i in range(5000))
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"files": [{"path": "a.py", "content": BODY}]},
+        [BODY],
+        {"files": [{"path": f"{i}.py", "content": BODY} for i in range(3)], "skipped": []},
+        {"nested": {"deeper": [[BODY, BODY], {"text": BODY}]}},
+        {"rows": [{"line": i, "text": "y" * 80} for i in range(2000)]},
+        BODY,
+    ],
+)
+def test_output_fits_the_budget(result, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = govern_output("test", result, 2000)
+    assert len(output) <= 2000 * CHARS_PER_TOKEN
+    assert "_truncated" in json.loads(output) or isinstance(result, str)
+
+
+def test_spooled_result_pages_by_source_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = json.loads(govern_output("test", {"files": [{"path": "a.py", "content": BODY}]}, 2000))
+    page = read_spooled_output(output["_truncated"]["output_id"], "stdout", 0, 200)
+    assert page["count"] == 200
+    assert page["lines"].splitlines()[2] == "3: line 0: " + "x" * 60
+    assert len(page["lines"]) < 30000
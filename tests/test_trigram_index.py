@@ -0,0 +1,17 @@
+import pytest
+
+from util.trigram_index import required_literals
+
+
+@pytest.mark.parametrize(
+    "pattern, literals",
+    [
+        ("foo(bar)+baz", ["foo", "bar", "baz"]),
+        ("(?i:foo)bar", ["bar"]),
+        ("(?-i:Foo)bar", ["bar"]),
+        ("foo|bar", []),
+        ("(?i)foobar", ["foobar"]),
+    ],
+)
+def test_required_literals(pattern, literals):
+    assert required_literals(pattern) == literals